@@ -1,14 +1,14 @@
-import numpy as np
-from scipy.stats import norm
-from numpy.linalg import inv, solve
 import polars as pl
 
+from service.modelling.native import FayHerriot
+
+
 def eblupFH(formula, vardir, method="REML", MAXITER=100, PRECISION=1e-4, B=0, data=None):
     """
     Empirical Best Linear Unbiased Prediction (EBLUP) based on Fay-Herriot model.
 
     Parameters:
-    - formula: Patsy formula describing the model (e.g., 'y ~ x1 + x2').
+    - formula: R-style formula describing the model (e.g., 'y ~ x1 + x2').
     - vardir: Array-like, sampling variances for each domain.
     - method: Estimation method ('REML', 'ML', or 'FH').
     - MAXITER: Maximum number of iterations for convergence.
@@ -19,174 +19,41 @@ def eblupFH(formula, vardir, method="REML", MAXITER=100, PRECISION=1e-4, B=0, da
     Returns:
     - Dictionary containing EBLUP estimates, model coefficients, variance estimates, and goodness-of-fit measures.
     """
-    import patsy
-
-    if method not in ["REML", "ML", "FH"]:
-        raise ValueError(f"method='{method}' must be 'REML', 'ML', or 'FH'.")
-
-    # Prepare design matrix X and response vector y
-    y, X = patsy.dmatrices(formula, data.to_pandas(), return_type='dataframe')
-    y = y.values.flatten()
-    X = X.values
-    vardir = np.asarray(vardir)
-
-    m = len(y)  # Number of areas
-    p = X.shape[1]  # Number of predictors
-
-    # Initialize variance component A
-    A_est = [np.median(vardir)]
-    k = 0
-    diff = PRECISION + 1
-
-    while diff > PRECISION and k < MAXITER:
-        Vi = 1 / (A_est[k] + vardir)
-        XtVi = X.T * Vi
-        Q = inv(XtVi @ X)
-        P = np.diag(Vi) - XtVi.T @ Q @ XtVi
-        Py = P @ y
-
-        if method == "ML":
-            s = -0.5 * np.sum(Vi) + 0.5 * Py.T @ Py
-            F = 0.5 * np.sum(Vi ** 2)
-        elif method == "REML":
-            s = -0.5 * np.trace(P) + 0.5 * Py.T @ Py
-            F = 0.5 * np.trace(P @ P)
-        elif method == "FH":
-            beta_aux = Q @ XtVi @ y
-            res_aux = y - X @ beta_aux
-            s = np.sum((res_aux ** 2) * Vi) - (m - p)
-            F = np.sum(Vi)
-
-        A_new = A_est[k] + s / F
-        A_est.append(A_new)
-        diff = abs((A_est[k + 1] - A_est[k]) / A_est[k])
-        k += 1
-
-    A_final = max(A_est[-1], 0)
-
-    # Check convergence
-    convergence = k < MAXITER or diff < PRECISION
-
-    # Compute beta estimates
-    Vi = 1 / (A_final + vardir)
-    XtVi = X.T * Vi
-    Q = inv(XtVi @ X)
-    beta_hat = Q @ XtVi @ y
-
-    # Compute standard errors, t-values, and p-values
-    std_error_beta = np.sqrt(np.diag(Q))
-    t_values = beta_hat / std_error_beta
-    p_values = 2 * norm.sf(np.abs(t_values))
-
-    # Compute EBLUP
-    X_beta = X @ beta_hat
-    resid = y - X_beta
-    eblup = X_beta + A_final * Vi * resid
-
-    # Compute goodness-of-fit measures
-    loglike = -0.5 * np.sum(np.log(2 * np.pi * (A_final + vardir)) + (resid ** 2) / (A_final + vardir))
-    AIC = -2 * loglike + 2 * (p + 1)
-    BIC = -2 * loglike + (p + 1) * np.log(m)
-    min2loglike = -2 * loglike
-    KIC = min2loglike + 3 * (p + 1)
-
-    # Compile results
-    coef_table = {
-        'beta': beta_hat,
-        'std.error': std_error_beta,
-        'tvalue': t_values,
-        'pvalue': p_values
-    }
-
-    result = {
-        'eblup': eblup,
-        'fit': {
-            'method': method,
-            'convergence': convergence,
-            'iterations': k,
-            'estcoef': coef_table,
-            'refvar': A_final,
-            'goodness': {
-                'loglike': loglike,
-                'AIC': AIC,
-                'BIC': BIC,
-                'KIC': KIC
-            }
-        }
-    }
 
-    return result
+    if data is None:
+        raise ValueError("Data must be provided as a polars DataFrame.")
+    y, X, _, _ = FayHerriot.design_matrix(data, *FayHerriot.parse_formula(formula))
+    return FayHerriot.eblupFH(y, X, vardir, method, MAXITER, PRECISION)
 
 
 def mseFH(formula, vardir_col, method="REML", MAXITER=100, PRECISION=1e-4, B=0, data=None):
-    result = {"est": None, "mse": None}
+    """
+    EBLUP estimates and their analytical MSE based on Fay-Herriot model.
+    See `service.modelling.native.FayHerriot.mseFH`; `vardir_col` names the column of `data`
+    holding the sampling variances.
+    """
 
-    if data is not None:
-        y = data.select(formula.split('~')[0].strip()).to_numpy().flatten()
-        X_cols = [col.strip() for col in formula.split('~')[1].split('+')]
-        X = data.select(X_cols).to_numpy()
-        vardir = data[vardir_col].to_numpy()
-    else:
+    if data is None:
         raise ValueError("Data must be provided as a polars DataFrame.")
-
-    if np.any(np.isnan(y)) or np.any(np.isnan(vardir)):
-        raise ValueError("NA values found in response or vardir.")
-
-    # Estimation step
-    result["est"] = eblupFH(formula, vardir, method, MAXITER, PRECISION, B, data)
+    y, X, vardir, _ = FayHerriot.design_matrix(data, *FayHerriot.parse_formula(formula), vardir=vardir_col)
+    result = FayHerriot.mseFH(y, X, vardir, method, MAXITER, PRECISION)
     if not result["est"]["fit"]["convergence"]:
         print("Warning: The fitting method does not converge.")
-        return result
-
-    A = result["est"]["fit"]["refvar"]
-    m, p = X.shape
-    
-    g1d = np.zeros(m)
-    g2d = np.zeros(m)
-    g3d = np.zeros(m)
-    mse2d = np.zeros(m)
-    
-    Vi = 1 / (A + vardir)
-    Bd = vardir / (A + vardir)
-    SumAD2 = np.sum(Vi**2)
-    XtVi = (Vi[:, np.newaxis] * X).T
-    Q = solve(XtVi @ X, np.eye(p))
-
-    
-
-    if method == "REML":
-        VarA = 2 / SumAD2  # Varian asimtotik estimator REML/ML
-        for d in range(m):
-            g1d[d] = vardir[d] * (1 - Bd[d])
-            xd = X[d, :].reshape(1, p)  # ubah menjadi matriks baris 1xP
-            g2d[d] = (Bd[d]**2) * xd @ Q @ xd.T
-            g3d[d] = (Bd[d]**2) * VarA / (A + vardir[d])
-            mse2d[d] = g1d[d] + g2d[d] + 2 * g3d[d]
-
-    elif method == "ML":
-        VarA = 2 / SumAD2
-        b = -1 * np.sum(np.diag(Q @ ((Vi**2).reshape(-1, 1) * X).T @ X)) / SumAD2
-        for d in range(m):
-            g1d[d] = vardir[d] * (1 - Bd[d])
-            xd = X[d, :].reshape(1, p)
-            g2d[d] = (Bd[d]**2) * xd @ Q @ xd.T
-            g3d[d] = (Bd[d]**2) * VarA / (A + vardir[d])
-            mse2d[d] = g1d[d] + g2d[d] + 2 * g3d[d] - b * (Bd[d]**2)
-
-    else:  # Metode FH
-        SumAD = np.sum(Vi)
-        VarA = 2 * m / (SumAD**2)
-        b = 2 * (m * SumAD2 - SumAD**2) / (SumAD**3)
-        for d in range(m):
-            g1d[d] = vardir[d] * (1 - Bd[d])
-            xd = X[d, :].reshape(1, p)
-            g2d[d] = (Bd[d]**2) * xd @ Q @ xd.T
-            g3d[d] = (Bd[d]**2) * VarA / (A + vardir[d])
-            mse2d[d] = g1d[d] + g2d[d] + 2 * g3d[d] - b * (Bd[d]**2)
+    return result
 
+def mseFH_batch(pairs, formula, method="REML", MAXITER=100, PRECISION=1e-4, data=None):
+    """
+    Fits the same auxiliary formula to several responses in one pass.
+    `pairs` lists (response, vardir_col) tuples and `formula` holds the shared right-hand side
+    (e.g. '~ x1 + x2'). Returns one `mseFH` result per pair, see
+    `service.modelling.native.FayHerriot.mseFH_batch`.
+    """
 
-    result["mse"] = mse2d
-    return result
+    if data is None:
+        raise ValueError("Data must be provided as a polars DataFrame.")
+    _, auxiliary, factors = FayHerriot.parse_formula(formula)
+    Y, X, Vardir, _ = FayHerriot.design_matrix_batch(data, pairs, auxiliary, factors)
+    return FayHerriot.mseFH_batch(Y, X, Vardir, method, MAXITER, PRECISION)
 
 if __name__ == "__main__":
     # Import the data using polars
@@ -201,4 +68,4 @@ if __name__ == "__main__":
 
     # Print the results
     print("Estimation Results:", result["est"])
-    print("MSE Results:", result["mse"])
\ No newline at end of file
+    print("MSE Results:", result["mse"])
@@ -12,41 +12,65 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib.styles import ParagraphStyle
 import io
+import os
 from service.command.LoadDataCommand import LoadDataCommand
 from service.command.LoadSecondaryDataCommand import LoadSecondaryDataCommand
+from service.utils.file_loader import FileLoader, csv_batches, bytes_per_row, scan_delimited
+from service.utils.schema_cache import schema_cache
+from service.utils.file_exporter import FileExporter, EXPORT_FORMATS, EXPORT_FILTERS
 
 class FileController:
     """
     Controller class to handle file operations such as loading, saving, and exporting data.
+    CSV, text and TSV files larger than `lazy_threshold` bytes, Parquet and Arrow IPC (Feather) files are
+    opened lazily with `pl.scan_csv` / `pl.scan_parquet` / `pl.scan_ipc`: the table model keeps the LazyFrame
+    and only collects the rows shown, and model runs push their column selection and filters down to the scan.
+    Uncompressed IPC files are memory-mapped by the scan, so they open without being read.
+    Data is saved in the background by a `FileExporter`, which writes the model's scan batch by batch
+    (delimited, gzip-compressed CSV and line-delimited JSON files) or streams it (zstd Parquet and
+    uncompressed, memory-mappable IPC files).
+    Smaller delimited files, Excel and JSON files are read in the background by a `FileLoader`: delimited
+    files are streamed in batches of `load_batch_size` rows, the first rows are shown as soon as they are
+    read, the progress is shown in the status bar and the load can be cancelled from there.
+    The column types set by the user on a delimited file are remembered (`service.utils.schema_cache`)
+    and passed as `schema_overrides` the next time the unchanged file is opened, so it opens already typed.
     Attributes:
         model1: The first data model.
         model2: The second data model.
         view: The view component of the MVC architecture.
+        lazy_threshold (int): The file size in bytes from which delimited files are opened lazily.
+        load_batch_size (int): The number of rows per batch of a delimited file read in the background.
+        file_task (FileLoader or FileExporter): The load or save running in the background, None if idle.
+        schema_source (tuple): The path and read options of the delimited file last opened, None for other
+                               files. Type changes of the loaded data are remembered for that file.
     Methods:
         __init__(model1, model2, view):
             Initializes the FileController with the given models and view.
         load_file():
             Loads a CSV or Excel file into the first model.
+        load_secondary_data():
+            Loads a file and merges it into the first model.
+        cancel_file_task():
+            Cancels the load or save running in the background.
         save_data():
-            Saves data from the first model to a file in various formats (CSV, Excel, JSON, Text).
+            Saves data from the first model to a file in various formats (see `EXPORT_FORMATS`).
         save_data_output():
-            Saves data from the second model to a file in various formats (CSV, Excel, JSON, Text).
-        save_as_csv(file_path, model):
-            Saves data from the given model as a CSV file.
-        save_as_excel(file_path, model):
-            Saves data from the given model as an Excel file.
-        save_as_json(file_path, model):
-            Saves data from the given model as a JSON file.
-        save_as_txt(file_path, model):
-            Saves data from the given model as a text file with tab-separated values.
+            Saves data from the second model to a file in various formats (see `EXPORT_FORMATS`).
+        save_model(model, title, message):
+            Saves data from the given model in the background, in the selected format.
         export_output_to_pdf():
             Exports the content of all widgets in the output layout to a PDF file.
     """
     
+    lazy_threshold = 256 * 1024 * 1024
+    load_batch_size = 50_000
+
     def __init__(self, model1, model2, view):
         self.model1 = model1
         self.model2 = model2
         self.view = view
+        self.file_task = None
+        self.schema_source = None
 
         # Hubungkan menu bar dengan fungsi
         self.view.load_action.triggered.connect(self.load_file)
@@ -57,17 +81,22 @@ class FileController:
         self.view.save_output_pdf.triggered.connect(self.export_output_to_pdf)
         self.view.recent_data.triggered.connect(self.view.load_temp_data)
         self.view.load_secondary_data.triggered.connect(self.load_secondary_data)  
+        self.view.file_progress.cancel_button.clicked.connect(self.cancel_file_task)
 
     def open_file(self):
-        """Open file CSV, Excel, atau Text and load to first model"""
+        """Open file CSV, Excel, Text, JSON, Parquet atau Arrow IPC and load to first model.
+        Large delimited files, Parquet and IPC files are returned as a LazyFrame (see `lazy_threshold`), the
+        other files as a `FileLoader` reading them in the background, not started yet."""
         file_path, selected_filter = QFileDialog.getOpenFileName(
             self.view, "Open File", "",
-            "CSV Files (*.csv);;Excel Files (*.xlsx);;Text Files (*.txt);;TSV Files (*.tsv);;JSON Files (*.json)"
+            "CSV Files (*.csv);;Excel Files (*.xlsx);;Text Files (*.txt);;TSV Files (*.tsv);;JSON Files (*.json);;"
+            "Parquet Files (*.parquet);;Arrow IPC Files (*.arrow *.feather *.ipc)"
         )
 
         if not file_path:  # Jika file tidak dipilih
             return
 
+        self.schema_source = None
         try:
             if selected_filter in ["CSV Files (*.csv)", "Text Files (*.txt)", "TSV Files (*.tsv)"]:
                 dialog = CSVOptionsDialog(self.view)
@@ -82,12 +111,18 @@ class FileController:
                 if separator == r"\t":  # Jika input adalah string literal "\t"
                     separator = "\t"
 
-                # Baca data dari CSV dengan atau tanpa header
-                if header:
-                    data = pl.read_csv(file_path, separator=separator, ignore_errors=True, has_header=True, null_values=["NA", "NULL", "na", "null"])
+                # Baca data dari CSV dengan atau tanpa header, lazily untuk file besar,
+                # with the column types remembered for the file (see `schema_cache`)
+                options = {"separator": separator, "header": header}
+                overrides = schema_cache.get(file_path, **options)
+                self.schema_source = (file_path, options)
+                if os.path.getsize(file_path) >= self.lazy_threshold:
+                    data = scan_delimited(file_path, separator, header, overrides)
                 else:
-                    data = pl.read_csv(file_path, separator=separator, ignore_errors=True, has_header=False, null_values=["NA", "NULL", "na", "null"])
-                    data.columns = [f"Column {i+1}" for i in range(data.shape[1])]
+                    data = FileLoader(
+                        lambda: csv_batches(file_path, separator, header, self.load_batch_size, overrides),
+                        file_path, bytes_per_row(file_path)
+                    )
             
             elif selected_filter == "Excel Files (*.xlsx)":
                 dialog = ExcelOptionsDialog(self.view)
@@ -103,28 +138,99 @@ class FileController:
                 
                 if not file_path or not selected_sheet:  # Jika file tidak dipilih
                     return
-                data = pl.read_excel(file_path, sheet_name=selected_sheet, has_header=hdr)
+                data = FileLoader(lambda: [pl.read_excel(file_path, sheet_name=selected_sheet, has_header=hdr)], file_path)
                 
             elif selected_filter == "JSON Files (*.json)":
-                data = pl.read_json(file_path)
+                data = FileLoader(lambda: [pl.read_json(file_path)], file_path)
+            
+            elif selected_filter == "Parquet Files (*.parquet)":
+                data = pl.scan_parquet(file_path)
+
+            elif selected_filter == "Arrow IPC Files (*.arrow *.feather *.ipc)":
+                data = pl.scan_ipc(file_path)
             
             return data
         except Exception as e:
             QMessageBox.critical(self.view, "Error", f"Failed to load file: {str(e)}")
     
     def load_file(self):
-        """Load file CSV, Excel, atau Text to first model (Sheet 1) and update tabel."""
+        """Load file CSV, Excel, atau Text to first model (Sheet 1) and update tabel.
+        A file read in the background replaces the data with its first batch as soon as it is read, the
+        next batches are appended while the rows can be browsed (but not edited). The load is recorded as
+        one undoable LoadDataCommand once complete; a cancelled or failed load restores the previous data."""
+        if self.is_busy():
+            return
         data = self.open_file()
         if data is None:
             return
-        else:
-            # Create and execute the LoadDataCommand
-            command = LoadDataCommand(self.model1, data)
-            self.model1.undo_stack.push(command)
-            self.view.update_table(1, self.model1)
-            QMessageBox.information(self.view, "Success", "File loaded successfully!")
-            self.view.autosave_data()
-        
+        schema_source = self.schema_source
+        if not isinstance(data, FileLoader):
+            self.finish_load_file(data, self.model1.source(), schema_source)
+            return
+
+        old_data = self.model1.source()
+        shown = []
+
+        def show_batch(batch):
+            if data.is_cancelled():
+                return
+            if shown:
+                self.model1.append_rows(batch)
+            else:
+                self.model1.set_data(batch)
+                self.view.update_table(1, self.model1)
+                shown.append(batch)
+
+        def on_finished(new_data, error):
+            self.model1.loading = False
+            if new_data is None:
+                if shown:
+                    self.model1.set_data(old_data)
+                    self.view.update_table(1, self.model1)
+                if error is not None:
+                    QMessageBox.critical(self.view, "Error", f"Failed to load file: {str(error)}")
+                return
+            # The model already holds the rows appended batch by batch
+            self.finish_load_file(self.model1.source() if shown else new_data, old_data, schema_source)
+
+        self.model1.loading = True
+        self.start_loader(data, show_batch, on_finished)
+
+    def finish_load_file(self, data, old_data, schema_source=None):
+        """Record the loaded data in the first model as an undoable LoadDataCommand."""
+        command = LoadDataCommand(self.model1, data, old_data, schema_source)
+        self.model1.undo_stack.push(command)
+        self.view.update_table(1, self.model1)
+        QMessageBox.information(self.view, "Success", "File loaded successfully!")
+        self.view.autosave_data()
+
+    def is_busy(self):
+        """Check if a file is being read or written in the background, and tell the user so."""
+        if self.file_task is None:
+            return False
+        QMessageBox.warning(self.view, "Warning", "A file is still being loaded or saved. Please wait or cancel it first.")
+        return True
+
+    def start_loader(self, loader, on_batch, on_finished):
+        """Start reading a file in the background, showing its progress in the status bar."""
+        def finished(data, error):
+            self.file_task = None
+            self.view.file_progress.finish()
+            on_finished(data, error)
+
+        self.file_task = loader
+        loader.batch_loaded.connect(on_batch)
+        loader.progress.connect(self.view.file_progress.update_progress)
+        loader.finished.connect(finished)
+        self.view.file_progress.start(os.path.basename(loader.file_path))
+        loader.start()
+
+    def cancel_file_task(self):
+        """Cancel the file being read or written in the background."""
+        if self.file_task is not None:
+            self.file_task.cancel()
+            self.view.file_progress.cancel_button.setEnabled(False)
+
     
     def load_secondary_data(self):
         """
@@ -138,13 +244,29 @@ class FileController:
         - Allow manual column mapping for columns with different names but same meaning
         """
 
-        main_df = self.model1.get_data()
-        if main_df is None:
+        if self.model1.source() is None:
             QMessageBox.warning(self.view, "Warning", "No data loaded in Sheet 1. Please load data first.")
             return
+        if self.is_busy():
+            return
         data = self.open_file()
         if data is None:
             return
+        if not isinstance(data, FileLoader):
+            self.merge_secondary_data(data.collect() if isinstance(data, pl.LazyFrame) else data)
+            return
+
+        def on_finished(new_data, error):
+            if error is not None:
+                QMessageBox.critical(self.view, "Error", f"Failed to load file: {str(error)}")
+            elif new_data is not None:
+                self.merge_secondary_data(new_data)
+
+        self.start_loader(data, lambda batch: None, on_finished)
+
+    def merge_secondary_data(self, data):
+        """Ask how to merge the secondary data `data` into the first model and merge it (see `load_secondary_data`)."""
+        main_df = self.model1.get_data()
 
         class MergeOptionDialog(QDialog):
             def __init__(self, parent=None):
@@ -441,70 +563,40 @@ class FileController:
         
     def save_data(self):
         """Save data from the first model (Sheet 1)."""
-        file_path, selected_filter = QFileDialog.getSaveFileName(
-            self.view, "Save File", "",
-            "CSV Files (*.csv);;Excel Files (*.xlsx);;JSON Files (*.json);;Text Files (*.txt)"
-        )
-        
-        if file_path:
-
-            try:
-                if selected_filter == "CSV Files (*.csv)":
-                    self.save_as_csv(file_path, self.model1)
-                elif selected_filter == "Excel Files (*.xlsx)":
-                    self.save_as_excel(file_path, self.model1)
-                elif selected_filter == "JSON Files (*.json)":
-                    self.save_as_json(file_path, self.model1)
-                elif selected_filter == "Text Files (*.txt)":
-                    self.save_as_txt(file_path, self.model1)
-
-                QMessageBox.information(self.view, "Success", "File saved successfully!")
-            except Exception as e:
-                QMessageBox.critical(self.view, "Error", f"Failed to save file: {str(e)}")
+        self.save_model(self.model1, "Save File", "File saved successfully!")
 
     def save_data_output(self):
-        """Save data from the first model (Sheet 1)."""
-        file_path, selected_filter = QFileDialog.getSaveFileName(
-            self.view, "Save Output Data", "",
-            "CSV Files (*.csv);;Excel Files (*.xlsx);;JSON Files (*.json);;Text Files (*.txt)"
-        )
-        
-        if file_path:
-
-            try:
-                if selected_filter == "CSV Files (*.csv)":
-                    self.save_as_csv(file_path, self.model2)
-                elif selected_filter == "Excel Files (*.xlsx)":
-                    self.save_as_excel(file_path, self.model2)
-                elif selected_filter == "JSON Files (*.json)":
-                    self.save_as_json(file_path, self.model2)
-                elif selected_filter == "Text Files (*.txt)":
-                    self.save_as_txt(file_path, self.model2)
-
-                QMessageBox.information(self.view, "Success", "Output file saved successfully!")
-            except Exception as e:
-                QMessageBox.critical(self.view, "Error", f"Failed to save file: {str(e)}")
-
-    def save_as_csv(self, file_path, model):
-        """Save data as CSV."""
-        data = model.get_data()
-        data.write_csv(file_path)
-
-    def save_as_excel(self, file_path, model):
-        """Save data as Excel."""
-        data = model.get_data()
-        data.write_excel(file_path)
-
-    def save_as_json(self, file_path, model):
-        """Save data as JSON."""
-        data = model.get_data()
-        data.write_json(file_path, orient="records", lines=True)
-
-    def save_as_txt(self, file_path, model):
-        """Save data as file teks."""
-        data = model.get_data()
-        data.write_csv(file_path, separator="\t")
+        """Save data from the second model (Sheet 2)."""
+        self.save_model(self.model2, "Save Output Data", "Output file saved successfully!")
+
+    def save_model(self, model, title, message):
+        """
+        Save the data of `model` in the background with a `FileExporter`, in the format of the selected filter.
+        The model's scan is written batch by batch (or streamed, for Parquet and IPC files), so a lazy model
+        is not materialized; the progress is shown in the status bar and the save can be cancelled there.
+        """
+        if self.is_busy():
+            return
+        file_path, selected_filter = QFileDialog.getSaveFileName(self.view, title, "", EXPORT_FILTERS)
+        if not file_path:
+            return
+
+        def on_finished(error, cancelled):
+            self.file_task = None
+            self.view.file_progress.finish()
+            if error is not None:
+                QMessageBox.critical(self.view, "Error", f"Failed to save file: {str(error)}")
+            elif not cancelled:
+                QMessageBox.information(self.view, "Success", message)
 
+        # The total is unknown while the rows of a CSV scan are still counted
+        total_rows = 0 if model.counting else model.shape()[0]
+        exporter = FileExporter(model.scan(), file_path, EXPORT_FORMATS[selected_filter], total_rows)
+        exporter.progress.connect(self.view.file_progress.update_progress)
+        exporter.finished.connect(on_finished)
+        self.file_task = exporter
+        self.view.file_progress.start(os.path.basename(file_path), "Saving")
+        exporter.start()
 
     def export_output_to_pdf(self):
         """Export the content of all widgets in the output layout to a PDF file (menggunakan reportlab untuk tabel)."""
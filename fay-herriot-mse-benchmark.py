@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+import polars as pl
+
+from service.modelling.native.FayHerriot import mse_terms
+
+# Per-domain loop of the original area.py mseFH, kept as the baseline
+def mse_terms_loop(X, vardir, A, method="REML"):
+    m, p = X.shape
+    g1d = np.zeros(m)
+    g2d = np.zeros(m)
+    g3d = np.zeros(m)
+    mse2d = np.zeros(m)
+
+    Vi = 1 / (A + vardir)
+    Bd = vardir / (A + vardir)
+    SumAD2 = np.sum(Vi**2)
+    XtVi = (Vi[:, np.newaxis] * X).T
+    Q = np.linalg.solve(XtVi @ X, np.eye(p))
+
+    if method == "REML":
+        VarA = 2 / SumAD2
+        b = 0.0
+    elif method == "ML":
+        VarA = 2 / SumAD2
+        b = -1 * np.sum(np.diag(Q @ ((Vi**2).reshape(-1, 1) * X).T @ X)) / SumAD2
+    else:
+        SumAD = np.sum(Vi)
+        VarA = 2 * m / (SumAD**2)
+        b = 2 * (m * SumAD2 - SumAD**2) / (SumAD**3)
+
+    for d in range(m):
+        g1d[d] = vardir[d] * (1 - Bd[d])
+        xd = X[d, :].reshape(1, p)
+        g2d[d] = ((Bd[d]**2) * xd @ Q @ xd.T)[0, 0]
+        g3d[d] = (Bd[d]**2) * VarA / (A + vardir[d])
+        mse2d[d] = g1d[d] + g2d[d] + 2 * g3d[d] - b * (Bd[d]**2)
+    return mse2d
+
+# Function to measure the best time of a few repetitions
+def measure_time(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start_time)
+    return result, best
+
+rng = np.random.default_rng(0)
+p = 5
+A = 1.5
+rows = []
+for m in [10**2, 10**3, 10**4, 10**5, 10**6]:
+    X = np.column_stack([np.ones(m), rng.normal(size=(m, p - 1))])
+    vardir = rng.uniform(0.5, 2.0, m)
+    for method in ["REML", "ML", "FH"]:
+        mse_loop, loop_time = measure_time(mse_terms_loop, X, vardir, A, method, repeat=1 if m >= 10**5 else 3)
+        mse_vec, vec_time = measure_time(mse_terms, X, vardir, A, method)
+        rows.append({
+            "Domains": m,
+            "Method": method,
+            "Loop (s)": loop_time,
+            "Vectorized (s)": vec_time,
+            "Speedup": loop_time / vec_time,
+            "Max Abs Diff": float(np.max(np.abs(mse_loop - mse_vec))),
+        })
+        print(f"m={m:>8} {method:<4} loop: {loop_time:.4f} s, vectorized: {vec_time:.4f} s")
+
+benchmark_results = pl.DataFrame(rows)
+
+print("\nBenchmark Results:")
+with pl.Config(tbl_rows=-1):
+    print(benchmark_results)
@@ -1,5 +1,6 @@
 from model.SaeModelling import SaeModelling
-from service.modelling.running_model.Projection import run_model_projection
+from service.modelling.running_model.Projection import run_model_projection, run_model_projection_worker
+from service.utils.r_worker_pool import r_worker_pool
 
 class Projection(SaeModelling):
     """
@@ -9,11 +10,16 @@ class Projection(SaeModelling):
     __init__(*args, **kwargs)
         Initializes the Projection model with given arguments.
     run_model(r_script)
-        Executes the projection model using the provided R script.
+        Executes the projection model using the provided R script, in the R worker pool when Rscript
+        is available and in the embedded R interpreter otherwise, or when no R worker can be started.
         Parameters:
         r_script (str): The R script to be executed.
         Returns:
         tuple: A tuple containing the result, error, and dataframe from the model execution.
+    uses_embedded_r()
+        Returns True if the run needs the lock of the embedded R interpreter.
+    cancel()
+        Cancels the run if it is executing in the R worker pool.
     get_model2()
         Retrieves the second model attribute.
         Returns:
@@ -22,11 +28,29 @@ class Projection(SaeModelling):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.use_worker_pool = r_worker_pool.is_available()
+        self.job = None
+        self.on_output = None
+    
+    def uses_embedded_r(self):
+        return not self.use_worker_pool
     
     def run_model(self, r_script):
         self.r_script = r_script
-        result, error, df = run_model_projection(self)
+        if self.use_worker_pool:
+            result, error, df = run_model_projection_worker(self)
+            if error and not r_worker_pool.is_available():
+                self.use_worker_pool = False
+                from rpy2.rinterface_lib import openrlib
+                with openrlib.rlock:
+                    result, error, df = run_model_projection(self)
+        else:
+            result, error, df = run_model_projection(self)
         return result, error, df
     
+    def cancel(self):
+        if self.job is not None:
+            r_worker_pool.cancel(self.job)
+    
     def get_model2(self):
         return self.model2
\ No newline at end of file
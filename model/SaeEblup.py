@@ -1,5 +1,7 @@
 from model.SaeModelling import SaeModelling
-from service.modelling.running_model.SaeEblupArea import run_model_eblup_area
+from service.modelling.running_model.SaeEblupArea import run_model_eblup_area, run_model_eblup_area_worker
+from service.modelling.running_model.SaeEblupAreaNative import run_model_eblup_area_native
+from service.utils.r_worker_pool import r_worker_pool
 
 class SaeEblup(SaeModelling):
     """
@@ -9,11 +11,18 @@ class SaeEblup(SaeModelling):
     __init__(*args, **kwargs)
         Initializes the SaeEblup instance with given arguments.
     run_model(r_script)
-        Executes the EBLUP model using the provided R script.
+        Executes the EBLUP model. With the "Native" backend the model is fitted by the NumPy
+        Fay-Herriot engine from the dialog selections; otherwise the provided R script is run
+        in the R worker pool when Rscript is available and in the embedded R interpreter otherwise,
+        or when no R worker can be started (e.g. R's arrow package is missing).
         Parameters:
         r_script (str): The R script to be executed.
         Returns:
         tuple: A tuple containing the result, error, and dataframe from the model execution.
+    uses_embedded_r()
+        Returns True if the run needs the lock of the embedded R interpreter.
+    cancel()
+        Cancels the run if it is executing in the R worker pool.
     get_model2()
         Retrieves the model2 attribute.
         Returns:
@@ -22,11 +31,32 @@ class SaeEblup(SaeModelling):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.use_worker_pool = r_worker_pool.is_available()
+        self.job = None
+        self.on_output = None
+        self.backend = "R"
+    
+    def uses_embedded_r(self):
+        return self.backend != "Native" and not self.use_worker_pool
     
     def run_model(self, r_script):
         self.r_script = r_script
-        result, error, df = run_model_eblup_area(self)
+        if self.backend == "Native":
+            result, error, df = run_model_eblup_area_native(self)
+        elif self.use_worker_pool:
+            result, error, df = run_model_eblup_area_worker(self)
+            if error and not r_worker_pool.is_available():
+                self.use_worker_pool = False
+                from rpy2.rinterface_lib import openrlib
+                with openrlib.rlock:
+                    result, error, df = run_model_eblup_area(self)
+        else:
+            result, error, df = run_model_eblup_area(self)
         return result, error, df
     
+    def cancel(self):
+        if self.job is not None:
+            r_worker_pool.cancel(self.job)
+    
     def get_model2(self):
         return self.model2
\ No newline at end of file
@@ -1,5 +1,9 @@
+import os
+
 from model.SaeModelling import SaeModelling
-from service.modelling.running_model.SaeEblupUnit import run_model_eblup_unit
+from service.modelling.running_model.SaeEblupUnit import run_model_eblup_unit, run_model_eblup_unit_worker
+from service.modelling.running_model.SaeEblupUnitNative import run_model_eblup_unit_native
+from service.utils.r_worker_pool import r_worker_pool
 
 class SaeEblupUnit(SaeModelling):
     """
@@ -9,7 +13,11 @@ class SaeEblupUnit(SaeModelling):
     __init__(*args, **kwargs)
         Initializes the SaeEblupUnit instance with given arguments.
     run_model(r_script)
-        Runs the EBLUP model using the provided R script.
+        Runs the EBLUP model using the provided R script. When Rscript is available the
+        bootstrap is split into seeded shards run in parallel by the R worker pool (falling back to
+        the embedded R interpreter when no R worker can be started). With the
+        "Native" backend the model is fitted by the NumPy nested error engine instead of R, its
+        bootstrap running in `workers` processes.
         Parameters
         ----------
         r_script : str
@@ -22,6 +30,10 @@ class SaeEblupUnit(SaeModelling):
             Any error encountered during the model execution.
         df : pandas.DataFrame
             The dataframe containing the results of the model execution.
+    uses_embedded_r()
+        Returns True if the run needs the lock of the embedded R interpreter.
+    cancel()
+        Cancels the bootstrap shards running in the R worker pool.
     get_model2()
         Returns the model2 attribute.
         Returns
@@ -32,11 +44,36 @@ class SaeEblupUnit(SaeModelling):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.use_worker_pool = r_worker_pool.is_available()
+        self.bootstrap = "50"
+        self.seed = None
+        self.jobs = []
+        self.on_output = None
+        # The processes of the native bootstrap, leaving a core to the interface as the R worker pool does
+        self.workers = max(1, (os.cpu_count() or 2) - 1)
+        self.backend = "R"
+    
+    def uses_embedded_r(self):
+        return self.backend != "Native" and not self.use_worker_pool
     
     def run_model(self, r_script):
         self.r_script = r_script
-        results, error, df = run_model_eblup_unit(self)
+        if self.backend == "Native":
+            results, error, df = run_model_eblup_unit_native(self)
+        elif self.use_worker_pool:
+            results, error, df = run_model_eblup_unit_worker(self)
+            if error and not r_worker_pool.is_available():
+                self.use_worker_pool = False
+                from rpy2.rinterface_lib import openrlib
+                with openrlib.rlock:
+                    results, error, df = run_model_eblup_unit(self)
+        else:
+            results, error, df = run_model_eblup_unit(self)
         return results, error, df
     
+    def cancel(self):
+        for job in self.jobs:
+            r_worker_pool.cancel(job)
+    
     def get_model2(self):
         return self.model2
\ No newline at end of file
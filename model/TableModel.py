@@ -1,3 +1,6 @@
+import re
+import threading
+from collections import OrderedDict
 from PyQt6.QtCore import Qt
 import polars as pl
 from PyQt6 import QtCore, QtGui, QtWidgets
@@ -6,20 +9,58 @@ from service.command.AddRowCommand import AddRowsCommand
 from service.command.AddColumnCommand import AddColumnCommand
 from service.command.DeleteRowsCommand import DeleteRowsCommand
 from service.command.DeleteColumnsCommand import DeleteColumnsCommand
-from PyQt6.QtGui import QUndoStack
+from service.command.UndoStack import UndoStack
 from service.command.ChangeColumnTypeCommand import ChangeColumnTypeCommand
 from service.command.RenameColumnCommand import RenameColumnCommand
+from service.utils.r_cache import column_fingerprint
+from service.utils.schema_cache import schema_cache
+
+TEXT_ROLES = frozenset((Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole))
+
+# Row counts that read a whole text file (the count of Parquet and IPC scans comes from their metadata)
+TEXT_COUNT = re.compile(r'FAST COUNT \((?:Csv|NDJson)\)|\b(?:Csv|NDJson) SCAN\b')
+
 
 class TableModel(QtCore.QAbstractTableModel):
     """A custom table model for handling data in a Qt application with support for undo/redo operations.
+    The data can also be a Polars LazyFrame (e.g. a `pl.scan_csv` of a large file). The lazy frame then
+    stays the source of truth: only the pages of rows shown by the view are collected, and services read
+    the data through `scan()` so their column selection and filters are pushed down to the scan. The
+    first edit (or `get_data()`) materializes the whole frame and the model continues as usual.
+    The rows of a Parquet or IPC scan are counted from the file metadata. Counting the rows of a CSV scan
+    reads the whole file, so it runs in a background thread: the model shows the first page meanwhile and
+    reports the other rows to the view as inserted once they are counted.
+    The model is virtual: it reports every row to the view, which only asks for the cells it paints.
+    Cells are formatted a block of rows of one column at a time, from a zero-copy slice of the column
+    converted in bulk, and the formatted blocks are kept in an LRU cache, so scrolling (or jumping to the
+    last row) costs one conversion per visible block instead of one Polars scalar lookup per painted cell.
+    Edits drop the cached blocks of the edited columns (see `mark_dirty`).
+    Cell edits (`set_cell`) do not touch the frame: they are kept in an overlay of edited cells per
+    column, which the view and `cell` read through. The overlay is compacted into the frame, with one
+    scatter per edited column, when the frame itself is needed (`get_data()`, `scan()`, a structural
+    change or a model run). Frames shared with undo commands or services are never modified in place.
+    Model runs read the data from their worker thread (`scan()`, `get_data()`) while the view keeps
+    painting and editing it, so the overlay, the caches and the frame are only changed under a lock.
+    Rows are inserted and deleted by splicing the chunks of the frame (see `splice_rows`): the rows
+    around the change are kept as zero-copy slices, and the frame is only rechunked once a column holds
+    more than `max_chunks` chunks. Undo keeps a compact copy of the inserted or removed rows only.
     Attributes:
-        _data (pl.DataFrame): The data to be displayed in the table.
-        undo_stack (QUndoStack): Stack to manage undo/redo operations.
-        batch_size (int): Number of rows to load initially.
-        loaded_rows (int): Number of rows currently loaded.
+        _data (pl.DataFrame): The data to be displayed in the table (collected on first access in lazy mode).
+        undo_stack (UndoStack): Stack to manage undo/redo operations, within a memory budget.
+        block_size (int): Number of rows of a column formatted at once.
+        max_blocks (int): Number of formatted blocks kept.
+        page_size (int): Number of rows collected at once from a lazy frame (the block size in lazy mode).
+        max_pages (int): Number of collected pages kept in lazy mode.
+        max_chunks (int): Number of chunks a column may hold after row inserts and deletes before it is rechunked.
+        loading (bool): True while a file is streamed into the model; cells are read-only meanwhile.
+        counting (bool): True while the rows of a lazy scan are counted in the background; the row count
+                         only covers the first page meanwhile.
+        schema_source (tuple): The path and read options of the file the data was loaded from, set by
+                               LoadDataCommand and cleared by `set_data`. Column type changes are
+                               remembered for that file (see `service.utils.schema_cache`).
     Methods:
-        __init__(data, batch_size=100):
-            Initializes the table model with data and batch size.
+        __init__(data, block_size=256, max_blocks=512, page_size=1000, max_pages=8, max_chunks=32):
+            Initializes the table model with data and the sizes of the caches.
         data(index, role):
             Returns the data for the given index and role.
         rowCount(_):
@@ -33,9 +74,25 @@ class TableModel(QtCore.QAbstractTableModel):
         setData(index, value, role=Qt.ItemDataRole.EditRole):
             Sets the data for the given index and role.
         set_data(new_data):
-            Sets the entire data for the table.
+            Sets the entire data for the table, from a DataFrame or a LazyFrame.
+        append_rows(batch):
+            Appends a batch of rows read in the background to the data.
         get_data():
-            Returns the current data of the table.
+            Returns the current data of the table, materializing a lazy frame and applying the cell edits.
+        cell(row, column):
+            Returns the value of a cell, edited or not, without applying the cell edits.
+        set_cell(row, column, value):
+            Records a new value for a cell in the edit overlay.
+        is_lazy():
+            Checks if the data is still a LazyFrame.
+        scan():
+            Returns the data as a LazyFrame, without materializing it.
+        schema():
+            Returns the column names and dtypes, without materializing a lazy frame.
+        shape():
+            Returns the number of rows and columns, without materializing a lazy frame.
+        source():
+            Returns the LazyFrame or DataFrame holding the data, to restore it with `set_data`.
         copy(index):
             Copies the data at the given index to the clipboard.
         paste(index):
@@ -44,10 +101,6 @@ class TableModel(QtCore.QAbstractTableModel):
             Undoes the last operation.
         redo():
             Redoes the last undone operation.
-        canFetchMore(_):
-            Checks if more rows can be fetched.
-        fetchMore(_):
-            Fetches more rows to be displayed in the table.
         addRowsBefore(index, count):
             Adds rows before the given index.
         addRowsAfter(index, count):
@@ -58,6 +111,10 @@ class TableModel(QtCore.QAbstractTableModel):
             Adds columns after the given index.
         deleteRows(start_row, count):
             Deletes rows starting from the given row index.
+        blank_rows(count):
+            Returns empty rows with the column types of the data.
+        splice_rows(row, count=0, rows=None):
+            Replaces rows of the data with other rows, without copying the rows around them.
         deleteColumns(start_column, count):
             Deletes columns starting from the given column index.
         rename_column(column_index, new_name):
@@ -65,40 +122,285 @@ class TableModel(QtCore.QAbstractTableModel):
         get_column_type(column_index):
             Returns the data type of the column at the given index.
         set_column_type(column_index, new_type):
-            Sets the data type of the column at the given index to the new type."""
+            Sets the data type of the column at the given index to the new type.
+        mark_dirty(columns=None):
+            Marks the given columns (or every column) as modified since the last sync to R. The other
+            fingerprints are only kept for the frame the model holds when it is called: a frame replaced
+            without `mark_dirty` has every column recomputed.
+        dirty_columns():
+            Returns the columns modified since their fingerprint was last computed.
+        column_fingerprints(columns=None):
+            Returns the content fingerprint of every (or the given) column, recomputing only dirty columns.
+        remember_schema():
+            Remembers the column types for the file the data was loaded from."""
+
+    rows_counted = QtCore.pyqtSignal(object, object)
     
-    def __init__(self, data, batch_size=100):
+    def __init__(self, data, block_size=256, max_blocks=512, page_size=1000, max_pages=8, max_chunks=32):
         super().__init__()
-        self._data = data
-        self.undo_stack = QUndoStack()
-        self.batch_size = batch_size
-        self.loaded_rows = min(batch_size, self._data.shape[0])
+        self._frame = None
+        self._lazy = None
+        self._shape = (0, 0)
+        self._lazy_schema = None
+        self._pages = OrderedDict()
+        self._blocks = OrderedDict()
+        self._edits = {}
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.max_chunks = max_chunks
+        self.counting = False
+        self._counted = None
+        self._lock = threading.RLock()
+        self.rows_counted.connect(self._rows_counted)
+        self._set_source(data)
+        self.undo_stack = UndoStack(self)
+        self.loading = False
+        self.schema_source = None
+        self._column_fingerprints = {}
+        self._fingerprinted = None
+
+    @property
+    def _data(self):
+        lazy = self._lazy
+        if lazy is not None:
+            # Collected outside the lock, so the view keeps painting meanwhile
+            frame = lazy.collect()
+            with self._lock:
+                if self._lazy is lazy:
+                    self._frame = frame
+                    self._lazy = None
+                    self._pages.clear()
+                    self._blocks.clear()
+            if QtCore.QThread.currentThread() == self.thread():
+                self._rows_counted(lazy, frame.height)
+            else:
+                # The view is told about the rows on the GUI thread
+                self.rows_counted.emit(lazy, frame.height)
+        with self._lock:
+            self._compact()
+            return self._frame
+
+    @_data.setter
+    def _data(self, frame):
+        with self._lock:
+            self._frame = frame
+            self._shape = frame.shape
+            self._lazy = None
+            self._pages.clear()
+            self._blocks.clear()
+            self._edits.clear()
+
+    def _set_source(self, data):
+        self.counting = False
+        self._counted = None
+        if isinstance(data, pl.LazyFrame):
+            with self._lock:
+                self._frame = None
+                self._pages.clear()
+                self._blocks.clear()
+                self._edits.clear()
+                self._lazy = data
+            self._lazy_schema = data.collect_schema()
+            count = data.select(pl.len())
+            if not TEXT_COUNT.search(count.explain()):
+                self._shape = (count.collect().item(), len(self._lazy_schema))
+                return
+            self._shape = (self._page(0).height, len(self._lazy_schema))
+            if self._shape[0] == self.page_size:
+                self.counting = True
+                self._counted = data
+                threading.Thread(target=self._count_rows, args=(data, count), daemon=True).start()
+        else:
+            self._data = data
+
+    def _count_rows(self, data, count):
+        try:
+            rows = count.collect().item()
+        except (pl.exceptions.PolarsError, OSError):
+            # The rows are counted when the scan is materialized instead
+            rows = None
+        self.rows_counted.emit(data, rows)
+
+    def _rows_counted(self, data, rows):
+        # The scan may have been materialized meanwhile, the rows are still to be reported
+        if data is not self._counted or not self.counting:
+            return
+        self.counting = False
+        self._counted = None
+        shown = self._shape[0]
+        if rows is not None and rows > shown:
+            self.beginInsertRows(QtCore.QModelIndex(), shown, rows - 1)
+            self._shape = (rows, self._shape[1])
+            self.endInsertRows()
+
+    def _page(self, page):
+        with self._lock:
+            frame = self._pages.get(page)
+            if frame is None:
+                frame = self._lazy.slice(page * self.page_size, self.page_size).collect()
+                self._pages[page] = frame
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+            else:
+                self._pages.move_to_end(page)
+            return frame
+
+    def _compact(self):
+        # Called with the lock held
+        if not self._edits:
+            return
+        acknowledged = self._fingerprinted is self._frame
+        columns = []
+        for column, edits in self._edits.items():
+            series = self._frame.to_series(column)
+            series.scatter(list(edits), pl.Series(list(edits.values()), dtype=series.dtype))
+            columns.append(series)
+            for key in [key for key in self._blocks if key[0] == column]:
+                del self._blocks[key]
+        self._edits.clear()
+        self._frame = self._frame.with_columns(columns)
+        if acknowledged:
+            self._fingerprinted = self._frame
+
+    def cell(self, row, column):
+        with self._lock:
+            edits = self._edits.get(column)
+            if edits is not None and row in edits:
+                return edits[row]
+            if self._lazy is None:
+                return self._frame[row, column]
+            page = row // self.page_size
+            return self._page(page)[row - page * self.page_size, column]
+
+    def set_cell(self, row, column, value):
+        if self._lazy is not None:
+            self.get_data()
+        with self._lock:
+            # Fails on a value the column cannot hold, as assigning it to the frame would
+            pl.Series([value], dtype=self._frame.dtypes[column])
+            self._edits.setdefault(column, {})[row] = value
+            self._column_fingerprints.pop(self._frame.columns[column], None)
+
+    def _formatted(self, row, column):
+        with self._lock:
+            edits = self._edits.get(column)
+            if edits is not None and row in edits:
+                value = edits[row]
+                return "" if value is None else str(value)
+            size = self.page_size if self._lazy is not None else self.block_size
+            block = row // size
+            values = self._blocks.get((column, block))
+            if values is None:
+                if self._lazy is not None:
+                    series = self._page(block).to_series(column)
+                else:
+                    series = self._frame.to_series(column).slice(block * size, size)
+                values = ["" if value is None else str(value) for value in series.to_list()]
+                self._blocks[(column, block)] = values
+                while len(self._blocks) > self.max_blocks:
+                    self._blocks.popitem(last=False)
+            else:
+                self._blocks.move_to_end((column, block))
+            return values[row - block * size]
+
+    def is_lazy(self):
+        return self._lazy is not None
+
+    def scan(self):
+        with self._lock:
+            if self._lazy is not None:
+                return self._lazy
+            self._compact()
+            return self._frame.lazy()
+
+    def schema(self):
+        return self._lazy_schema if self._lazy is not None else self._frame.schema
+
+    def shape(self):
+        return self._shape
+
+    def source(self):
+        with self._lock:
+            if self._lazy is not None:
+                return self._lazy
+            self._compact()
+            return self._frame
+
+    def mark_dirty(self, columns=None):
+        with self._lock:
+            if columns is None:
+                self._column_fingerprints.clear()
+                self._blocks.clear()
+            else:
+                names = self.schema().names()
+                indexes = {names.index(column) for column in columns if column in names}
+                for column in columns:
+                    self._column_fingerprints.pop(column, None)
+                for key in [key for key in self._blocks if key[0] in indexes]:
+                    del self._blocks[key]
+            # The other fingerprints still describe the frame the caller changed
+            self._fingerprinted = self._frame
+
+    def _tracked_fingerprints(self, data):
+        # Called with the lock held
+        if data is not self._fingerprinted:
+            # The frame was replaced without `mark_dirty`: no fingerprint can be trusted
+            self._column_fingerprints.clear()
+            self._fingerprinted = data
+        return self._column_fingerprints
+
+    def dirty_columns(self):
+        data = self._data
+        with self._lock:
+            fingerprints = self._tracked_fingerprints(data)
+            return [col for col in data.columns if col not in fingerprints]
+
+    def column_fingerprints(self, columns=None):
+        data = self._data
+        columns = data.columns if columns is None else list(columns)
+        with self._lock:
+            known = dict(self._tracked_fingerprints(data))
+        # Hashed outside the lock, so the view keeps painting meanwhile
+        computed = {col: column_fingerprint(data[col]) for col in columns if col not in known}
+        with self._lock:
+            # Unless the frame was replaced or the column edited meanwhile
+            if self._fingerprinted is data:
+                edited = {data.columns[column] for column in self._edits}
+                self._column_fingerprints.update({col: value for col, value in computed.items() if col not in edited})
+                for col in set(self._column_fingerprints) - set(data.columns):
+                    del self._column_fingerprints[col]
+        return {col: known.get(col, computed.get(col)) for col in columns}
+
+    def remember_schema(self):
+        if self.schema_source is not None:
+            file_path, options = self.schema_source
+            schema_cache.put(file_path, self.schema(), **options)
 
     def data(self, index, role):
-        if role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.EditRole:
-            value = self._data[index.row(), index.column()]
-            return "" if value is None else str(value)
+        if role in TEXT_ROLES:
+            return self._formatted(index.row(), index.column())
 
     def rowCount(self, _):
-        return self.loaded_rows
+        return self._shape[0]
 
     def columnCount(self, _):
-        return self._data.shape[1]
+        return self._shape[1]
 
     def headerData(self, section, orientation, role):
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
-                if section < len(self._data.columns):
-                    column_name = self._data.columns[section]
+                if section < self.shape()[1]:
+                    column_name = self.schema().names()[section]
                     return f"{column_name}"
                 return ""
             if orientation == Qt.Orientation.Vertical:
                 return str(section + 1)
         elif role == Qt.ItemDataRole.DecorationRole or role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
-                if section < len(self._data.columns):
-                    column_name = self._data.columns[section]
-                    dtype = self._data[column_name].dtype
+                if section < self.shape()[1]:
+                    dtype = self.schema().dtypes()[section]
                     if dtype == pl.Utf8:
                         return QtGui.QIcon("assets/nominal.svg")
                     elif dtype == pl.Null:
@@ -108,6 +410,8 @@ class TableModel(QtCore.QAbstractTableModel):
         return None
 
     def flags(self, _):
+        if self.loading:
+            return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
         return (
             Qt.ItemFlag.ItemIsSelectable
             | Qt.ItemFlag.ItemIsEnabled
@@ -119,10 +423,10 @@ class TableModel(QtCore.QAbstractTableModel):
             row = index.row()
             column = index.column()
 
-            column_name = self._data.columns[column]
-            dtype = self._data[column_name].dtype
+            column_name = self.schema().names()[column]
+            dtype = self.schema()[column_name]
 
-            old_value = self._data[row, column]
+            old_value = self.cell(row, column)
             
             if dtype == pl.Null:
                 if isinstance(value, str):
@@ -190,7 +494,8 @@ class TableModel(QtCore.QAbstractTableModel):
                     else:
                         return False
 
-            self._data[row, column] = value
+            self.set_cell(row, column, value)
+            self.mark_dirty([column_name])
             self.dataChanged.emit(index, index)
             command = EditDataCommand(self, row, column, old_value, value)  # Pass row, column to command
             self.undo_stack.push(command)
@@ -199,13 +504,24 @@ class TableModel(QtCore.QAbstractTableModel):
 
 
     def set_data(self, new_data):
-        if isinstance(new_data, pl.DataFrame):
+        if isinstance(new_data, (pl.DataFrame, pl.LazyFrame)):
             self.beginResetModel()
-            self._data = new_data
-            self.loaded_rows = min(self.batch_size, self._data.shape[0])
+            self._set_source(new_data)
+            self.schema_source = None
+            self.mark_dirty()
             self.endResetModel()
         else:
-            raise ValueError("Data must be a Polars DataFrame")
+            raise ValueError("Data must be a Polars DataFrame or LazyFrame")
+
+    def append_rows(self, batch):
+        schema = self._data.schema
+        height = self._data.height
+        self.beginInsertRows(QtCore.QModelIndex(), height, height + batch.height - 1)
+        self._data = pl.concat([self._data, batch], how="vertical_relaxed")
+        self.mark_dirty()
+        self.endInsertRows()
+        if self._data.schema != schema:
+            self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, self._data.width - 1)
     
     def get_data(self):
         return self._data
@@ -228,25 +544,42 @@ class TableModel(QtCore.QAbstractTableModel):
     def redo(self):
         self.undo_stack.redo()
 
-    def canFetchMore(self, _):
-        return self.loaded_rows < self._data.shape[0]
+    def blank_rows(self, count):
+        """
+        Returns `count` empty rows with the column types of the data: empty strings in text columns, nulls elsewhere.
+        """
+        rows = self._data.clear(count)
+        return rows.with_columns([pl.lit("", dtype=pl.Utf8).alias(name) for name, dtype in rows.schema.items() if dtype == pl.Utf8])
+
+    def splice_rows(self, row, count=0, rows=None):
+        """
+        Replaces `count` rows of the data from `row` with `rows`.
+        The rows before and after are kept as zero-copy slices of the current chunks, so the cost depends
+        on the rows inserted or removed rather than on the size of the data. The frame is rechunked once a
+        column holds more than `max_chunks` chunks, to keep reading it fast. The caller emits the row signals.
+        Args:
+            row (int): The first row replaced.
+            count (int): The number of rows removed.
+            rows (pl.DataFrame, optional): The rows inserted, with the schema of the data.
+        Returns:
+            pl.DataFrame: A copy of the removed rows, which does not keep the buffers of the data alive.
+        """
+        frame = self._data
+        removed = frame.select(pl.all().gather(pl.int_range(row, min(row + count, frame.height))))
+        parts = [frame.slice(0, row)] + ([rows] if rows is not None else []) + [frame.slice(row + count)]
+        frame = pl.concat(parts, rechunk=False)
+        if max(frame.n_chunks("all"), default=0) > self.max_chunks:
+            frame = frame.rechunk()
+        self._data = frame
+        self.mark_dirty()
+        return removed
 
-    def fetchMore(self, _):
-        if self.loaded_rows >= self._data.shape[0]:
-            return
-        remaining_rows = self._data.shape[0] - self.loaded_rows
-        rows_to_fetch = min(self.batch_size, remaining_rows)
-        self.beginInsertRows(QtCore.QModelIndex(), self.loaded_rows, self.loaded_rows + rows_to_fetch - 1)
-        self.loaded_rows += rows_to_fetch
-        self.endInsertRows()
-    
     def addRowsBefore(self, index, count):
         if index.isValid() and count > 0:
             row = index.row()
-            new_rows = [{col: None if self._data[col].dtype in [pl.Int64, pl.Float64, pl.Null] else "" for col in self._data.columns} for _ in range(count)]
+            new_rows = self.blank_rows(count)
             self.beginInsertRows(QtCore.QModelIndex(), row, row + count - 1)
-            self._data = pl.concat([self._data[:row], pl.DataFrame(new_rows), self._data[row:]])
-            self.loaded_rows += count
+            self.splice_rows(row, 0, new_rows)
             self.endInsertRows()
             command = AddRowsCommand(self, row, new_rows)
             self.undo_stack.push(command)
@@ -254,10 +587,9 @@ class TableModel(QtCore.QAbstractTableModel):
     def addRowsAfter(self, index, count):
         if index.isValid() and count > 0:
             row = index.row() + 1
-            new_rows = [{col: None if self._data[col].dtype in [pl.Int64, pl.Float64, pl.Null] else "" for col in self._data.columns} for _ in range(count)]
+            new_rows = self.blank_rows(count)
             self.beginInsertRows(QtCore.QModelIndex(), row, row + count - 1)
-            self._data = pl.concat([self._data[:row], pl.DataFrame(new_rows), self._data[row:]])
-            self.loaded_rows += count
+            self.splice_rows(row, 0, new_rows)
             self.endInsertRows()
             command = AddRowsCommand(self, row, new_rows)
             self.undo_stack.push(command)
@@ -268,6 +600,7 @@ class TableModel(QtCore.QAbstractTableModel):
             new_columns = {f"new_col_{i}": [None] * self._data.shape[0] for i in range(count)}
             self.beginResetModel()
             self._data = pl.concat([self._data[:, :column], pl.DataFrame(new_columns), self._data[:, column:]], how="horizontal")
+            self.mark_dirty(new_columns.keys())
             self.endResetModel()
             column_names = list(new_columns.keys())  # Extract column names
             new_columns_data = list(new_columns.values())  # Extract column data
@@ -280,6 +613,7 @@ class TableModel(QtCore.QAbstractTableModel):
             new_columns = {f"new_col_{i}": [None] * self._data.shape[0] for i in range(count)}
             self.beginResetModel()
             self._data = pl.concat([self._data[:, :column], pl.DataFrame(new_columns), self._data[:, column:]], how="horizontal")
+            self.mark_dirty(new_columns.keys())
             self.endResetModel()
             column_names = list(new_columns.keys())
             new_columns_data = list(new_columns.values())
@@ -288,10 +622,8 @@ class TableModel(QtCore.QAbstractTableModel):
     
     def deleteRows(self, start_row, count):
         if start_row >= 0 and count > 0:
-            old_rows = self._data[start_row:start_row + count].to_dict(as_series=False)
             self.beginRemoveRows(QtCore.QModelIndex(), start_row, start_row + count - 1)
-            self._data = pl.concat([self._data[:start_row], self._data[start_row + count:]])
-            self.loaded_rows -= count
+            old_rows = self.splice_rows(start_row, count)
             self.endRemoveRows()
             command = DeleteRowsCommand(self, start_row, old_rows)
             self.undo_stack.push(command)
@@ -309,16 +641,14 @@ class TableModel(QtCore.QAbstractTableModel):
             original_order = self._data.columns
 
             # Store the deleted columns and their data
-            old_columns = {
-                self._data.columns[i]: self._data[:, i].to_list()
-                for i in range(start_column, start_column + count)
-            }
+            old_columns = self._data.select(self._data.columns[start_column:start_column + count])
             self.beginResetModel()
             columns_to_keep = [
                 col for i, col in enumerate(self._data.columns)
                 if i < start_column or i >= start_column + count
             ]
             self._data = self._data.select(columns_to_keep)
+            self.mark_dirty(old_columns.columns)
             self.endResetModel()
 
             # Create a DeleteColumnsCommand and push it to the undo stack
@@ -331,6 +661,7 @@ class TableModel(QtCore.QAbstractTableModel):
             old_name = self._data.columns[column_index]
             self.beginResetModel()
             self._data = self._data.rename({old_name: new_name})
+            self.mark_dirty([old_name, new_name])
             self.endResetModel()
             command = RenameColumnCommand(self, column_index, old_name, new_name)
             self.undo_stack.push(command)
@@ -345,7 +676,7 @@ class TableModel(QtCore.QAbstractTableModel):
         if isinstance(column_index, int) and 0 <= column_index < len(self._data.columns):
             column_name = self._data.columns[column_index]
             old_dtype = self._data[column_name].dtype
-            old_data = self._data[column_name].to_list()
+            old_data = self._data[column_name]
 
             if new_type == "String":
                 new_dtype = pl.Utf8
@@ -400,8 +731,9 @@ class TableModel(QtCore.QAbstractTableModel):
 
             self.beginResetModel()
             self._data = self._data.with_columns([pl.col(column_name).cast(new_dtype)])
+            self.mark_dirty([column_name])
             self.endResetModel()
 
-            command = ChangeColumnTypeCommand(self, column_index, old_dtype, new_dtype, old_data, self._data[column_name].to_list())
+            command = ChangeColumnTypeCommand(self, column_index, old_dtype, new_dtype, old_data, self._data[column_name])
             self.undo_stack.push(command)
             
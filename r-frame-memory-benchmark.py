@@ -0,0 +1,59 @@
+import multiprocessing
+import resource
+
+import numpy as np
+import polars as pl
+
+from service.utils.r_frame import normalize_for_r
+
+# Peak resident memory of the process in bytes (ru_maxrss is in KiB on Linux)
+def peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# Frame with the columns a survey table usually holds: numeric columns with gaps and empty columns
+def make_frame(rows):
+    rng = np.random.default_rng(0)
+    columns = {f"x{i}": rng.normal(size=rows) for i in range(8)}
+    columns["count"] = pl.Series(rng.integers(0, 100, rows)).scatter(rng.integers(0, rows, rows // 2), None)
+    columns["domain"] = pl.Series(rng.integers(0, 1000, rows)).cast(pl.Utf8).cast(pl.Categorical)
+    columns["empty"] = pl.Series([None] * rows)
+    return pl.DataFrame(columns)
+
+# Previous path: pandas round trip whenever a null-heavy column exists, then the Arrow export
+def pandas_round_trip(df):
+    return pl.from_pandas(df.to_pandas()).to_arrow()
+
+# Shared path: casts of the columns without an R counterpart, then the Arrow export
+def arrow_push(df):
+    return normalize_for_r(df).to_arrow()
+
+def measure(path, rows, queue):
+    df = make_frame(rows)
+    before = peak_rss()
+    table = path(df)
+    queue.put((df.estimated_size(), peak_rss() - before, table.num_rows))
+
+if __name__ == "__main__":
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for n in [10**5, 10**6, 5 * 10**6]:
+        for name, path in [("pandas round trip", pandas_round_trip), ("arrow push", arrow_push)]:
+            queue = context.Queue()
+            process = context.Process(target=measure, args=(path, n, queue))
+            process.start()
+            size, extra, _ = queue.get()
+            process.join()
+            rows.append({
+                "Rows": n,
+                "Path": name,
+                "Frame (MB)": size / 2**20,
+                "Extra peak RSS (MB)": extra / 2**20,
+                "Peak / frame": (size + extra) / size,
+            })
+            print(f"rows={n:>8} {name:<18} extra peak: {extra / 2**20:8.1f} MB")
+
+    benchmark_results = pl.DataFrame(rows)
+
+    print("\nBenchmark Results:")
+    with pl.Config(tbl_rows=-1):
+        print(benchmark_results)
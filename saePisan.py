@@ -4,6 +4,7 @@ from PyQt6.QtGui import QIcon, QPixmap
 from PyQt6.QtCore import Qt
 import sys
 import os
+import multiprocessing
 from controller.FileController import FileController
 from service.main.CheckEnviroment import check_environment
 
@@ -86,4 +87,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Lets the frozen (PyInstaller) executable serve the bootstrap worker processes
+    multiprocessing.freeze_support()
     main()
@@ -26,6 +26,7 @@ class AddColumnCommand(QUndoCommand):
                 col_index = self.model._data.columns.index(column_name)
                 self.model.beginRemoveColumns(QtCore.QModelIndex(), col_index, 1)
                 self.model._data = self.model._data.drop(column_name)
+                self.model.mark_dirty([column_name])
                 self.model.endRemoveColumns()
 
     def redo(self):
@@ -38,4 +39,5 @@ class AddColumnCommand(QUndoCommand):
             for column_name, new_column in zip(self.column_names, self.new_columns):
                 self.model.beginInsertColumns(QtCore.QModelIndex(), self.model._data.width, self.model._data.width)
                 self.model._data = self.model._data.with_columns(pl.Series(column_name, new_column))
+                self.model.mark_dirty([column_name])
                 self.model.endInsertColumns()
@@ -1,14 +1,16 @@
 from PyQt6.QtGui import QUndoCommand
-import polars as pl
 from PyQt6 import QtCore
 
+from service.command.UndoStack import UndoPayload
+
 class AddRowsCommand(QUndoCommand):
     """
     A command class to add rows to a model, supporting undo and redo operations.
     Attributes:
         model (QAbstractItemModel): The model to which rows will be added.
         row (int): The position at which new rows will be inserted.
-        new_rows (list): The new rows to be added to the model.
+        new_rows (UndoPayload): The new rows to be added to the model, as a frame with the schema of the data.
+        count (int): The number of rows added.
         executed (bool): A flag to prevent re-execution during the initial push.
     Methods:
         undo():
@@ -22,20 +24,19 @@ class AddRowsCommand(QUndoCommand):
         super().__init__()
         self.model = model
         self.row = row
-        self.new_rows = new_rows
+        self.count = new_rows.height
+        self.new_rows = UndoPayload(new_rows)
         self.executed = False
 
     def undo(self):
-        self.model.beginRemoveRows(QtCore.QModelIndex(), self.row, self.row + len(self.new_rows) - 1)
-        self.model._data = pl.concat([self.model._data[:self.row], self.model._data[self.row + len(self.new_rows):]])
-        self.model.loaded_rows -= len(self.new_rows)
+        self.model.beginRemoveRows(QtCore.QModelIndex(), self.row, self.row + self.count - 1)
+        self.model.splice_rows(self.row, self.count)
         self.model.endRemoveRows()
 
     def redo(self):
         if not self.executed:  # Cegah eksekusi ulang saat push
             self.executed = True
         else:
-            self.model.beginInsertRows(QtCore.QModelIndex(), self.row, self.row + len(self.new_rows) - 1)
-            self.model._data = pl.concat([self.model._data[:self.row], pl.DataFrame(self.new_rows), self.model._data[self.row:]])
-            self.model.loaded_rows += len(self.new_rows)
-            self.model.endInsertRows()
\ No newline at end of file
+            self.model.beginInsertRows(QtCore.QModelIndex(), self.row, self.row + self.count - 1)
+            self.model.splice_rows(self.row, 0, self.new_rows.get())
+            self.model.endInsertRows()
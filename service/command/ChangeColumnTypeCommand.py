@@ -1,6 +1,8 @@
 from PyQt6.QtGui import QUndoCommand
 import polars as pl
 
+from service.command.UndoStack import UndoPayload
+
 class ChangeColumnTypeCommand(QUndoCommand):
     """
     A command class to change the data type of a column in a model, supporting undo and redo operations.
@@ -9,8 +11,8 @@ class ChangeColumnTypeCommand(QUndoCommand):
         column_index (int): The index of the column to change.
         old_dtype (str): The original data type of the column.
         new_dtype (str): The new data type of the column.
-        old_data (list): The original data of the column.
-        new_data (list): The new data of the column.
+        old_data (UndoPayload): The original data of the column, kept as a Polars column.
+        new_data (UndoPayload): The new data of the column, kept as a Polars column.
         column_name (str): The name of the column to change.
     Methods:
         undo(): Reverts the column to its original data type and data.
@@ -23,17 +25,21 @@ class ChangeColumnTypeCommand(QUndoCommand):
         self.column_index = column_index
         self.old_dtype = old_dtype
         self.new_dtype = new_dtype
-        self.old_data = old_data
-        self.new_data = new_data
+        self.old_data = UndoPayload(old_data)
+        self.new_data = UndoPayload(new_data)
         self.column_name = self.model._data.columns[self.column_index]
         self.setText(f"Change column type of {self.column_name} from {self.old_dtype} to {self.new_dtype}")
 
     def undo(self):
         self.model.beginResetModel()
-        self.model._data = self.model._data.with_columns([pl.Series(self.column_name, self.old_data).cast(self.old_dtype)])
+        self.model._data = self.model._data.with_columns([self.old_data.get().to_series().alias(self.column_name).cast(self.old_dtype)])
+        self.model.mark_dirty([self.column_name])
         self.model.endResetModel()
+        self.model.remember_schema()
 
     def redo(self):
         self.model.beginResetModel()
-        self.model._data = self.model._data.with_columns([pl.Series(self.column_name, self.new_data).cast(self.new_dtype)])
-        self.model.endResetModel()
\ No newline at end of file
+        self.model._data = self.model._data.with_columns([self.new_data.get().to_series().alias(self.column_name).cast(self.new_dtype)])
+        self.model.mark_dirty([self.column_name])
+        self.model.endResetModel()
+        self.model.remember_schema()
\ No newline at end of file
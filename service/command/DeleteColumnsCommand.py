@@ -1,6 +1,8 @@
 from PyQt6.QtGui import QUndoCommand
 import polars as pl
 
+from service.command.UndoStack import UndoPayload
+
 class DeleteColumnsCommand(QUndoCommand):
     def __init__(self, model, start_column, deleted_columns, original_order):
         """
@@ -9,25 +11,25 @@ class DeleteColumnsCommand(QUndoCommand):
         Args:
             model: The model to apply the changes to.
             start_column: The index of the first column to delete.
-            deleted_columns: A dictionary of deleted column names and their data.
+            deleted_columns: A frame of the deleted columns (pl.DataFrame).
             original_order: The original order of columns before deletion.
         """
         super().__init__()
         self.model = model
         self.start_column = start_column
-        self.deleted_columns = deleted_columns
-        self.old_data = deleted_columns  # Store the columns that were deleted
+        self.column_names = deleted_columns.columns
+        self.deleted_columns = UndoPayload(deleted_columns)  # Store the columns that were deleted
         self.original_order = original_order  # Store the original column order
         self.executed = False
 
     def undo(self):
         """Undo the column deletion by restoring the deleted columns."""
         self.model.beginResetModel()
-        for col_name, col_values in self.deleted_columns.items():
-            self.model._data = self.model._data.with_columns(pl.Series(col_name, col_values))
+        self.model._data = self.model._data.with_columns(self.deleted_columns.get())
 
         # Reorder columns to match the original order
         self.model._data = self.model._data.select(self.original_order)
+        self.model.mark_dirty(self.column_names)
         self.model.endResetModel()
 
     def redo(self):
@@ -36,8 +38,9 @@ class DeleteColumnsCommand(QUndoCommand):
             self.executed = True
         else:
             self.model.beginResetModel()
-            columns_to_remove = list(self.deleted_columns.keys())
+            columns_to_remove = self.column_names
             self.model._data = self.model._data.select(
                 [col for col in self.model._data.columns if col not in columns_to_remove]
             )
+            self.model.mark_dirty(columns_to_remove)
             self.model.endResetModel()
\ No newline at end of file
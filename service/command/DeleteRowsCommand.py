@@ -2,13 +2,16 @@ from PyQt6.QtCore import QModelIndex
 from PyQt6.QtGui import QUndoCommand
 import polars as pl
 
+from service.command.UndoStack import UndoPayload
+
 class DeleteRowsCommand(QUndoCommand):
     """
     A command to delete rows from a model, supporting undo and redo operations.
     Attributes:
         model (QAbstractItemModel): The model from which rows will be deleted.
         start_row (int): The starting row index for deletion.
-        rows_data (pl.DataFrame): The data of the rows to be deleted.
+        rows_data (UndoPayload): The data of the rows to be deleted, the removed slice of the frame.
+        count (int): The number of rows deleted.
         executed (bool): A flag to indicate if the command has been executed.
     Methods:
         undo(): Reverts the deletion of rows by inserting them back into the model.
@@ -32,13 +35,14 @@ class DeleteRowsCommand(QUndoCommand):
         super().__init__("Delete Rows")
         self.model = model
         self.start_row = start_row
-        self.rows_data = pl.DataFrame(rows_data) if not isinstance(rows_data, pl.DataFrame) else rows_data
+        rows_data = pl.DataFrame(rows_data) if not isinstance(rows_data, pl.DataFrame) else rows_data
+        self.count = rows_data.height
+        self.rows_data = UndoPayload(rows_data)
         self.executed = False
 
     def undo(self):
-        self.model.beginInsertRows(QModelIndex(), self.start_row, self.start_row + len(self.rows_data) - 1)
-        self.model._data = pl.concat([pl.DataFrame(self.model._data[:self.start_row]), self.rows_data, pl.DataFrame(self.model._data[self.start_row:])])
-        self.model.loaded_rows = min(self.model.loaded_rows + len(self.rows_data), self.model._data.shape[0])
+        self.model.beginInsertRows(QModelIndex(), self.start_row, self.start_row + self.count - 1)
+        self.model.splice_rows(self.start_row, 0, self.rows_data.get())
         self.model.endInsertRows()
         self.model.layoutChanged.emit()
 
@@ -46,8 +50,7 @@ class DeleteRowsCommand(QUndoCommand):
         if not self.executed:  # Prevent re-execution when pushed
             self.executed = True
         else:
-            self.model.beginRemoveRows(QModelIndex(), self.start_row, self.start_row + len(self.rows_data) - 1)
-            self.model._data = pl.concat([self.model._data[:self.start_row], self.model._data[self.start_row + len(self.rows_data):]])
-            self.model.loaded_rows = max(self.model.loaded_rows - len(self.rows_data), 0)
+            self.model.beginRemoveRows(QModelIndex(), self.start_row, self.start_row + self.count - 1)
+            self.model.splice_rows(self.start_row, self.count)
             self.model.endRemoveRows()
             self.model.layoutChanged.emit()
@@ -29,11 +29,13 @@ class EditDataCommand(QUndoCommand):
     def undo(self):
         """Kembalikan ke nilai sebelumnya"""
         # Update model data
-        self.model._data[self.row, self.column] = self.old_value
+        self.model.set_cell(self.row, self.column, self.old_value)
+        self.model.mark_dirty([self.model.schema().names()[self.column]])
         self.model.dataChanged.emit(self.model.createIndex(self.row, self.column), self.model.createIndex(self.row, self.column))
 
     def redo(self):
         """Terapkan perubahan baru"""
         # Update model data
-        self.model._data[self.row, self.column] = self.new_value
+        self.model.set_cell(self.row, self.column, self.new_value)
+        self.model.mark_dirty([self.model.schema().names()[self.column]])
         self.model.dataChanged.emit(self.model.createIndex(self.row, self.column), self.model.createIndex(self.row, self.column))
\ No newline at end of file
@@ -1,6 +1,8 @@
 from PyQt6.QtGui import QUndoCommand
 import polars as pl
 
+from service.command.UndoStack import UndoPayload
+
 class LoadDataCommand(QUndoCommand):
     """
     Command class for loading data to the main model.
@@ -8,27 +10,37 @@ class LoadDataCommand(QUndoCommand):
     allowing for undo and redo operations.
     """
     
-    def __init__(self, model, new_data):
+    def __init__(self, model, new_data, old_data=None, schema_source=None):
         """
         Initializes the LoadDataCommand with model and new data.
 
         :param model: The model containing the data.
-        :param new_data: The new data to be loaded into the model.
+        :param new_data: The new data to be loaded into the model, a DataFrame or a LazyFrame.
+        :param old_data: The data to restore on undo, when the model already shows `new_data`
+                         (a file streamed into the model). Defaults to the current data of the model.
+        :param schema_source: The path and read options of the file `new_data` was read from, to remember
+                              the column types set on it (see `TableModel.schema_source`).
         """
         super().__init__()
         self.model = model
-        self.new_data = new_data
-        self.old_data = model.get_data()
+        self.new_data = UndoPayload(new_data)
+        self.old_data = UndoPayload(model.source() if old_data is None else old_data)
+        self.schema_source = schema_source
+        self.old_schema_source = model.schema_source
         self.setText("Load Data")
 
     def undo(self):
         """
         Undo the loading of data by restoring the previous data.
         """
-        self.model.set_data(self.old_data)
+        self.model.set_data(self.old_data.get())
+        self.model.schema_source = self.old_schema_source
 
     def redo(self):
         """
         Redo the loading of data by setting the new data again.
         """
-        self.model.set_data(self.new_data)
+        new_data = self.new_data.get()
+        if self.model.source() is not new_data:
+            self.model.set_data(new_data)
+        self.model.schema_source = self.schema_source
@@ -1,6 +1,8 @@
 from PyQt6.QtGui import QUndoCommand
 import polars as pl
 
+from service.command.UndoStack import UndoPayload
+
 class LoadSecondaryDataCommand(QUndoCommand):
     """
     Command class for loading secondary data to the main model.
@@ -24,7 +26,9 @@ class LoadSecondaryDataCommand(QUndoCommand):
         self.secondary_data = secondary_data
         self.merge_option = merge_option
         self.matching_columns = matching_columns
-        self.merged_data = self._merge_data()
+        self.merged_data = UndoPayload(self._merge_data())
+        self.main_data = UndoPayload(main_data)
+        self.secondary_data = None  # Only needed to merge
         self.setText("Load Secondary Data")
 
     def _merge_data(self):
@@ -82,10 +86,10 @@ class LoadSecondaryDataCommand(QUndoCommand):
         """
         Undo the loading of secondary data by restoring the main data.
         """
-        self.model.set_data(self.main_data)
+        self.model.set_data(self.main_data.get())
 
     def redo(self):
         """
         Redo the loading of secondary data by setting the merged data again.
         """
-        self.model.set_data(self.merged_data)
+        self.model.set_data(self.merged_data.get())
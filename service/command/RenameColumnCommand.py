@@ -43,6 +43,7 @@ class RenameColumnCommand(QUndoCommand):
             self.executed = True
         else:
             self._model._data = self._model._data.rename({self._old_name: self._new_name})
+            self._model.mark_dirty([self._old_name, self._new_name])
             self._model.layoutChanged.emit()
 
     def undo(self):
@@ -50,4 +51,5 @@ class RenameColumnCommand(QUndoCommand):
             self.executed = True
         else:
             self._model._data = self._model._data.rename({self._new_name: self._old_name})
+            self._model.mark_dirty([self._old_name, self._new_name])
             self._model.layoutChanged.emit()
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import tempfile
+import weakref
+
+import polars as pl
+from PyQt6.QtGui import QUndoStack
+
+
+class UndoPayload:
+    """
+    Holds the data an undo command needs (a replaced column, deleted rows, a former frame, ...).
+    The data is kept as a Polars frame, so it shares its buffers with the frames it was taken from.
+    When the undo stack runs over its memory budget, the payload can be spilled to an Arrow IPC file
+    and is read back the next time it is needed, or released for good once its command is evicted.
+    Attributes:
+        spilled (bool): Whether the data is currently held in a file.
+        released (bool): Whether the data was dropped with its evicted command.
+    Methods:
+        get():
+            Returns the data, reading it back if it was spilled.
+        nbytes():
+            Returns the memory held by the data.
+        spill(directory=None):
+            Writes the data to a file and drops it from memory.
+        release():
+            Drops the data and its file.
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data (pl.DataFrame, pl.Series or pl.LazyFrame): The data to keep. A Series is kept as a one-column frame.
+        """
+        self._data = data.to_frame() if isinstance(data, pl.Series) else data
+        self._path = None
+        self._remove = None
+        self.released = False
+
+    @property
+    def spilled(self):
+        return self._data is None and self._path is not None
+
+    def get(self):
+        if self._data is None and self._path is not None:
+            self._data = pl.read_ipc(self._path)
+        return self._data
+
+    def nbytes(self):
+        return self._data.estimated_size() if isinstance(self._data, pl.DataFrame) else 0
+
+    def spill(self, directory=None):
+        if not isinstance(self._data, pl.DataFrame):
+            return
+        if self._path is None:
+            handle, self._path = tempfile.mkstemp(prefix="undo-", suffix=".arrow", dir=directory)
+            os.close(handle)
+            self._remove = weakref.finalize(self, _remove_file, self._path)
+            self._data.write_ipc(self._path, compression="uncompressed")
+        self._data = None
+
+    def release(self):
+        self._data = None
+        self._path = None
+        self.released = True
+        if self._remove is not None:
+            self._remove()
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def command_payloads(command):
+    return [value for value in vars(command).values() if isinstance(value, UndoPayload)]
+
+
+class UndoStack(QUndoStack):
+    """
+    An undo stack whose commands keep their data within a memory budget.
+    The data of a command is the `UndoPayload` attributes it holds. After every push, while the data of
+    the commands exceeds `max_bytes`, the payloads of at least `spill_bytes` are written to files in
+    `spill_dir` (when spilling is enabled), oldest first, and then the oldest commands are evicted:
+    their data is dropped and they can no longer be undone. The data of the frame the model
+    currently shows is not counted, nor spilled, since it is held by the model anyway.
+    Attributes:
+        max_bytes (int): The memory budget of the stack.
+        spill_bytes (int or None): The size from which a payload is spilled to a file rather than evicted.
+                                   None (the default) disables spilling.
+        spill_dir (str or None): The folder of the spilled payloads. Defaults to the temporary folder.
+        floor (int): The index below which commands were evicted.
+    Methods:
+        nbytes():
+            Returns the memory held by the data of the commands.
+    """
+
+    max_bytes = 512 * 1024 * 1024
+    spill_bytes = None
+    spill_dir = None
+
+    def __init__(self, parent=None):
+        """
+        Args:
+            parent (TableModel, optional): The model the commands apply to, whose current data is not counted.
+        """
+        super().__init__(parent)
+        self.floor = 0
+
+    def _payloads(self, start=0):
+        for i in range(start, self.count()):
+            yield i, command_payloads(self.command(i))
+
+    def _live(self, payload):
+        model = self.parent()
+        data = payload._data
+        return data is not None and model is not None and (data is model._frame or data is model._lazy)
+
+    def _size(self, payload):
+        return 0 if self._live(payload) else payload.nbytes()
+
+    def nbytes(self):
+        return sum(self._size(payload) for _, payloads in self._payloads() for payload in payloads)
+
+    def push(self, command):
+        super().push(command)
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        total = self.nbytes()
+        # The command just pushed always stays undoable
+        last = self.index() - 1
+        if self.spill_bytes is not None:
+            for i, payloads in self._payloads(self.floor):
+                if total <= self.max_bytes or i >= last:
+                    break
+                for payload in payloads:
+                    size = self._size(payload)
+                    if size >= self.spill_bytes:
+                        payload.spill(self.spill_dir)
+                        total -= size
+        for i, payloads in self._payloads(self.floor):
+            if total <= self.max_bytes or i >= last:
+                break
+            size = sum(self._size(payload) for payload in payloads)
+            if size == 0:
+                # Nothing of this command is held in memory (spilled, or nothing kept)
+                continue
+            for j in range(self.floor, i + 1):
+                for payload in command_payloads(self.command(j)):
+                    payload.release()
+            total -= size
+            self.floor = i + 1
+
+    def canUndo(self):
+        return self.index() > self.floor and super().canUndo()
+
+    def undo(self):
+        if self.canUndo():
+            super().undo()
+
+    def clear(self):
+        super().clear()
+        self.floor = 0
@@ -1,6 +1,6 @@
 import polars as pl
 from PyQt6.QtWidgets import QMessageBox
-from service.utils.convert import get_data
+from service.utils.convert import get_data, from_r
 
 def run_compute(parent):
     """
@@ -18,16 +18,16 @@ def run_compute(parent):
     """
     
     import rpy2.robjects as ro
-    get_data(parent)
+    get_data(parent, script=parent.get_script())
     try:
         ro.r('data <- as.data.frame(r_df)')
         ro.r("attach(data)")
         ro.r(parent.get_script())
         new_column_name = parent.column_name_input.text()
-        new_column = ro.conversion.rpy2py(ro.globalenv['new_column'])
+        new_column = from_r("data.frame(new_column = new_column)")
         ro.r("detach(data)")
         if new_column is not None:
-            return pl.Series(new_column_name, list(new_column))
+            return new_column.to_series().alias(new_column_name)
         QMessageBox.information(parent, "Success", "New variable computed successfully!")
     except Exception as e:
         error_dialog = QMessageBox()
@@ -2,8 +2,8 @@ import os
 import polars as pl
 import rpy2.robjects as ro
 import rpy2.robjects.lib.grdevices as grdevices
-from rpy2.robjects import pandas2ri
-from service.utils.convert import get_data
+from service.utils.r_frame import collect_for_script
+from service.utils.convert import get_data, from_r
 
 def run_correlation_matrix(parent):
     """
@@ -11,8 +11,8 @@ def run_correlation_matrix(parent):
     Parameters:
     parent (object): An object that contains the following attributes:
         - activate_R(): Method to activate R environment.
-        - model1: An object with a method get_data() that returns a Polars DataFrame.
-        - model2: An object with a method get_data() that returns a Polars DataFrame.
+        - model1: An object with a method scan() that returns a Polars LazyFrame.
+        - model2: An object with a method scan() that returns a Polars LazyFrame.
         - r_script: A string containing the R script to be executed.
         - result: A string to store the correlation matrix result.
         - plot: A list to store the path of the generated correlation plot.
@@ -27,20 +27,15 @@ def run_correlation_matrix(parent):
     7. Checks if a correlation plot is generated and saves it to a file if it exists.
     8. Handles any exceptions by setting the parent.error attribute and storing the error message in parent.result.
     """
-    
-    import rpy2_arrow.polars as rpy2polars
 
     # Aktivasi R
     parent.activate_R()
-    pandas2ri.activate()
 
     # Mengambil data dari model1 dan model2
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
         # Memuat library R yang diperlukan
@@ -64,22 +59,12 @@ def run_correlation_matrix(parent):
             plot_name = f"correlation_plot_{method}"
 
             if ro.r(f'exists("{matrix_name}")')[0]:
-                # Ambil tabel korelasi dari R
-                matrix_df = ro.r(f'as.data.frame({matrix_name})')
-                pandas_df = pandas2ri.rpy2py(matrix_df)
-
-                # Bulatkan nilai
-                pandas_df_rounded = pandas_df.round(5)
-
-                # Ambil nama variabel dari kolom (rownames seharusnya sama dengan colnames di korelasi)
-                var_names = list(pandas_df_rounded.columns)
-
-                # Tambahkan kolom "Variable" di Pandas sebelum convert
-                pandas_df_with_var = pandas_df_rounded.copy()
-                pandas_df_with_var.insert(0, "Variable", var_names)  # kolom di paling kiri
-
-                # Convert ke Polars
-                correlation_df = pl.from_pandas(pandas_df_with_var)
+                # Ambil tabel korelasi dari R lewat Arrow, dibulatkan dan dengan kolom "Variable"
+                # di paling kiri (rownames seharusnya sama dengan colnames di korelasi)
+                correlation_df = from_r(
+                    f'data.frame(Variable = colnames({matrix_name}), '
+                    f'round(as.data.frame({matrix_name}), 5), check.names = FALSE)'
+                )
 
                 # Simpan ke result_tables
                 result_tables[f"{method.title()} Correlation"] = correlation_df
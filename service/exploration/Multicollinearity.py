@@ -1,7 +1,7 @@
 import polars as pl
 import rpy2.robjects as ro
-from rpy2.robjects import pandas2ri
-from service.utils.convert import get_data
+from service.utils.r_frame import collect_for_script
+from service.utils.convert import get_data, from_r
 
 def run_multicollinearity(parent):
     """
@@ -21,17 +21,14 @@ def run_multicollinearity(parent):
     ValueError: If no R script has been generated in the parent object.
     Exception: If any other error occurs during the execution, it is caught and stored in the parent object.
     """
-    pandas2ri.activate()
     parent.activate_R()  # Pastikan R aktif
     # Ambil data dari model
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
 
     # Gabungkan data menggunakan Polars
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
         ro.r('suppressMessages(library(car))')
@@ -55,8 +52,7 @@ def run_multicollinearity(parent):
 
             # Ambil intercept (koefisien), ubah rownames jadi kolom
             ro.r('intercept_df <- tibble::rownames_to_column(as.data.frame(regression_model$coefficients), var = "Variable")')
-            intercept_df = ro.r('intercept_df')
-            intercept_polars = pl.from_pandas(pandas2ri.rpy2py(intercept_df))
+            intercept_polars = from_r('intercept_df')
             intercept_polars = intercept_polars.with_columns(
                 pl.col("Variable").str.replace_all("`", "")
             )
@@ -65,8 +61,7 @@ def run_multicollinearity(parent):
 
         # Ambil VIF dan ubah rownames jadi kolom
         ro.r('vif_df <- tibble::rownames_to_column(as.data.frame(vif_values), var = "Variable")')
-        vif_df = ro.r('vif_df')
-        vif_polars_df = pl.from_pandas(pandas2ri.rpy2py(vif_df))
+        vif_polars_df = from_r('vif_df')
         vif_polars_df = vif_polars_df.with_columns(
             pl.col("Variable").str.replace_all("`", "")
         )
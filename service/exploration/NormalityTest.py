@@ -2,6 +2,7 @@ import os
 import polars as pl
 import rpy2.robjects as ro
 import rpy2.robjects.lib.grdevices as grdevices
+from service.utils.r_frame import collect_for_script
 from service.utils.convert import get_data
 import re
 
@@ -28,8 +29,8 @@ def run_normality_test(parent):
     Parameters:
     parent (object): An object that contains the following attributes:
         - activate_R(): A method to activate the R environment.
-        - model1: An object with a get_data() method that returns a dataframe.
-        - model2: An object with a get_data() method that returns a dataframe.
+        - model1: An object with a scan() method that returns a LazyFrame.
+        - model2: An object with a scan() method that returns a LazyFrame.
         - r_script (str): An R script to be executed.
         - selected_columns (list): A list of column names to be tested for normality.
         - result (str): A string to store the results of the normality tests.
@@ -40,11 +41,10 @@ def run_normality_test(parent):
     """
     
     parent.activate_R()
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
         ro.r('rm(list=ls()[ls() != "r_df"])')
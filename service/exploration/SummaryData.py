@@ -3,6 +3,7 @@ from collections import defaultdict
 import re
 import polars as pl
 import rpy2.robjects as ro
+from service.utils.r_frame import collect_for_script
 from service.utils.convert import get_data
 
 def extract_formatted_single(r_output: str, r_script: str) -> pl.DataFrame:
@@ -143,14 +144,12 @@ def run_summary_data(parent):
     parent.activate_R()
 
     # Get data from model
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
 
     # Combine data using Polars
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
         # Set data in R
@@ -1,11 +1,9 @@
 import polars as pl
 import rpy2.robjects as ro
-from rpy2.robjects import pandas2ri
 import re
-from service.utils.convert import get_data
+from service.utils.r_frame import collect_for_script
+from service.utils.convert import get_data, from_r
 
-# Aktifkan converter pandas <-> R
-pandas2ri.activate()
 
 def extract_formatted(r_output: str):
     lines = r_output.strip().split('\n')
@@ -162,13 +160,12 @@ def extract_formatted(r_output: str):
 def run_variable_selection(parent):
     parent.activate_R()
 
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
 
     # Gabungkan dan filter data kosong
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
         ro.r('suppressMessages(library(car))')
@@ -200,13 +197,10 @@ def run_variable_selection(parent):
             if model_var in existing_objects:
                 # 1. ANOVA Table
                 try:
-                    anova_r = ro.r(f"{model_var}$anova")
-                    anova_pd = pandas2ri.rpy2py(anova_r)
-                    if anova_pd.index.name and anova_pd.index.name not in anova_pd.columns:
-                        anova_pd = anova_pd.reset_index()
-                    if 'Step' in anova_pd.columns:
-                        anova_pd['Step'] = anova_pd['Step'].astype(str).str.replace('`', '', regex=False)
-                    result_dict[f"Anova {method.capitalize()} Selection"] = pl.from_pandas(anova_pd)
+                    anova_df = from_r(f"{model_var}$anova")
+                    if 'Step' in anova_df.columns:
+                        anova_df = anova_df.with_columns(pl.col('Step').cast(pl.Utf8).str.replace_all('`', '', literal=True))
+                    result_dict[f"Anova {method.capitalize()} Selection"] = anova_df
                 except Exception as e:
                     result_dict[f"Anova {method.capitalize()} Selection"] = f"[ERROR] {e}"
             if result_var in existing_objects:
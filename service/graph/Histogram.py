@@ -3,6 +3,7 @@ import polars as pl
 from PyQt6.QtWidgets import QMessageBox
 import rpy2.robjects as ro
 import rpy2.robjects.lib.grdevices as grdevices
+from service.utils.r_frame import collect_for_script
 from service.utils.convert import get_data
 
 def run_histogram(parent):
@@ -21,8 +22,8 @@ def run_histogram(parent):
     Args:
         parent (object): An object that contains methods and attributes required for the function, including:
             - `activate_R()`: Method to activate the R environment.
-            - `model1.get_data()`: Method to retrieve data from the first model.
-            - `model2.get_data()`: Method to retrieve data from the second model.
+            - `model1.scan()`: Method to retrieve data from the first model as a LazyFrame.
+            - `model2.scan()`: Method to retrieve data from the second model as a LazyFrame.
             - `r_script`: A string containing the R script to be executed.
             - `plot`: Attribute to store the paths of generated histogram PNG files.
             - `error`: Attribute to indicate if an error occurred.
@@ -32,11 +33,10 @@ def run_histogram(parent):
     import rpy2_arrow.polars as rpy2polars
 
     parent.activate_R()
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
         # Load required R libraries
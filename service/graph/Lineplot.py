@@ -3,6 +3,7 @@ import polars as pl
 from PyQt6.QtWidgets import QMessageBox
 import rpy2.robjects as ro
 import rpy2.robjects.lib.grdevices as grdevices
+from service.utils.r_frame import collect_for_script
 from service.utils.convert import get_data
 
 def run_lineplot(parent):
@@ -21,8 +22,8 @@ def run_lineplot(parent):
     Args:
         parent: An object that contains the following attributes and methods:
             - activate_R(): Method to activate the R environment.
-            - model1: An object with a get_data() method that returns a Polars DataFrame.
-            - model2: An object with a get_data() method that returns a Polars DataFrame.
+            - model1: An object with a scan() method that returns a Polars LazyFrame.
+            - model2: An object with a scan() method that returns a Polars LazyFrame.
             - r_script: A string containing the R script to be executed.
             - plot: An attribute to store the list of plot file paths (optional).
             - error: An attribute to indicate if an error occurred.
@@ -34,11 +35,10 @@ def run_lineplot(parent):
     import rpy2_arrow.polars as rpy2polars
 
     parent.activate_R()
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
         # Load required R libraries
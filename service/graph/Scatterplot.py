@@ -3,6 +3,7 @@ import polars as pl
 
 import rpy2.robjects as ro
 import rpy2.robjects.lib.grdevices as grdevices
+from service.utils.r_frame import collect_for_script
 from service.utils.convert import get_data
 
 def run_scatterplot(parent):
@@ -14,8 +15,8 @@ def run_scatterplot(parent):
     Args:
         parent: An object that contains the following attributes:
             - activate_R(): A method to activate the R environment.
-            - model1: An object with a get_data() method that returns a Polars DataFrame.
-            - model2: An object with a get_data() method that returns a Polars DataFrame.
+            - model1: An object with a scan() method that returns a Polars LazyFrame.
+            - model2: An object with a scan() method that returns a Polars LazyFrame.
             - r_script: A string containing the R script to be executed.
             - plot: An attribute to store the list of generated plot image paths.
             - error: An attribute to indicate if an error occurred.
@@ -30,13 +31,12 @@ def run_scatterplot(parent):
     parent.activate_R()
 
     # Get data from model1 and model2
-    df1 = parent.model1.get_data()
-    df2 = parent.model2.get_data()
+    df1 = parent.model1.scan()
+    df2 = parent.model2.scan()
 
     # Merge the data into one dataframe
-    df = pl.concat([df1, df2], how="horizontal")
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    get_data(parent,df)
+    df = collect_for_script([df1, df2], parent.r_script)
+    get_data(parent, df, parent.r_script)
 
     try:
 
@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QComboBox
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QComboBox, QCheckBox
 from PyQt6.QtWidgets import QMessageBox
 
 def assign_of_interest(parent):
@@ -8,6 +8,7 @@ def assign_of_interest(parent):
     If any of the selected variables is not of type "String", it assigns that variable as the 
     variable of interest (`of_interest_var`) and updates the `of_interest_model` with this variable.
     It also removes the selected variable from the `variables_list` and calls the `show_r_script` function.
+    When `multiple_responses` is enabled, the variable is appended to the variables of interest instead.
     If all selected variables are of type "String", it shows a warning message indicating that 
     the variable of interest must be of type Numeric.
     Args:
@@ -26,8 +27,13 @@ def assign_of_interest(parent):
             type_of_var = index.data().split(" [")[1].replace("]", "")
             if type_of_var != "String":
                 all_string = False
-                old_var = parent.of_interest_var[0] if parent.of_interest_var else None
-                parent.of_interest_var = [index.data()]
+                if getattr(parent, "multiple_responses", False) is True:
+                    if index.data() not in parent.of_interest_var:
+                        parent.of_interest_var = parent.of_interest_var + [index.data()]
+                    old_var = None
+                else:
+                    old_var = parent.of_interest_var[0] if parent.of_interest_var else None
+                    parent.of_interest_var = [index.data()]
                 parent.of_interest_model.setStringList(parent.of_interest_var)
                 parent.variables_list.model().removeRow(index.row())
                 if old_var:
@@ -86,6 +92,7 @@ def assign_vardir(parent):
     - Checks the selected indexes in the parent's variables list.
     - If there are selected indexes, it iterates through them to determine the type of each variable.
     - If a variable is not of type "String", it assigns it to the parent's vardir_var attribute and updates the vardir_model.
+      When `multiple_responses` is enabled, it is appended so that the i-th vardir pairs with the i-th variable of interest.
     - Removes the selected variable from the variables list.
     - Calls the show_r_script function with the parent object.
     - If all selected variables are of type "String", displays a warning message indicating that the vardir variable must be of type Numeric.
@@ -98,8 +105,13 @@ def assign_vardir(parent):
             type_of_var = index.data().split(" [")[1].replace("]", "")
             if type_of_var != "String":
                 all_string = False
-                old_var = parent.vardir_var[0] if parent.vardir_var else None
-                parent.vardir_var = [index.data()]
+                if getattr(parent, "multiple_responses", False) is True:
+                    if index.data() not in parent.vardir_var:
+                        parent.vardir_var = parent.vardir_var + [index.data()]
+                    old_var = None
+                else:
+                    old_var = parent.vardir_var[0] if parent.vardir_var else None
+                    parent.vardir_var = [index.data()]
                 parent.vardir_model.setStringList(parent.vardir_var)
                 parent.variables_list.model().removeRow(selected_indexes[-1].row())  # Remove from variables list
                 if old_var:
@@ -227,6 +239,9 @@ def generate_r_script(parent):
             - as_factor_var (list): A list of variables to be treated as factors.
             - selection_method (str): The method for variable selection ("Stepwise", "None", or other).
             - method (str): The method to be used in the mseFH function.
+            - backend (str, optional): "Native" when the model is fitted by the NumPy engine.
+            - multiple_responses (bool, optional): True to write one model per variable of interest and
+              direct variance pair (fitted together by the native engine).
     Returns:
         str: The generated R script as a string.
     """
@@ -245,7 +260,20 @@ def generate_r_script(parent):
     else:
         formula = f'{of_interest_var} ~ {auxilary_vars} + {as_factor_var}'
 
-    r_script = f'names(data) <- gsub(" ", "_", names(data)); #Replace space with underscore\n'
+    if getattr(parent, "multiple_responses", False) is True and len(parent.of_interest_var) > 1:
+        terms = formula.split(" ~ ", 1)[1]
+        r_script = '# Native backend: the models below are fitted together in Python from the selected variables, edits to this script are not used\n'
+        r_script += f'names(data) <- gsub(" ", "_", names(data)); #Replace space with underscore\n'
+        for i, (y, vardir) in enumerate(zip(parent.of_interest_var, parent.vardir_var), start=1):
+            y = y.split(" [")[0].replace(" ", "_")
+            vardir = vardir.split(" [")[0].replace(" ", "_")
+            r_script += f'model_{i}<-mseFH({y} ~ {terms}, {vardir}, method = "{parent.method}", data=data)\n'
+        return r_script
+
+    r_script = ''
+    if getattr(parent, "backend", "R") == "Native":
+        r_script += '# Native backend: the model below is fitted in Python from the selected variables, edits to this script are not used\n'
+    r_script += f'names(data) <- gsub(" ", "_", names(data)); #Replace space with underscore\n'
     r_script += f'formula <- {formula}\n'
     r_script += f'vardir_var <- data["{vardir_var}"]\n'
     if parent.selection_method=="Stepwise":
@@ -289,7 +317,11 @@ def show_options(parent):
     Parameters:
     parent (QWidget): The parent widget to which this dialog belongs.
     The dialog contains a combo box for selecting a method from the options 
-    "ML", "REML", and "FH", with "REML" set as the default selection. 
+    "ML", "REML", and "FH", with "REML" set as the default selection, and a
+    combo box for selecting the backend fitting the model: "R" (sae package)
+    or "Native" (NumPy Fay-Herriot engine, no R session needed). A check box
+    enables fitting several variables of interest at once, each paired with its
+    own direct variance, which uses the native backend.
     It also includes "OK" and "Cancel" buttons. The "OK" button triggers 
     the set_selection_method function, while the "Cancel" button closes the dialog.
     """
@@ -311,9 +343,24 @@ def show_options(parent):
 
     parent.method_selection = QComboBox()
     parent.method_selection.addItems(["ML", "REML", "FH"])
-    parent.method_selection.setCurrentText("REML")
+    parent.method_selection.setCurrentText(parent.method)
     layout.addWidget(parent.method_selection)
 
+    backend_label = QLabel("Backend:")
+    layout.addWidget(backend_label)
+
+    parent.backend_selection = QComboBox()
+    parent.backend_selection.addItems(["R", "Native"])
+    parent.backend_selection.setCurrentText(getattr(parent, "backend", "R"))
+    layout.addWidget(parent.backend_selection)
+
+    parent.multiple_responses_checkbox = QCheckBox("Multiple variables of interest (Native)")
+    parent.multiple_responses_checkbox.setChecked(getattr(parent, "multiple_responses", False) is True)
+    parent.multiple_responses_checkbox.toggled.connect(
+        lambda checked: checked and parent.backend_selection.setCurrentText("Native")
+    )
+    layout.addWidget(parent.multiple_responses_checkbox)
+
     button_layout = QHBoxLayout()
     ok_button = QPushButton("OK")
     cancel_button = QPushButton("Cancel")
@@ -329,11 +376,31 @@ def show_options(parent):
 
     options_dialog.exec()
 
+def keep_single_response(parent):
+    """
+    Returns every variable of interest and direct variance but the first to the variables list.
+    Used when the multiple variables of interest mode is turned off.
+    Args:
+        parent: The dialog holding the variable lists.
+    """
+
+    extra = parent.of_interest_var[1:] + parent.vardir_var[1:]
+    if not extra:
+        return
+    parent.of_interest_var = parent.of_interest_var[:1]
+    parent.vardir_var = parent.vardir_var[:1]
+    parent.of_interest_model.setStringList(parent.of_interest_var)
+    parent.vardir_model.setStringList(parent.vardir_var)
+    for item in extra:
+        parent.variables_list.model().insertRow(0)
+        parent.variables_list.model().setData(parent.variables_list.model().index(0), item)
+
 def set_selection_method(parent, dialog):
     """
     Sets the selection method for the parent object and accepts the dialog.
-    This function retrieves the current text from the method selection combo box
-    of the parent object and assigns it to the parent's method attribute. It then
+    This function retrieves the current text from the method and backend selection
+    combo boxes of the parent object and assigns them to the parent's method and
+    backend attributes, together with the multiple variables of interest mode. It then
     accepts the dialog and calls the show_r_script function with the parent object
     as an argument.
     Args:
@@ -345,5 +412,11 @@ def set_selection_method(parent, dialog):
     
     # parent.selection_method = parent.method_combo.currentText()
     parent.method = parent.method_selection.currentText()
+    parent.backend = parent.backend_selection.currentText()
+    parent.multiple_responses = parent.multiple_responses_checkbox.isChecked()
+    if parent.multiple_responses:
+        parent.backend = "Native"
+    else:
+        keep_single_response(parent)
     dialog.accept()
     show_r_script(parent)
\ No newline at end of file
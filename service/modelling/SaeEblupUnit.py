@@ -360,6 +360,7 @@ def generate_r_script(parent):
             - selection_method (str): The method for variable selection (e.g., "Stepwise", "None").
             - bootstrap (int): The number of bootstrap samples.
             - method (str): The method to be used in the pbmseBHF function.
+            - backend (str, optional): "Native" when the model is fitted by the NumPy engine.
     Returns:
         str: The generated R script as a string.
     """
@@ -381,7 +382,10 @@ def generate_r_script(parent):
     else:
         formula = f'{of_interest_var} ~ {auxilary_vars} + {as_factor_var}'
 
-    r_script = f'names(data_unit) <- gsub(" ", "_", names(data_unit)); #Replace space with underscore\n'
+    r_script = ''
+    if getattr(parent, "backend", "R") == "Native":
+        r_script += '# Native backend: the model below is fitted in Python from the selected variables, edits to this script are not used\n'
+    r_script += f'names(data_unit) <- gsub(" ", "_", names(data_unit)); #Replace space with underscore\n'
     r_script += f'formula <- {formula}\n'
     r_script += f'Xmeans <- with(data_unit, data.frame({index_var},{aux_mean_vars}))\n'
     r_script += f'Popn <- with(data_unit, data.frame({index_var},{population_sample_size_var}))\n'
@@ -430,6 +434,9 @@ def show_options(parent):
     The dialog allows the user to select a method from a combo box and set the number of bootstrap iterations.
     The available methods are "ML", "REML", and "FH", with "REML" set as the default.
     The bootstrap iterations input is validated to accept only integer values, with a default value of 50.
+    An optional seed makes the bootstrap reproducible; bootstrap shards run in parallel give the same
+    result as a serial run for the same seed. The backend combo box selects the engine fitting the
+    model: "R" (sae package) or "Native" (NumPy nested error REML/ML fit and bootstrap).
     The dialog contains "OK" and "Cancel" buttons. Clicking "OK" will apply the selected options by calling
     the set_selection_method function, while clicking "Cancel" will close the dialog without applying changes.
     """
@@ -459,9 +466,25 @@ def show_options(parent):
     
     parent.bootstrap_edit = QLineEdit()
     parent.bootstrap_edit.setValidator(QIntValidator())
-    parent.bootstrap_edit.setText("50")
+    parent.bootstrap_edit.setText(parent.bootstrap)
     layout.addWidget(parent.bootstrap_edit)
     
+    seed_label = QLabel("Seed (empty for random):")
+    layout.addWidget(seed_label)
+    
+    parent.seed_edit = QLineEdit()
+    parent.seed_edit.setValidator(QIntValidator(0, 2147483646))
+    parent.seed_edit.setText(getattr(parent, "seed", ""))
+    layout.addWidget(parent.seed_edit)
+    
+    backend_label = QLabel("Backend:")
+    layout.addWidget(backend_label)
+    
+    parent.backend_selection = QComboBox()
+    parent.backend_selection.addItems(["R", "Native"])
+    parent.backend_selection.setCurrentText(getattr(parent, "backend", "R"))
+    layout.addWidget(parent.backend_selection)
+    
 
     button_layout = QHBoxLayout()
     ok_button = QPushButton("OK")
@@ -480,7 +503,7 @@ def show_options(parent):
 
 def set_selection_method(parent, dialog):
     """
-    Sets the selection method and bootstrap value for the parent object and accepts the dialog.
+    Sets the selection method, bootstrap value, seed and backend for the parent object and accepts the dialog.
     Args:
         parent: The parent object that contains the method_selection and bootstrap_edit widgets.
         dialog: The dialog object that will be accepted after setting the selection method and bootstrap value.
@@ -491,5 +514,7 @@ def set_selection_method(parent, dialog):
     # parent.selection_method = parent.method_combo.currentText()
     parent.method = parent.method_selection.currentText()
     parent.bootstrap = parent.bootstrap_edit.text()
+    parent.seed = parent.seed_edit.text()
+    parent.backend = parent.backend_selection.currentText()
     dialog.accept()
     show_r_script(parent)
\ No newline at end of file
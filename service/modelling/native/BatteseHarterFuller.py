@@ -0,0 +1,489 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+METHODS = ("REML", "ML")
+BOOTSTRAP_CHUNK_ELEMENTS = 2_000_000
+BOOTSTRAP_SHARD_REPLICATES = 50
+
+
+def domain_codes(dom):
+    """
+    Encodes the domain of every unit as an integer code, once.
+    Args:
+        dom (array-like): The domain of each sampled unit.
+    Returns:
+        tuple: The sorted distinct domains (np.ndarray), the code of each unit (np.ndarray)
+               and the sample size of each domain (np.ndarray).
+    """
+
+    levels, codes, counts = np.unique(np.asarray(dom), return_inverse=True, return_counts=True)
+    return levels, codes.reshape(-1), counts
+
+
+class DomainDesign:
+    """
+    Per-domain sufficient statistics of the unit level design, computed once in O(n p^2).
+    Every covariance operator of the nested error model y = X beta + u_d + e is block diagonal
+    with one block a_d I + b_d J per domain (J the all-ones matrix), so an operator is stored as
+    the pair of (k, D) arrays (a, b), and X'MX only needs the within-domain cross-products X_d'X_d
+    and column sums X_d'1 instead of the n x n matrix.
+    Attributes:
+        X (np.ndarray): The unit level design matrix (n x p).
+        codes (np.ndarray): The domain code of each unit (n,), see `domain_codes`.
+        nd (np.ndarray): The sample size of each domain (D,), as floats.
+        Sxx (np.ndarray): The cross-products X_d'X_d of each domain (D x p x p).
+        sx (np.ndarray): The column sums X_d'1 of each domain (D x p).
+    """
+
+    def __init__(self, X, codes, nd):
+        self.X = np.asarray(X, dtype=float)
+        self.codes = np.asarray(codes)
+        self.nd = np.asarray(nd, dtype=float)
+        n, p = self.X.shape
+        rows, cols = np.triu_indices(p)
+        packed = self.group_sum((self.X[:, rows] * self.X[:, cols]).T)
+        self.Sxx = np.empty((self.D, p, p))
+        self.Sxx[:, rows, cols] = packed.T
+        self.Sxx[:, cols, rows] = packed.T
+        self.sx = self.group_sum(self.X.T).T
+
+    @property
+    def D(self):
+        return len(self.nd)
+
+    def group_sum(self, V):
+        """Sums every row of V (k x n) over the units of each domain, giving a (k x D) array."""
+        V = np.atleast_2d(V)
+        index = self.codes + self.D * np.arange(V.shape[0])[:, np.newaxis]
+        return np.bincount(index.reshape(-1), weights=V.reshape(-1), minlength=V.shape[0] * self.D).reshape(V.shape[0], self.D)
+
+    def apply(self, op, V):
+        """Applies the block operator `op` = (a, b) of every row to the rows of V (k x n)."""
+        a, b = op
+        return a[:, self.codes] * V + (b * self.group_sum(V))[:, self.codes]
+
+    def xmx(self, op):
+        """X'MX of the block operator `op` = (a, b) of every row, a (k x p x p) array."""
+        a, b = op
+        p = self.X.shape[1]
+        inner = (a @ self.Sxx.reshape(self.D, p * p)).reshape(-1, p, p)
+        weighted = b[:, :, np.newaxis] * self.sx
+        return inner + np.swapaxes(weighted, 1, 2) @ self.sx
+
+
+def _product(A, B, nd):
+    a1, b1 = A
+    a2, b2 = B
+    return a1 * a2, a1 * b2 + b1 * a2 + nd * b1 * b2
+
+
+def _trace(A, nd):
+    a, b = A
+    return np.sum(nd * (a + b), axis=-1)
+
+
+def _trace_product(A, B):
+    return np.einsum("kij,kji->k", A, B)
+
+
+def _nested_terms(Y, design, theta, method):
+    """
+    Score, expected information and fit of the nested error model at the variance components
+    `theta` = (sigma_u2, sigma_e2) of every response, using the closed-form block inverse
+    V_d^-1 = (I - gamma_d / n_d J) / sigma_e2 of each domain: one call costs O(k n p^2).
+    """
+
+    X, nd = design.X, design.nd
+    n, p = X.shape
+    sigma_u2, sigma_e2 = theta[:, :1], theta[:, 1:]
+    total = sigma_e2 + nd * sigma_u2
+    Vinv = (np.broadcast_to(1 / sigma_e2, total.shape), -sigma_u2 / (sigma_e2 * total))
+
+    Q = np.linalg.inv(design.xmx(Vinv))
+    beta = (Q @ (design.apply(Vinv, Y) @ X)[:, :, np.newaxis])[:, :, 0]
+    residual = Y - beta @ X.T
+    Py = design.apply(Vinv, residual)
+    quadratic = np.stack([np.sum(design.group_sum(Py) ** 2, axis=1), np.sum(Py ** 2, axis=1)], axis=1)
+
+    # A_u = V^-1 ZZ' and A_e = V^-1, the derivatives of V being ZZ' = J_d blocks and I
+    A = [(np.zeros_like(total), Vinv[0] + nd * Vinv[1]), Vinv]
+    k = len(Y)
+    score = np.empty((k, 2))
+    information = np.empty((k, 2, 2))
+    if method == "ML":
+        for i in range(2):
+            score[:, i] = -0.5 * _trace(A[i], nd) + 0.5 * quadratic[:, i]
+            for j in range(i, 2):
+                information[:, i, j] = information[:, j, i] = 0.5 * _trace(_product(A[i], A[j], nd), nd)
+    else:
+        G = [design.xmx(_product(A_i, Vinv, nd)) for A_i in A]
+        QG = [Q @ G_i for G_i in G]
+        for i in range(2):
+            score[:, i] = -0.5 * (_trace(A[i], nd) - np.trace(QG[i], axis1=1, axis2=2)) + 0.5 * quadratic[:, i]
+            for j in range(i, 2):
+                AA = _product(A[i], A[j], nd)
+                information[:, i, j] = information[:, j, i] = 0.5 * (
+                    _trace(AA, nd)
+                    - 2 * np.trace(Q @ design.xmx(_product(AA, Vinv, nd)), axis1=1, axis2=2)
+                    + _trace_product(QG[i], QG[j])
+                )
+
+    logdet = np.sum((nd - 1) * np.log(sigma_e2) + np.log(total), axis=1)
+    loglike = -0.5 * (logdet + np.sum(residual * Py, axis=1))
+    if method == "ML":
+        loglike -= 0.5 * n * np.log(2 * np.pi)
+    else:
+        loglike -= 0.5 * ((n - p) * np.log(2 * np.pi) - np.linalg.slogdet(Q)[1])
+    return score, information, beta, Q, loglike
+
+
+def fit_nested_error(Y, design, method="REML", MAXITER=100, PRECISION=1e-4):
+    """
+    Fits the nested error (Battese-Harter-Fuller) model to one or several responses by Fisher scoring.
+    Starting from half of the OLS residual variance for each component, every iteration updates
+    (sigma_u2, sigma_e2) with the REML (or ML) score and expected information, which are computed per
+    domain (see `DomainDesign`), so an iteration costs O(n p^2) instead of the O(n^3) of a dense fit.
+    sigma_u2 is kept at or above 0. A response converges when the largest change of its variance
+    components is below PRECISION times their sum; converged responses are not iterated further.
+    Args:
+        Y (np.ndarray): The responses, one row per response (k x n) or a single response (n,).
+        design (DomainDesign): The design and domain structure shared by all responses.
+        method (str): "REML" or "ML".
+        MAXITER (int): The maximum number of Fisher scoring iterations.
+        PRECISION (float): The relative convergence tolerance.
+    Returns:
+        dict: Arrays over the k responses: beta (k x p), cov (k x p x p, covariance of beta),
+              sigma_u2 (k,), sigma_e2 (k,), loglike (k,), iterations (k,) and convergence (k,).
+    """
+
+    if method not in METHODS:
+        raise ValueError("method must be 'REML' or 'ML'.")
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    X = design.X
+    n, p = X.shape
+    if Y.shape[1] != n:
+        raise ValueError("Every response needs one value per unit.")
+    if np.isnan(Y).any() or np.isnan(X).any():
+        raise ValueError("The data cannot contain missing values.")
+    if np.linalg.matrix_rank(X) < p or n <= p:
+        raise ValueError("The auxiliary variables are linearly dependent or there are too few units.")
+
+    ols = np.linalg.lstsq(X, Y.T, rcond=None)[0]
+    start = np.sum((Y - ols.T @ X.T) ** 2, axis=1) / (n - p) / 2
+    theta = np.column_stack([start, start])
+    k = len(Y)
+    iterations = np.zeros(k, dtype=int)
+    convergence = np.zeros(k, dtype=bool)
+    active = np.arange(k)
+    for _ in range(MAXITER):
+        if len(active) == 0:
+            break
+        score, information, *_ = _nested_terms(Y[active], design, theta[active], method)
+        new = theta[active] + np.linalg.solve(information, score[:, :, np.newaxis])[:, :, 0]
+        new[:, 0] = np.maximum(new[:, 0], 0)
+        new[:, 1] = np.maximum(new[:, 1], 1e-10 * start[active])
+        change = np.max(np.abs(new - theta[active]), axis=1) / np.sum(theta[active], axis=1)
+        theta[active] = new
+        iterations[active] += 1
+        done = change < PRECISION
+        convergence[active[done]] = True
+        active = active[~done]
+
+    _, _, beta, cov, loglike = _nested_terms(Y, design, theta, method)
+    return {
+        "beta": beta,
+        "cov": cov,
+        "sigma_u2": theta[:, 0],
+        "sigma_e2": theta[:, 1],
+        "loglike": loglike,
+        "iterations": iterations,
+        "convergence": convergence,
+    }
+
+
+def domain_means(design, Y, fit, pos, Ni, meanx):
+    """
+    EBLUP of the population mean of the selected domains for every fitted response.
+    A sampled domain gets (n_d ybar_d + (N_d Xbar_d - n_d xbar_d)' beta + (N_d - n_d) u_d) / N_d,
+    with u_d = gamma_d (ybar_d - xbar_d' beta) and gamma_d = sigma_u2 / (sigma_u2 + sigma_e2 / n_d);
+    a domain without sample gets the synthetic Xbar_d' beta.
+    Args:
+        design (DomainDesign): The design and domain structure.
+        Y (np.ndarray): The responses (k x n).
+        fit (dict): The result of `fit_nested_error` for Y.
+        pos (np.ndarray): The domain code of each selected domain, -1 without sample (I,).
+        Ni (np.ndarray): The population size of each selected domain (I,).
+        meanx (np.ndarray): The population means of the design columns of each selected domain (I x p).
+    Returns:
+        np.ndarray: The EBLUP of each response and selected domain (k x I).
+    """
+
+    nd = design.nd
+    beta = fit["beta"]
+    sampled = pos >= 0
+    codes = np.where(sampled, pos, 0)
+    ybar = design.group_sum(Y) / nd
+    xbar_beta = beta @ (design.sx / nd[:, np.newaxis]).T
+    sigma_u2, sigma_e2 = fit["sigma_u2"][:, np.newaxis], fit["sigma_e2"][:, np.newaxis]
+    gamma = nd * sigma_u2 / (sigma_e2 + nd * sigma_u2)
+    u = gamma * (ybar - xbar_beta)
+    n_sel = np.where(sampled, nd[codes], 0)
+    estimate = (
+        n_sel * ybar[:, codes] + Ni * (beta @ meanx.T) - n_sel * xbar_beta[:, codes] + (Ni - n_sel) * u[:, codes]
+    ) / Ni
+    return np.where(sampled, estimate, beta @ meanx.T)
+
+
+def eblupBHF(y, X, dom, selectdom, meanx, Ni, method="REML", MAXITER=100, PRECISION=1e-4):
+    """
+    EBLUP of domain means under the Battese-Harter-Fuller nested error model, in NumPy.
+    Args:
+        y (np.ndarray): The response of each sampled unit (n,).
+        X (np.ndarray): The unit level design matrix, including the intercept column (n x p).
+        dom (array-like): The domain of each sampled unit (n,).
+        selectdom (array-like): The domains to estimate.
+        meanx (np.ndarray): The population means of the design columns of each selected domain (I x p).
+        Ni (np.ndarray): The population size of each selected domain (I,).
+        method (str): "REML" or "ML".
+        MAXITER (int): The maximum number of Fisher scoring iterations.
+        PRECISION (float): The relative convergence tolerance.
+    Returns:
+        dict: {"eblup": {"domain", "eblup", "sampsize"}, "fit": {"method", "convergence", "iterations",
+              "estcoef": {"beta", "std.error", "tvalue", "pvalue"}, "refvar", "errorvar", "loglike"},
+              "design", "pos"}; the last two are reused by the bootstrap.
+    """
+
+    levels, codes, nd = domain_codes(dom)
+    design = DomainDesign(X, codes, nd)
+    selectdom = np.asarray(selectdom)
+    pos = np.searchsorted(levels, selectdom)
+    pos = np.where((pos < len(levels)) & (levels[np.minimum(pos, len(levels) - 1)] == selectdom), pos, -1)
+    meanx = np.asarray(meanx, dtype=float)
+    Ni = np.asarray(Ni, dtype=float)
+
+    fit = fit_nested_error(y, design, method, MAXITER, PRECISION)
+    eblup = domain_means(design, np.atleast_2d(y), fit, pos, Ni, meanx)[0]
+    beta = fit["beta"][0]
+    std_error = np.sqrt(np.diag(fit["cov"][0]))
+    tvalue = beta / std_error
+    return {
+        "eblup": {
+            "domain": selectdom,
+            "eblup": eblup,
+            "sampsize": np.where(pos >= 0, nd[np.maximum(pos, 0)], 0),
+        },
+        "fit": {
+            "method": method,
+            "convergence": bool(fit["convergence"][0]),
+            "iterations": int(fit["iterations"][0]),
+            "estcoef": {
+                "beta": beta,
+                "std.error": std_error,
+                "tvalue": tvalue,
+                "pvalue": np.array([math.erfc(abs(t) / math.sqrt(2)) for t in tvalue]),
+            },
+            "refvar": float(fit["sigma_u2"][0]),
+            "errorvar": float(fit["sigma_e2"][0]),
+            "loglike": float(fit["loglike"][0]),
+        },
+        "design": design,
+        "pos": pos,
+    }
+
+
+@dataclass
+class BootstrapSetup:
+    """
+    Everything a parametric bootstrap replicate of the BHF model needs, as plain arrays.
+    Attributes:
+        X (np.ndarray): The unit level design matrix (n x p).
+        beta (np.ndarray): The fitted regression coefficients (p,).
+        codes (np.ndarray): The domain code of each unit (n,), see `domain_codes`.
+        nd (np.ndarray): The sample size of each domain (D,).
+        pos (np.ndarray): The domain code of each selected domain, -1 for a domain without sample (I,).
+        Ni (np.ndarray): The population size of each selected domain (I,).
+        meanx (np.ndarray): The population means of the auxiliary variables of each selected domain (I x p).
+        sigma_u2 (float): The random effect variance.
+        sigma_e2 (float): The unit level error variance.
+        method (str): The fitting method of the replicates, "REML" or "ML".
+    """
+
+    X: np.ndarray
+    beta: np.ndarray
+    codes: np.ndarray
+    nd: np.ndarray
+    pos: np.ndarray
+    Ni: np.ndarray
+    meanx: np.ndarray
+    sigma_u2: float
+    sigma_e2: float
+    method: str = "REML"
+
+    def __post_init__(self):
+        self.design = DomainDesign(self.X, self.codes, self.nd)
+        self.Xbeta = self.X @ self.beta
+        self.mud = self.meanx @ self.beta
+        self.sampled = self.pos >= 0
+        self.nd_selected = np.where(self.sampled, self.nd[np.maximum(self.pos, 0)], 0)
+        self.rd = self.Ni - self.nd_selected
+
+    @property
+    def n(self):
+        return self.X.shape[0]
+
+    @property
+    def D(self):
+        return len(self.nd)
+
+
+def bootstrap_shards(B, seed=None, size=BOOTSTRAP_SHARD_REPLICATES):
+    """
+    Splits B bootstrap replicates into independent shards of at most `size` replicates.
+    Every shard gets its own seed spawned from `seed`. The shards only depend on the seed, B
+    and the shard size (never on the number of processes running them), so running them in
+    parallel and adding their results in shard order gives exactly the serial result.
+    Args:
+        B (int): The number of bootstrap replicates.
+        seed (int or np.random.SeedSequence, optional): The seed of the bootstrap.
+        size (int): The maximum number of replicates per shard.
+    Returns:
+        list: (number of replicates, np.random.SeedSequence) pairs, one per shard.
+    """
+
+    size = max(1, min(B, size))
+    sizes = [size] * (B // size) + ([B % size] if B % size else [])
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return list(zip(sizes, root.spawn(len(sizes))))
+
+
+def r_seed(seed_sequence):
+    """Derives an integer accepted by R's `set.seed` from a shard seed."""
+    return int(seed_sequence.generate_state(1)[0] % (2 ** 31 - 1))
+
+
+def bootstrap_chunks(B, n, seed=None, chunk_elements=BOOTSTRAP_CHUNK_ELEMENTS):
+    """
+    Splits B bootstrap replicates into shards holding at most about `chunk_elements` simulated units.
+    Args:
+        B (int): The number of bootstrap replicates.
+        n (int): The number of sampled units.
+        seed (int or np.random.SeedSequence, optional): The seed of the bootstrap.
+        chunk_elements (int): The target number of simulated values per chunk.
+    Returns:
+        list: (number of replicates, np.random.SeedSequence) pairs, one per chunk (see `bootstrap_shards`).
+    """
+
+    return bootstrap_shards(B, seed, min(BOOTSTRAP_SHARD_REPLICATES, chunk_elements // max(n, 1)))
+
+
+def bootstrap_chunk(setup, size, seed):
+    """
+    Runs `size` parametric bootstrap replicates at once.
+    All replicates of the chunk are drawn as (size, n) and (size, D) arrays, the domain means of
+    the unit errors are group sums computed with one bincount, and the model of every replicate is
+    refitted by `fit_nested_error` with all replicates of the chunk iterated together.
+    Args:
+        setup (BootstrapSetup): The fitted model and domain information.
+        size (int): The number of replicates.
+        seed (np.random.SeedSequence): The seed of the chunk.
+    Returns:
+        np.ndarray: The sum over the replicates of the squared errors of each selected domain (I,).
+    """
+
+    rng = np.random.default_rng(seed)
+    n, D, I = setup.n, setup.D, len(setup.pos)
+    pos = np.maximum(setup.pos, 0)
+
+    ud = rng.normal(0, np.sqrt(setup.sigma_u2), size=(size, D))
+    esd = rng.normal(0, np.sqrt(setup.sigma_e2), size=(size, n))
+    ys = setup.Xbeta + ud[:, setup.codes] + esd
+
+    esd_mean = setup.design.group_sum(esd) / setup.nd
+
+    rd = setup.rd
+    with np.errstate(divide="ignore", invalid="ignore"):
+        erd_sd = np.where(rd > 0, np.sqrt(setup.sigma_e2 / rd), 0.0)
+    erd_mean = rng.normal(0, 1, size=(size, I)) * erd_sd
+    ed_mean = esd_mean[:, pos] * setup.nd_selected / setup.Ni + erd_mean * rd / setup.Ni
+    u_selected = ud[:, pos]
+    if not setup.sampled.all():
+        u_selected[:, ~setup.sampled] = rng.normal(0, np.sqrt(setup.sigma_u2), size=(size, int(np.sum(~setup.sampled))))
+    true_mean = setup.mud + u_selected + ed_mean
+
+    fit = fit_nested_error(ys, setup.design, setup.method)
+    mean_EB = domain_means(setup.design, ys, fit, setup.pos, setup.Ni, setup.meanx)
+    return np.sum((mean_EB - true_mean) ** 2, axis=0)
+
+
+_worker_setup = None
+
+
+def _init_worker(setup):
+    global _worker_setup
+    _worker_setup = setup
+
+
+def _run_chunk(chunk):
+    size, seed = chunk
+    return bootstrap_chunk(_worker_setup, size, seed)
+
+
+def bootstrap_mse(setup, B, seed=None, chunk_elements=BOOTSTRAP_CHUNK_ELEMENTS, workers=None):
+    """
+    Parametric bootstrap MSE of the selected domain means, computed chunk by chunk.
+    Memory is bounded by the chunk size and the runtime grows linearly with B. With several
+    workers the chunks run in a process pool (the setup is sent once to each process); the
+    chunk totals are added in chunk order, so the result is identical to a serial run.
+    Args:
+        setup (BootstrapSetup): The fitted model and domain information.
+        B (int): The number of bootstrap replicates.
+        seed (int, optional): The seed of the bootstrap.
+        chunk_elements (int): The target number of simulated values per chunk.
+        workers (int, optional): The number of processes. Default runs serially.
+    Returns:
+        np.ndarray: The bootstrap MSE of each selected domain (I,).
+    """
+
+    chunks = bootstrap_chunks(B, setup.n, seed, chunk_elements)
+    total = np.zeros(len(setup.pos))
+    if workers is None or workers <= 1 or len(chunks) <= 1:
+        for size, chunk_seed in chunks:
+            total += bootstrap_chunk(setup, size, chunk_seed)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                 initializer=_init_worker, initargs=(setup,)) as executor:
+            for chunk_total in executor.map(_run_chunk, chunks):
+                total += chunk_total
+    return total / B
+
+
+def pbmseBHF(y, X, dom, selectdom, meanx, Ni, B=200, method="REML", MAXITER=100, PRECISION=1e-4,
+             seed=None, workers=None):
+    """
+    EBLUP of domain means under the BHF model and their parametric bootstrap MSE, in NumPy.
+    The model is fitted by `eblupBHF`; the B bootstrap replicates are simulated from the fit and
+    refitted chunk by chunk by `bootstrap_mse`.
+    Args:
+        See `eblupBHF`; B, seed and workers are passed to `bootstrap_mse`.
+    Returns:
+        dict: {"est": the `eblupBHF` result, "mse": the bootstrap MSE of each selected domain (I,)}.
+    """
+
+    est = eblupBHF(y, X, dom, selectdom, meanx, Ni, method, MAXITER, PRECISION)
+    design = est["design"]
+    setup = BootstrapSetup(
+        X=design.X,
+        beta=est["fit"]["estcoef"]["beta"],
+        codes=design.codes,
+        nd=design.nd,
+        pos=est["pos"],
+        Ni=np.asarray(Ni, dtype=float),
+        meanx=np.asarray(meanx, dtype=float),
+        sigma_u2=est["fit"]["refvar"],
+        sigma_e2=est["fit"]["errorvar"],
+        method=method,
+    )
+    return {"est": est, "mse": bootstrap_mse(setup, B, seed=seed, workers=workers)}
@@ -1,43 +1,12 @@
 import polars as pl
 from PyQt6.QtWidgets import QMessageBox
 from service.modelling.running_model.convert_df import convert_df
+from service.utils.r_frame import collect_for_script
+from service.modelling.running_model.r_results import PROJECTION_BUNDLE, PROJECTION_TABLES, projection_results, r_bundle, r_cleanup
+from service.utils.r_worker_pool import RJob, r_worker_pool
 from rpy2.rinterface_lib.embedded import RRuntimeError
 
 
-def extract_output2_results(output):
-    """
-    Extracts results from the given output2 string and returns it as a dictionary.
-    """
-    import re
-
-    # Extract formula
-    formula_match = re.search(r"formula\s*=\s*(.+)", output)
-    if formula_match:
-        formula = formula_match.group(1).strip()
-    else:
-        formula = "No formula found"
-
-    # Extract coefficients
-    coefficients_match = re.search(r'Coefficients:\s+((?:.+\n)+)', output, re.S)
-    if coefficients_match:
-        coefficients = coefficients_match.group(1).strip()
-        rows = coefficients.split('\n')
-        
-        # Process header and data rows
-        header = rows[0].split()
-        data = [row.split() for row in rows[1:] if row.strip()]
-        
-        # Ensure all rows have the same number of columns as the header
-        max_columns = len(header)
-        data = [row + [None] * (max_columns - len(row)) for row in data]
-        
-        # Convert to Polars DataFrame
-        coeff = pl.DataFrame(data, schema=header, orient="row")
-    else:
-        coeff = pl.DataFrame()
-
-    return formula, coeff
-
 def run_model_projection(parent):
     """
     Runs the model projection using R scripts and returns the results.
@@ -51,8 +20,8 @@ def run_model_projection(parent):
     """
     
     import rpy2.robjects as ro
-    df = parent.model1.get_data()
-    convert_df(df, parent)
+    df = collect_for_script(parent.model1.scan(), parent.r_script, drop=None, frame_name="data_pe")
+    convert_df(df, parent, parent.r_script, "data_pe")
     result = ""
     error = False
     try:
@@ -65,31 +34,49 @@ def run_model_projection(parent):
             result = str(e)
             error = True
             return result, error, None
-        ro.r('summary_pe <- model_pe$model \n pred_pe <-model_pe$prediction')
-        summary = ro.globalenv['summary_pe']
-        formula, coeff = extract_output2_results(str(summary))
-        pred = ro.conversion.rpy2py(ro.globalenv['pred_pe'])
-        pred = [float(value) for value in pred]
-        pred_df = pl.DataFrame({
-            "Index": range(1, len(pred) + 1),
-            "Value": pred
-        })
-        results = {
-            'Model': "Projection Estimation",
-            'Formula of Modelling': formula,
-            'Coefficients of Modelling': coeff,
-            'Prediction': pred_df
-        }
-        ro.r('projection_pe <- model_pe$projection')
-        proj = ro.conversion.rpy2py(ro.globalenv['projection_pe'])
-        df = pl.from_pandas(proj)
+        ro.r(PROJECTION_BUNDLE)
+        results, df = projection_results(r_bundle(PROJECTION_TABLES))
         error = False
-        ro.r("rm(data_pe, model_pe, summary_pe, pred_pe, projection_pe)")
-        ro.r("gc()")  # Clear R memory
+        r_cleanup(["data_pe", "model_pe", "projection_fit", "projection_coef", *PROJECTION_TABLES])
         return results, error, df
         
     except Exception as e:
         if hasattr(parent, 'log_exception'):
             parent.log_exception(e, "Run Model Projection")
         error = True
-        return str(e), error, None
\ No newline at end of file
+        return str(e), error, None
+
+def run_model_projection_worker(parent):
+    """
+    Runs the model projection in a process of the R worker pool instead of the embedded R interpreter.
+    The data is shipped to the worker as an Arrow IPC file and the tables of `PROJECTION_BUNDLE` come
+    back as Arrow tables, so the run does not hold the embedded R lock.
+    Parameters:
+    parent (object): The parent object with `model1.scan()` and `r_script`, as for `run_model_projection`.
+                     The submitted job is stored in `parent.job` so it can be cancelled, and the lines
+                     printed by the worker are passed to `parent.on_output` (the console of the dialog) if set.
+    Returns:
+    tuple: The same (result, error, df) tuple as `run_model_projection`.
+    """
+    
+    try:
+        df = collect_for_script(parent.model1.scan(), parent.r_script, drop=None, frame_name="data_pe")
+        parent.job = RJob(
+            script="suppressMessages(library(sae.projection))\n" + parent.r_script + "\n" + PROJECTION_BUNDLE,
+            inputs={"data_pe": df},
+            outputs=PROJECTION_TABLES,
+            on_output=getattr(parent, "on_output", None),
+        )
+        job_result = r_worker_pool.run(parent.job)
+        if job_result.error is not None:
+            if hasattr(parent, 'log_exception'):
+                parent.log_exception(RuntimeError(job_result.error), "Run Model Projection")
+            return job_result.error, True, None
+        
+        results, df = projection_results(job_result.outputs)
+        return results, False, df
+    
+    except Exception as e:
+        if hasattr(parent, 'log_exception'):
+            parent.log_exception(e, "Run Model Projection")
+        return str(e), True, None
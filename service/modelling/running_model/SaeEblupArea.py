@@ -2,6 +2,9 @@ import polars as pl
 from PyQt6.QtWidgets import QMessageBox
 from rpy2.rinterface_lib.embedded import RRuntimeError
 from service.modelling.running_model.convert_df import convert_df
+from service.utils.r_frame import collect_for_script
+from service.modelling.running_model.r_results import AREA_BUNDLE, AREA_TABLES, area_results, r_bundle, r_cleanup
+from service.utils.r_worker_pool import RJob, r_worker_pool
 
 def run_model_eblup_area(parent):
     """
@@ -10,7 +13,7 @@ def run_model_eblup_area(parent):
     parent (object): The parent object that contains necessary methods and attributes for running the model.
                      It should have the following methods and attributes:
                      - activate_R(): Method to activate R environment.
-                     - model1.get_data(): Method to get the data for the model.
+                     - model1.scan(): Method to get the data for the model as a LazyFrame.
                      - r_script: An R script to be executed.
     Returns:
     tuple: A tuple containing:
@@ -20,12 +23,11 @@ def run_model_eblup_area(parent):
     """
     
     import rpy2.robjects as ro
-    df = parent.model1.get_data()
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
     result = ""
     error = False
-    convert_df(df, parent)
     try:
+        df = collect_for_script(parent.model1.scan(), parent.r_script)
+        convert_df(df, parent, parent.r_script)
         ro.r('data <- as.data.frame(r_df)')
         try:
             ro.r(parent.r_script)  # Menjalankan skrip R
@@ -35,51 +37,50 @@ def run_model_eblup_area(parent):
             result = str(e)
             error = True
             return result, error, None
-        ro.r('estimated_value <- model$est$eblup\n mse <- model$mse \n method <- model$est$fit$method \n convergence<-model$est$fit$convergence \n iterations <- model$est$fit$iterations \n refvar <- model$est$fit$refvar \n goodness <-model$est$fit$goodness')
-        method = ro.globalenv['method']
-        convergence = ro.globalenv['convergence']
-        if isinstance(convergence, ro.vectors.BoolVector):
-            convergence = "Yes" if bool(convergence[0]) else "NO"
-        else:
-            convergence = "Not Converged"
-        itteration = ro.globalenv['iterations']
-        itteration = int(float(itteration[0]))
-        refvar = ro.globalenv['refvar']
-        refvar = str(float(refvar[0]))
-        goodness_r = ro.conversion.rpy2py(ro.globalenv['goodness'])
-        goodness = pl.DataFrame({
-            'Logarithmic Likelihood': [goodness_r[0]],
-            'Akaike Information Criterion ( AIC )': [goodness_r[1]],
-            'Bayesian Information Criterion (BIC)': [goodness_r[2]],
-            'Kullback Information Criterion (KIC)': [goodness_r[3]],
-        })
-        
-        results = {
-            "Model": "EBLUP Area Level",
-            "Method": method,
-            "Convergence": convergence,
-            "Number of Iterations Performed by The Fisher-scoring Algorithm": itteration,
-            "Random Effect Variance": refvar,
-            "Goodness of Fit Models": goodness
-        }
-        
-        estimated_value = ro.conversion.rpy2py(ro.globalenv['estimated_value'])
-        mse = ro.conversion.rpy2py(ro.globalenv['mse'])
-        vardir_var = ro.conversion.rpy2py(ro.globalenv['vardir_var'])
-        estimated_value = estimated_value.flatten()
-        vardir_var = vardir_var.to_numpy()[:, 0]
-        rse = abs(mse**0.5/estimated_value*100)
-        df = pl.DataFrame({
-            'Eblup': estimated_value,
-            'MSE': mse,
-            'RSE (%)': rse})
+        ro.r(AREA_BUNDLE)
+        results, df = area_results(r_bundle(AREA_TABLES))
         error = False
-        ro.r('rm(data, model, estimated_value, mse, method, convergence, iterations, refvar, goodness)')
-        ro.r("gc()")  # Clear R memory
+        r_cleanup(["data", "model", *AREA_TABLES])
         return results, error, df
         
     except Exception as e:
         if hasattr(parent, 'log_exception'):
             parent.log_exception(e, "Run Model EBLUP Area")
         error = True
-        return str(e), error, None
\ No newline at end of file
+        return str(e), error, None
+
+def run_model_eblup_area_worker(parent):
+    """
+    Runs the EBLUP area model in a process of the R worker pool instead of the embedded R interpreter.
+    The data is shipped to the worker as an Arrow IPC file and the estimates, fit information and
+    goodness of fit come back as Arrow tables, so the run does not hold the embedded R lock and can
+    proceed in parallel with other R jobs.
+    Parameters:
+    parent (object): The parent object with `model1.scan()` and `r_script`, as for `run_model_eblup_area`.
+                     The submitted job is stored in `parent.job` so it can be cancelled, and the lines
+                     printed by the worker are passed to `parent.on_output` (the console of the dialog) if set.
+    Returns:
+    tuple: The same (result, error, df) tuple as `run_model_eblup_area`.
+    """
+    
+    try:
+        df = collect_for_script(parent.model1.scan(), parent.r_script)
+        parent.job = RJob(
+            script=parent.r_script + "\n" + AREA_BUNDLE,
+            inputs={"data": df},
+            outputs=AREA_TABLES,
+            on_output=getattr(parent, "on_output", None),
+        )
+        job_result = r_worker_pool.run(parent.job)
+        if job_result.error is not None:
+            if hasattr(parent, 'log_exception'):
+                parent.log_exception(RuntimeError(job_result.error), "Run Model EBLUP Area")
+            return job_result.error, True, None
+        
+        results, df = area_results(job_result.outputs)
+        return results, False, df
+    
+    except Exception as e:
+        if hasattr(parent, 'log_exception'):
+            parent.log_exception(e, "Run Model EBLUP Area")
+        return str(e), True, None
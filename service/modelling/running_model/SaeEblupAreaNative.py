@@ -0,0 +1,95 @@
+import polars as pl
+from service.modelling.native.FayHerriot import design_matrix_batch, mseFH_batch
+
+def run_model_eblup_area_native(parent):
+    """
+    Runs the EBLUP area model with the native NumPy Fay-Herriot engine instead of R.
+    The model is built from the variables selected in the dialog (the R script is not used),
+    so the run needs no R session, data conversion or output parsing.
+    When several variables of interest are selected, the i-th variable of interest is paired
+    with the i-th direct variance and all of them are fitted in one pass with the same
+    auxiliary variables (see `mseFH_batch`).
+    Parameters:
+    parent (object): The parent object with `model1.scan()` and the dialog selections
+                     `of_interest_var`, `auxilary_vars`, `vardir_var`, `as_factor_var` and `method`.
+                     Only the selected columns are read from the scan, so a large file opened lazily
+                     is never read whole.
+    Returns:
+    tuple: The same (result, error, df) tuple as `run_model_eblup_area`. With several variables of
+           interest, the result holds one row of fit information per variable and df stacks the
+           Eblup, MSE and RSE (%) of every variable, identified by a 'Variable' column.
+    """
+    
+    def column(var):
+        return var.split(" [")[0]
+    
+    try:
+        if not parent.of_interest_var or not parent.vardir_var:
+            raise ValueError("Variable of interest and Varians Direct cannot be empty.")
+        if len(parent.of_interest_var) != len(parent.vardir_var):
+            raise ValueError("Each variable of interest needs its own Varians Direct.")
+        pairs = [(column(y), column(vardir)) for y, vardir in zip(parent.of_interest_var, parent.vardir_var)]
+        auxiliary = [column(var) for var in parent.auxilary_vars]
+        factors = [column(var) for var in parent.as_factor_var]
+        selected = list(dict.fromkeys([name for pair in pairs for name in pair] + auxiliary + factors))
+        df = parent.model1.scan().select(selected).filter(~pl.all_horizontal(pl.all().is_null())).collect()
+        Y, X, Vardir, _ = design_matrix_batch(df, pairs, auxiliary, factors)
+        models = mseFH_batch(Y, X, Vardir, method=parent.method)
+        not_converged = [y for (y, _), model in zip(pairs, models) if model["mse"] is None]
+        if not_converged:
+            raise ValueError(f"The fitting method does not converge: {', '.join(not_converged)}")
+        
+        estimates = [
+            pl.DataFrame({
+                'Eblup': model["est"]["eblup"],
+                'MSE': model["mse"],
+            }).with_columns(
+                (pl.col('MSE').sqrt() / pl.col('Eblup') * 100).abs().alias('RSE (%)')
+            )
+            for model in models
+        ]
+        
+        if len(models) == 1:
+            fit = models[0]["est"]["fit"]
+            goodness = pl.DataFrame({
+                'Logarithmic Likelihood': [fit["goodness"]["loglike"]],
+                'Akaike Information Criterion ( AIC )': [fit["goodness"]["AIC"]],
+                'Bayesian Information Criterion (BIC)': [fit["goodness"]["BIC"]],
+                'Kullback Information Criterion (KIC)': [fit["goodness"]["KIC"]],
+            })
+            results = {
+                "Model": "EBLUP Area Level",
+                "Method": fit["method"],
+                "Convergence": "Yes" if fit["convergence"] else "NO",
+                "Number of Iterations Performed by The Fisher-scoring Algorithm": int(fit["iterations"]),
+                "Random Effect Variance": str(float(fit["refvar"])),
+                "Goodness of Fit Models": goodness
+            }
+            return results, False, estimates[0]
+        
+        fits = [model["est"]["fit"] for model in models]
+        summary = pl.DataFrame({
+            'Variable': [y for y, _ in pairs],
+            'Convergence': ["Yes" if fit["convergence"] else "NO" for fit in fits],
+            'Iterations': [int(fit["iterations"]) for fit in fits],
+            'Random Effect Variance': [float(fit["refvar"]) for fit in fits],
+            'Logarithmic Likelihood': [fit["goodness"]["loglike"] for fit in fits],
+            'Akaike Information Criterion ( AIC )': [fit["goodness"]["AIC"] for fit in fits],
+            'Bayesian Information Criterion (BIC)': [fit["goodness"]["BIC"] for fit in fits],
+            'Kullback Information Criterion (KIC)': [fit["goodness"]["KIC"] for fit in fits],
+        })
+        results = {
+            "Model": "EBLUP Area Level (Multiple Variables of Interest)",
+            "Method": parent.method,
+            "Model Fit": summary
+        }
+        df = pl.concat([
+            estimate.select(pl.lit(y).alias('Variable'), pl.all())
+            for (y, _), estimate in zip(pairs, estimates)
+        ])
+        return results, False, df
+    
+    except Exception as e:
+        if hasattr(parent, 'log_exception'):
+            parent.log_exception(e, "Run Model EBLUP Area")
+        return str(e), True, None
@@ -1,117 +1,35 @@
+import numpy as np
 import polars as pl
-from PyQt6.QtWidgets import QMessageBox
 from service.modelling.running_model.convert_df import convert_df
+from service.utils.r_frame import collect_for_script
+from service.modelling.running_model.r_results import UNIT_BUNDLE, UNIT_TABLES, r_bundle, r_cleanup, unit_estimates, unit_results
+from service.modelling.native.BatteseHarterFuller import bootstrap_shards, r_seed
+from service.utils.r_worker_pool import RJob, r_worker_pool
 from rpy2.rinterface_lib.embedded import RRuntimeError
 
-def extract_formatted(output):
-    import re
-    # Fungsi untuk mengekstrak metode
-    def extract_method(output):
-        match = re.search(r'Linear mixed model fit by (.*?)\s+(\[.*?\])', output)
-        return f"Linear mixed model fit by {match.group(1).strip()} {match.group(2).strip()}" if match else None
-
-    # Fungsi untuk mengekstrak formula
-    def extract_formula(output):
-        match = re.search(r'Formula:\s+(.*?)\s+REML criterion', output)
-        return match.group(1).strip() if match else None
-
-    # Fungsi untuk mengekstrak metode dan kriterianya
-    def extract_criterion(output):
-        match = re.search(r'criterion at convergence:\s+([\d.-]+)', output)
-        return float(match.group(1)) if match else None
-
-    # Fungsi untuk mengekstrak jumlah observasi
-    def number_of_obs(output):
-        match = re.search(r'Number of obs:\s+(\d+)', output)
-        return int(match.group(1)) if match else None
-
-    # Fungsi untuk mengekstrak kelompok
-    def extract_groups(output):
-        match = re.search(r'Number of obs:\s+(\d+),\s+groups:\s+(.*?),\s+(\d+)', output)
-        return f"Number of obs: {match.group(1)}, groups: {match.group(2)}, {match.group(3)}" if match else None
-
-    # Fungsi untuk mengekstrak dataframe antara Scaled residuals dan Random effects
-    def extract_summary(output):
-        match = re.search(r'Scaled residuals:\s+(.*?)\s+Random effects:', output, re.S)
-        if match:
-            dataframe = match.group(1).strip()
-            rows = dataframe.split('\n')
-            data = [row.split(maxsplit=5) for row in rows if row.strip()]
-            max_columns = 4
-            data = [row + [None] * (max_columns - len(row)) for row in data]
-            df = pl.DataFrame(data, schema=["Statistic", "Value"])
-            df = df.with_columns([
-                    pl.col("Statistic").replace(
-                        ["Min", "1Q", "Median", "3Q", "Max"],
-                        ["Minimum", "Quartil 1", "Median", "Quartil 3", "Maximum"]
-                    ).alias("Statistic"),
-                    pl.col("Value").cast(pl.Float64).alias("Value")
-                ])
-            return df
-        return None
-
-    # Fungsi untuk mengekstrak bagian Fixed effects
-    def extract_fixed_effects(output):
-        match = re.search(r'Fixed effects:\s+(.*?)\s+Correlation of Fixed Effects:', output, re.S)
-        if match:
-            dataframe = match.group(1).strip()
-            rows = dataframe.split('\n')
-            data = [row.split(maxsplit=4) for row in rows[1:] if row.strip()]
-            df = pl.DataFrame(data, schema=["Effect", "Estimate", "Standard Error", "t-value"], orient="row")
-            return df.with_columns([
-                pl.col("Estimate").cast(pl.Float64).alias("Estimate"),
-                pl.col("Standard Error").cast(pl.Float64).alias("Standard Error"),
-                pl.col("t-value").cast(pl.Float64).alias("t-value")
-            ])
-        return None
-
-    # Fungsi untuk mengekstrak bagian Random effects
-    def extract_random_effects(output):
-        match = re.search(r'Random effects:\s+(.*?)\s+Number of obs:', output, re.S)
-        if match:
-            dataframe = match.group(1).strip()
-            rows = dataframe.split('\n')
-            data = []
-            for row in rows[1:]:
-                if row.strip():
-                    parts = row.split()
-                    if len(parts) >= 4:
-                        group, name, variance, std_dev = parts[0], parts[1], parts[-2], parts[-1]
-                    else:
-                        group, name, variance, std_dev = parts[0], None, parts[-2], parts[-1]
-                    data.append([group, name, float(variance), float(std_dev)])
-            return pl.DataFrame(data, schema=["Group", "Name", "Variance", "Standard Deviation"], orient="row")
-        return None
-
-    # Fungsi untuk mengekstrak bagian Correlation of Fixed Effects
-    def correlation_fixed_effects(output):
-        match = re.search(r'Correlation of Fixed Effects:\s+(.*?)\s+boundary', output, re.S)
-        if match:
-            dataframe = match.group(1).strip()
-            rows = dataframe.split('\n')
-            data = [row.split() for row in rows if row.strip()]
-            data[0].insert(0, '')
-            header = data[0]
-            data = data[1:]
-            max_columns = len(header)
-            data = [row + [None] * (max_columns - len(row)) for row in data]
-            return pl.DataFrame(data, schema=header, orient="row")
-        return None
-
-    # Menggabungkan hasil ekstraksi menjadi string yang user-friendly
-    results = {
-        "Model": "EBLUP Unit Level",
-        "Method": extract_method(output),
-        "Formula": extract_formula(output),
-        "Criterion of Convergence": extract_criterion(output),
-        "Number of Observation": number_of_obs(output),
-        "Groups": extract_groups(output),
-        "Summary of Modelling": extract_summary(output),
-        "Fixed Effects": extract_fixed_effects(output),
-        "Random Effects": extract_random_effects(output),
-        "Correlation of Fixed Effect": correlation_fixed_effects(output)
-    }
-    return results
+def bootstrap_shard_script(r_script, size, seed):
+    """
+    Builds the script of one seeded bootstrap shard of `size` replicates from a unit level R script.
+    The script is left as written: pbmseBHF is masked by a function calling sae::pbmseBHF with the
+    arguments of the script (matched as R would, so a positional or default B is handled too) and
+    B set to `size`, however the script sets it.
+    Args:
+        r_script (str): The R script calling pbmseBHF.
+        size (int): The number of bootstrap replicates of the shard.
+        seed (int): The R seed of the shard.
+    Returns:
+        str: The script of the shard.
+    """
+    
+    shard_call = (
+        'pbmseBHF <- function(...) {\n'
+        '    call <- match.call(sae::pbmseBHF)\n'
+        '    call[[1]] <- quote(sae::pbmseBHF)\n'
+        f'    call$B <- {int(size)}L\n'
+        '    eval(call, parent.frame())\n'
+        '}\n'
+    )
+    return f'set.seed({seed})\n{shard_call}{r_script}\n{UNIT_BUNDLE}'
 
 def run_model_eblup_unit(parent):
     """
@@ -120,7 +38,7 @@ def run_model_eblup_unit(parent):
     parent (object): An object that contains the necessary methods and attributes to run the model.
                      It should have the following methods and attributes:
                      - activate_R(): Method to activate the R environment.
-                     - model1.get_data(): Method to get the data for the model.
+                     - model1.scan(): Method to get the data for the model as a LazyFrame.
                      - r_script: An R script to be executed.
     Returns:
     tuple: A tuple containing:
@@ -131,12 +49,11 @@ def run_model_eblup_unit(parent):
     """
     
     import rpy2.robjects as ro
-    df = parent.model1.get_data()
-    df = df.filter(~pl.all_horizontal(pl.all().is_null()))
-    convert_df(df, parent)
     result = ""
     error = False
     try:
+        df = collect_for_script(parent.model1.scan(), parent.r_script, frame_name="data_unit")
+        convert_df(df, parent, parent.r_script, "data_unit")
         ro.r('data_unit <- as.data.frame(r_df)')
         try:
             ro.r(parent.r_script)  # Menjalankan skrip R
@@ -146,29 +63,68 @@ def run_model_eblup_unit(parent):
             result = str(e)
             error = True
             return result, error, None
-        ro.r('domain_unit <- model_unit$est$eblup$domain\n estimated_value_unit <- model_unit$est$eblup$eblup\n n_size_unit <- model_unit$est$eblup$sampsize \n mse_unit <- model_unit$mse$mse')
-        result_str = ro.r('model_unit$est$fit$summary')
-        result = str(result_str)
-        results = extract_formatted(result)
-        domain = ro.r('domain_unit')
-        estimated_value = ro.r('estimated_value_unit')
-        n_size = ro.r('n_size_unit')
-        mse = ro.r('mse_unit')
-        rse = abs(mse**0.5/estimated_value*100)
-        df = pl.DataFrame({
-            'Domain': domain,
-            'Eblup': estimated_value,
-            'Sample size': n_size,
-            'MSE': mse,
-            'RSE': rse
-        })
+        ro.r(UNIT_BUNDLE)
+        tables = r_bundle(UNIT_TABLES)
+        results = unit_results(tables)
+        df = unit_estimates(tables)
         error = False
-        ro.r('rm(data_unit, domain_unit, estimated_value_unit, n_size_unit, mse_unit, model_unit)')
-        ro.r("gc()")  # Clear R memory
+        r_cleanup(["data_unit", "model_unit", "unit_fit", "unit_varcor", "unit_cor", *UNIT_TABLES])
         return results, error, df
         
     except Exception as e:
         if hasattr(parent, 'log_exception'):
             parent.log_exception(e, "Run Model EBLUP Unit")
         error = True
-        return str(e), error, None
\ No newline at end of file
+        return str(e), error, None
+
+def run_model_eblup_unit_worker(parent):
+    """
+    Runs the EBLUP unit model with its bootstrap split into seeded shards executed by the R worker pool.
+    Each shard runs pbmseBHF with a part of the B replicates and its own seed (see `bootstrap_shards`),
+    so the shards use every worker process. The shard MSEs are merged as a replicate-weighted mean in
+    shard order, so the result for a given seed does not depend on the number of workers.
+    Parameters:
+    parent (object): The parent object with `model1.scan()`, `r_script`, `bootstrap` (the B of the
+                     dialog) and `seed` (None draws a new seed, reported in the results). The submitted
+                     jobs are stored in `parent.jobs` so they can be cancelled, and the lines printed by
+                     the workers are passed to `parent.on_output` (the console of the dialog) if set.
+    Returns:
+    tuple: The same (result, error, df) tuple as `run_model_eblup_unit`.
+    """
+    
+    try:
+        df = collect_for_script(parent.model1.scan(), parent.r_script, frame_name="data_unit")
+        B = int(parent.bootstrap)
+        seed = parent.seed if parent.seed is not None else int(np.random.SeedSequence().entropy % (2 ** 31 - 1))
+        shards = bootstrap_shards(B, seed)
+        parent.jobs = [
+            RJob(
+                script=bootstrap_shard_script(parent.r_script, size, r_seed(shard_seed)),
+                inputs={"data_unit": df},
+                outputs=UNIT_TABLES,
+                on_output=getattr(parent, "on_output", None),
+            )
+            for size, shard_seed in shards
+        ]
+        futures = [r_worker_pool.submit(job) for job in parent.jobs]
+        job_results = [future.result() for future in futures]
+        for job_result in job_results:
+            if job_result.error is not None:
+                if hasattr(parent, 'log_exception'):
+                    parent.log_exception(RuntimeError(job_result.error), "Run Model EBLUP Unit")
+                return job_result.error, True, None
+        
+        mse = np.zeros(job_results[0].outputs["mse_unit"].height)
+        for (size, _), job_result in zip(shards, job_results):
+            mse += size * job_result.outputs["mse_unit"]["mse"].to_numpy()
+        mse /= B
+        
+        results = unit_results(job_results[0].outputs)
+        results["Bootstrap Seed"] = seed
+        df = unit_estimates(job_results[0].outputs, mse)
+        return results, False, df
+    
+    except Exception as e:
+        if hasattr(parent, 'log_exception'):
+            parent.log_exception(e, "Run Model EBLUP Unit")
+        return str(e), True, None
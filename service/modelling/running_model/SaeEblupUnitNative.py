@@ -0,0 +1,104 @@
+import numpy as np
+import polars as pl
+from service.modelling.native.FayHerriot import design_matrix
+from service.modelling.native.BatteseHarterFuller import pbmseBHF
+
+def run_model_eblup_unit_native(parent):
+    """
+    Runs the EBLUP unit model with the native NumPy Battese-Harter-Fuller engine instead of R.
+    The nested error model is fitted by REML (or ML) from the variables selected in the dialog
+    (the R script is not used), and the MSE comes from the native parametric bootstrap, so the run
+    needs no R session, data conversion or output parsing.
+    The unit rows are the rows where the variable of interest, the auxiliary variables and the domain
+    are all present; the domain rows are the rows where the index, the auxiliary means and the
+    population size are present. The auxiliary means are matched to the auxiliary variables in order.
+    Parameters:
+    parent (object): The parent object with `model1.scan()` and the dialog selections
+                     `of_interest_var`, `auxilary_vars`, `as_factor_var`, `index_var`, `aux_mean_vars`,
+                     `population_sample_size_var`, `domain_var`, `method`, `bootstrap` and `seed`, and
+                     `workers`, the number of processes the bootstrap runs in (one process when missing).
+                     Only the selected columns are read from the scan, so a large file opened lazily
+                     is never read whole.
+    Returns:
+    tuple: The same (result, error, df) tuple as `run_model_eblup_unit`, df having the columns
+           'Domain', 'Eblup', 'Sample size', 'MSE' and 'RSE'.
+    """
+
+    def column(var):
+        return var.split(" [")[0]
+
+    try:
+        if not parent.of_interest_var or not parent.domain_var:
+            raise ValueError("Variable of interest and Domains cannot be empty.")
+        if not parent.index_var or not parent.population_sample_size_var:
+            raise ValueError("Index and Population Sample Size cannot be empty.")
+        if parent.method not in ("REML", "ML"):
+            raise ValueError("The native backend fits the unit level model by 'REML' or 'ML'.")
+        of_interest = column(parent.of_interest_var[0])
+        auxiliary = [column(var) for var in parent.auxilary_vars]
+        factors = [column(var) for var in parent.as_factor_var]
+        domain = column(parent.domain_var[0])
+        index = column(parent.index_var[0])
+        aux_means = [column(var) for var in parent.aux_mean_vars]
+        population_size = column(parent.population_sample_size_var[0])
+        selected = list(dict.fromkeys([of_interest, *auxiliary, *factors, domain, index, *aux_means, population_size]))
+        df = parent.model1.scan().select(selected).filter(~pl.all_horizontal(pl.all().is_null())).collect()
+
+        units = df.drop_nulls([of_interest, *auxiliary, *factors, domain])
+        y, X, _, names = design_matrix(units, of_interest, auxiliary, factors)
+        if len(aux_means) != X.shape[1] - 1:
+            raise ValueError(f"The model has {X.shape[1] - 1} auxiliary columns ({', '.join(names[1:])}) "
+                             f"but {len(aux_means)} auxiliary means were given.")
+
+        means = df.select(index, *aux_means).drop_nulls().unique(subset=index, keep="first", maintain_order=True)
+        sizes = df.select(index, population_size).drop_nulls().unique(subset=index, keep="first", maintain_order=True)
+        areas = means.join(sizes, on=index, how="inner", maintain_order="left")
+        selectdom = areas[index].to_numpy()
+        meanx = np.column_stack([np.ones(areas.height)] + [areas[name].cast(pl.Float64).to_numpy() for name in aux_means])
+        Ni = areas.to_series(-1).cast(pl.Float64).to_numpy()
+
+        seed = parent.seed if parent.seed is not None else int(np.random.SeedSequence().entropy % (2 ** 31 - 1))
+        model = pbmseBHF(
+            y, X, units[domain].to_numpy(), selectdom, meanx, Ni,
+            B=int(parent.bootstrap), method=parent.method, seed=seed, workers=getattr(parent, "workers", None)
+        )
+        est = model["est"]
+        fit = est["fit"]
+        if not fit["convergence"]:
+            raise ValueError("The fitting method does not converge.")
+
+        results = {
+            "Model": "EBLUP Unit Level",
+            "Method": f"Nested error linear mixed model fit by {parent.method} (native)",
+            "Formula": f"{of_interest} ~ {' + '.join(names[1:]) or '1'} + (1 | {domain})",
+            "Criterion of Convergence": -2 * fit["loglike"],
+            "Number of Observation": len(y),
+            "Groups": f"Number of obs: {len(y)}, groups: {domain}, {len(np.unique(units[domain].to_numpy()))}",
+            "Fixed Effects": pl.DataFrame({
+                "Effect": names,
+                "Estimate": fit["estcoef"]["beta"],
+                "Standard Error": fit["estcoef"]["std.error"],
+                "t-value": fit["estcoef"]["tvalue"],
+            }),
+            "Random Effects": pl.DataFrame({
+                "Group": [domain, "Residual"],
+                "Name": ["(Intercept)", None],
+                "Variance": [fit["refvar"], fit["errorvar"]],
+                "Standard Deviation": [np.sqrt(fit["refvar"]), np.sqrt(fit["errorvar"])],
+            }),
+            "Bootstrap Seed": seed,
+        }
+        df = pl.DataFrame({
+            'Domain': est["eblup"]["domain"],
+            'Eblup': est["eblup"]["eblup"],
+            'Sample size': est["eblup"]["sampsize"],
+            'MSE': model["mse"],
+        }).with_columns(
+            (pl.col('MSE').sqrt() / pl.col('Eblup') * 100).abs().alias('RSE')
+        )
+        return results, False, df
+
+    except Exception as e:
+        if hasattr(parent, 'log_exception'):
+            parent.log_exception(e, "Run Model EBLUP Unit")
+        return str(e), True, None
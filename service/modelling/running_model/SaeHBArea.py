@@ -1,8 +1,50 @@
 import polars as pl
 from rpy2.rinterface_lib.embedded import RRuntimeError
 from service.modelling.running_model.convert_df import convert_df
+from service.utils.r_frame import collect_for_script
+from service.modelling.running_model.r_results import HB_BUNDLE, HB_TABLES, hb_results, r_bundle, r_cleanup
+from service.utils.r_worker_pool import RJob, r_worker_pool
 import os
 
+# Binds the data of the dialog for a worker job; a `datahb` left attached by a failed job is detached first.
+HB_WORKER_SETUP = """
+suppressMessages(library(saeHB))
+while ("datahb" %in% search()) detach("datahb", character.only = TRUE)
+attach(datahb)
+"""
+
+# Draws the same autocorrelation and trace/density plots as `run_model_hb_area` with R's own png
+# device and lists the files written in `hb_plots`, so they can be made in a worker process.
+HB_PLOTS = """
+suppressMessages(library(coda))
+result_mcmc <- modelhb$plot[[length(modelhb$plot) - 1]]
+param_names <- colnames(result_mcmc[[1]])
+plot_names <- gsub("]", "", gsub("[", "_", param_names, fixed = TRUE), fixed = TRUE)
+hb_png <- function(name, width, height, draw) {
+    path <- file.path(plot_dir, paste0(name, "_plot.png"))
+    png(filename = path, width = width, height = height, res = 100)
+    drawn <- tryCatch({
+        draw()
+        TRUE
+    }, error = function(e) {
+        cat("Error creating plot ", name, ": ", conditionMessage(e), "\n", sep = "")
+        FALSE
+    }, finally = dev.off())
+    if (drawn) path else NA_character_
+}
+hb_plots <- c(
+    hb_png("sae_autocorr_all", 1200, 800, function() coda::autocorr.plot(result_mcmc, col = "brown2", lwd = 2)),
+    vapply(seq_along(param_names), function(i) hb_png(paste0("sae_autocorr_", plot_names[i]), 800, 600, function()
+        coda::autocorr.plot(result_mcmc[, i], col = "brown2", lwd = 2, main = paste("Autocorrelation -", param_names[i]))
+    ), ""),
+    hb_png("sae_trace_density_all", 1200, 800, function() plot(result_mcmc, col = "brown2", lwd = 2)),
+    vapply(seq_along(param_names), function(i) hb_png(paste0("sae_trace_density_", plot_names[i]), 800, 600, function()
+        plot(result_mcmc[, i], col = "brown2", lwd = 2, main = paste("Trace and Density -", param_names[i]))
+    ), "")
+)
+hb_plots <- data.frame(path = hb_plots[!is.na(hb_plots)])
+"""
+
 def run_model_hb_area(parent):
     """
     Runs the hierarchical Bayesian area model using the provided parent object.
@@ -13,7 +55,7 @@ def run_model_hb_area(parent):
     parent (object): An object that contains the necessary methods and attributes for running the model.
                      It should have the following methods and attributes:
                      - activate_R(): Method to activate the R environment.
-                     - model1.get_data(): Method to get the data for modeling.
+                     - model1.scan(): Method to get the data for modeling as a LazyFrame.
                      - r_script: A string containing the R script to be executed.
     Returns:
     tuple: A tuple containing:
@@ -24,9 +66,8 @@ def run_model_hb_area(parent):
     """
     
     import rpy2.robjects as ro
-    df = parent.model1.get_data()
-    df = df.drop_nulls()
-    convert_df(df, parent)
+    df = collect_for_script(parent.model1.scan(), parent.r_script, drop="any", frame_name="datahb")
+    convert_df(df, parent, parent.r_script, "datahb")
     result = ""
     error = False
     try:
@@ -177,44 +218,10 @@ def run_model_hb_area(parent):
                     pass
         
             
-        ro.r('estimated_value_hb <- modelhb$Est')
-        ro.r('sd_hb <- modelhb$sd')
-        ro.r('refVar_hb <- modelhb$refVar')
-        ro.r('coefficient_hb <- modelhb$coefficient')
-        
-        refvar = ro.globalenv['refVar_hb']
-        refvar = str(float(refvar[0]))
-        coefficient = ro.conversion.rpy2py(ro.globalenv['coefficient_hb'])
-        coefficient.reset_index(inplace=True)
-        coefficient.columns = ['Parameter'] + list(coefficient.columns[1:])
-        coefficient = pl.DataFrame(coefficient)
-        
-        results ={
-            "Model": "Hierarchical Bayesian",
-            "Estimated Random Effect Variances": refvar,
-            "Estimated Model Coefficient": coefficient,
-        }
-        estimated_value = ro.conversion.rpy2py(ro.globalenv['estimated_value_hb'])
-        hb_mean = estimated_value["MEAN"]
-        hb_25 = estimated_value["25%"]
-        hb_50 = estimated_value["50%"]
-        hb_75 = estimated_value["75%"]
-        hb_97_5 = estimated_value["97.5%"]
-        hb_sd = estimated_value["SD"]
-        rse = abs(hb_sd / hb_mean ) * 100
-        df = pl.DataFrame({
-            'HB Mean': hb_mean,
-            'HB 25%': hb_25,
-            'HB 50%': hb_50,
-            'HB 75%': hb_75,
-            'HB 97.5%': hb_97_5,
-            'Standard Deviation': hb_sd,
-            'RSE': rse
-        })
+        ro.r(HB_BUNDLE)
+        results, df = hb_results(r_bundle(HB_TABLES))
         ro.r("detach(datahb)")
-        ro.r("rm(datahb)")
-        ro.r("rm(modelhb)")
-        ro.r("gc()")
+        r_cleanup(["datahb", "modelhb", *HB_TABLES])
         
         error = False
         return results, error, df, plot_paths
@@ -223,4 +230,46 @@ def run_model_hb_area(parent):
         if hasattr(parent, 'log_exception'):
             parent.log_exception(e, "Run Model Hierarchical Bayesian Area")
         error = True
-        return str(e), error, None, None
\ No newline at end of file
+        return str(e), error, None, None
+
+def run_model_hb_area_worker(parent):
+    """
+    Runs the hierarchical Bayesian area model in a process of the R worker pool instead of the embedded
+    R interpreter, so a long MCMC run does not hold the embedded R lock.
+    The data is shipped to the worker as an Arrow IPC file; the worker draws the MCMC plots into the
+    same temp directory as `run_model_hb_area` (see `HB_PLOTS`) and sends back the tables of `HB_BUNDLE`.
+    Parameters:
+    parent (object): The parent object with `model1.scan()` and `r_script`, as for `run_model_hb_area`.
+                     The submitted job is stored in `parent.job` so it can be cancelled, and the lines
+                     printed by the worker are passed to `parent.on_output` (the console of the dialog) if set.
+    Returns:
+    tuple: The same (result, error, df, plot_paths) tuple as `run_model_hb_area`.
+    """
+    
+    try:
+        df = collect_for_script(parent.model1.scan(), parent.r_script, drop="any", frame_name="datahb")
+        temp_dir = os.path.join(os.getcwd(), "temp")
+        os.makedirs(temp_dir, exist_ok=True)
+        plot_dir = temp_dir.replace("\\", "/")
+        parent.job = RJob(
+            script="\n".join([
+                HB_WORKER_SETUP, parent.r_script, f'plot_dir <- "{plot_dir}"', HB_PLOTS, HB_BUNDLE, "detach(datahb)"
+            ]),
+            inputs={"datahb": df},
+            outputs=[*HB_TABLES, "hb_plots"],
+            on_output=getattr(parent, "on_output", None),
+        )
+        job_result = r_worker_pool.run(parent.job)
+        if job_result.error is not None:
+            if hasattr(parent, 'log_exception'):
+                parent.log_exception(RuntimeError(job_result.error), "Run Model Hierarchical Bayesian Area")
+            return job_result.error, True, None, None
+        
+        results, df = hb_results(job_result.outputs)
+        plot_paths = [os.path.normpath(path) for path in job_result.outputs["hb_plots"]["path"].to_list()]
+        return results, False, df, plot_paths
+    
+    except Exception as e:
+        if hasattr(parent, 'log_exception'):
+            parent.log_exception(e, "Run Model Hierarchical Bayesian Area")
+        return str(e), True, None, None
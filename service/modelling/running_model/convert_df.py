@@ -1,26 +1,24 @@
-import polars as pl
-def convert_df(df, parent):
+from service.utils.r_frame import push_frame, script_columns
+
+def convert_df(df, parent, script=None, frame_name="data"):
     """
-    Converts a Polars DataFrame to an R DataFrame using rpy2 and handles columns with a high percentage of null values.
+    Converts a Polars DataFrame to an R DataFrame using rpy2 and binds it as 'r_df'.
     Parameters:
     df (pl.DataFrame): The Polars DataFrame to be converted.
-    parent (object): An object that has a method `activate_R()` to activate the R environment.
+    parent (object): The dialog running the model, whose `model1` table model `df` was built from.
+    script (str, optional): The R script of the model. When given, only the columns it refers to are sent.
+    frame_name (str): The name the frame is bound to in the R script. Default is "data".
     Returns:
     None: The function modifies the R global environment by adding the converted DataFrame as 'r_df'.
     Notes:
-    - Columns with null values exceeding 30% of the DataFrame length are dropped before conversion.
-    - The function uses the rpy2_arrow.polars and rpy2.robjects libraries for conversion.
+    - With a script, the frame is projected on the columns the script names (the variables assigned in
+      the dialog), so wide files only convert the model variables.
+    - Null-typed and categorical columns are sent as string columns; the other columns are
+      pushed through Arrow as they are, without an intermediate pandas copy.
+    - Converted frames are cached in the R session by content fingerprint, so re-running a model
+      on unchanged data rebinds the resident R data.frame instead of converting it again.
+    - After an edit only the modified columns are converted and replaced in the resident R data.frame.
+    - See `service.utils.r_frame.push_frame`.
     """
     
-    import rpy2_arrow.polars as rpy2polars
-    import rpy2.robjects as ro
-    
-    null_threshold = 0.49 * len(df)
-    cols_to_drop = [col for col in df.columns if df[col].null_count() >= null_threshold]
-    if len(cols_to_drop)>0:
-        df_pandas = df.to_pandas()
-        df = pl.from_pandas(df_pandas)
-    
-    with rpy2polars.converter.context() as cv_ctx:
-        r_df = cv_ctx.py2rpy(df)
-        ro.globalenv['r_df'] = r_df
\ No newline at end of file
+    push_frame(df, (getattr(parent, 'model1', None),), columns=script_columns(script, df.columns, frame_name))
\ No newline at end of file
@@ -0,0 +1,352 @@
+import polars as pl
+from service.utils.convert import R_AS_ARROW_TABLE, rarrow_to_polars
+
+# The R snippets below build everything a runner shows (estimates, fit information, coefficient
+# tables) as small data.frames read from the model objects, instead of printing them or fetching
+# each value separately. The tables of a model are brought back together in a single round trip
+# (`r_bundle`, or the outputs of an R worker job) and turned into the results dict and estimates
+# frame by the matching builder, which does not depend on R.
+
+AREA_BUNDLE = """
+estimate_area <- data.frame(Eblup = as.numeric(model$est$eblup), MSE = as.numeric(model$mse))
+fit_area <- data.frame(
+    method = as.character(model$est$fit$method)[1],
+    convergence = if (is.logical(model$est$fit$convergence)) model$est$fit$convergence[1] else NA,
+    iterations = as.numeric(model$est$fit$iterations)[1],
+    refvar = as.numeric(model$est$fit$refvar)[1]
+)
+goodness_area <- as.data.frame(t(as.numeric(model$est$fit$goodness)))
+"""
+AREA_TABLES = ["estimate_area", "fit_area", "goodness_area"]
+
+UNIT_BUNDLE = """
+eblup_unit <- data.frame(
+    domain = model_unit$est$eblup$domain,
+    eblup = model_unit$est$eblup$eblup,
+    sampsize = model_unit$est$eblup$sampsize
+)
+mse_unit <- data.frame(domain = model_unit$mse$domain, mse = model_unit$mse$mse)
+unit_fit <- model_unit$est$fit$summary
+unit_info <- data.frame(
+    method = paste0(unit_fit$methTitle, " ['", unit_fit$objClass[1], "']"),
+    formula = paste(deparse(unit_fit$call$formula), collapse = " "),
+    criterion = if ("REML" %in% names(unit_fit$AICtab)) unit_fit$AICtab[["REML"]] else unit_fit$AICtab[["deviance"]],
+    nobs = unit_fit$devcomp$dims[["n"]],
+    group = names(unit_fit$ngrps)[1],
+    ngroups = unname(unit_fit$ngrps[1])
+)
+unit_residuals <- data.frame(
+    Statistic = c("Minimum", "Quartil 1", "Median", "Quartil 3", "Maximum"),
+    Value = unname(quantile(unit_fit$residuals, na.rm = TRUE))
+)
+unit_fixed <- data.frame(
+    Effect = rownames(unit_fit$coefficients),
+    Estimate = unit_fit$coefficients[, 1],
+    `Standard Error` = unit_fit$coefficients[, 2],
+    `t-value` = unit_fit$coefficients[, 3],
+    check.names = FALSE, row.names = NULL
+)
+unit_varcor <- as.data.frame(unit_fit$varcor)
+unit_random <- data.frame(
+    Group = unit_varcor$grp,
+    Name = unit_varcor$var1,
+    Variance = unit_varcor$vcov,
+    `Standard Deviation` = unit_varcor$sdcor,
+    check.names = FALSE
+)
+unit_cor <- as.matrix(cov2cor(as.matrix(unit_fit$vcov)))
+unit_correlation <- data.frame(Effect = rownames(unit_cor), unit_cor, check.names = FALSE, row.names = NULL)
+"""
+UNIT_TABLES = ["eblup_unit", "mse_unit", "unit_info", "unit_residuals", "unit_fixed", "unit_random", "unit_correlation"]
+
+PROJECTION_BUNDLE = """
+projection_fit <- model_pe$model
+if (inherits(projection_fit, "workflow")) projection_fit <- workflows::extract_fit_engine(projection_fit)
+if (inherits(projection_fit, "model_fit")) projection_fit <- projection_fit$fit
+projection_info <- data.frame(
+    formula = tryCatch(paste(deparse(formula(projection_fit)), collapse = " "), error = function(e) NA_character_)
+)
+projection_coef <- tryCatch(coef(projection_fit), error = function(e) NULL)
+projection_coefficients <- if (is.null(projection_coef)) data.frame() else as.data.frame(as.list(projection_coef), check.names = FALSE)
+projection_prediction <- data.frame(Value = as.numeric(model_pe$prediction))
+projection_data <- as.data.frame(model_pe$projection)
+"""
+PROJECTION_TABLES = ["projection_info", "projection_coefficients", "projection_prediction", "projection_data"]
+
+PSEUDO_BUNDLE = """
+pseudo_summary <- summary(model_pseudo)
+pseudo_info <- data.frame(
+    model = if (inherits(model_pseudo, "ebp")) "Empirical Best Prediction" else "Pseudo Empirical Best Linear Unbiased Prediction (Fay-Herriot)",
+    call = paste(deparse(if (is.null(model_pseudo$call$fixed)) model_pseudo$fixed else model_pseudo$call$fixed), collapse = " "),
+    fixed = paste(deparse(model_pseudo$fixed), collapse = " "),
+    threshold = if (is.null(model_pseudo$call$threshold)) tryCatch(
+        0.6 * median(model_pseudo$framework$smp_data[[as.character(model_pseudo$fixed[[2]])]]),
+        error = function(e) NA_real_
+    ) else NA_real_,
+    weighted = !is.null(model_pseudo$call$weights) || !is.null(model_pseudo$call$weight),
+    out_of_smp = pseudo_summary$out_of_smp,
+    in_smp = pseudo_summary$in_smp,
+    size_smp = pseudo_summary$size_smp,
+    size_pop = pseudo_summary$size_pop,
+    icc = if (is.null(pseudo_summary$icc)) NA_real_ else pseudo_summary$icc,
+    transformation = if (is.null(pseudo_summary$transform)) "no" else as.character(pseudo_summary$transform$Transformation[1]),
+    variance_method = if (is.null(model_pseudo$method)) NA_character_ else toupper(as.character(model_pseudo$method)[1]),
+    mse_method = if (is.null(model_pseudo$MSE)) NA_character_ else paste(
+        if (is.null(model_pseudo$call$boot_type)) "parametric" else as.character(model_pseudo$call$boot_type), "bootstrap"
+    )
+)
+pseudo_domains <- data.frame(
+    Domains = rownames(pseudo_summary$size_dom),
+    as.data.frame(unclass(pseudo_summary$size_dom), check.names = FALSE),
+    check.names = FALSE, row.names = NULL
+)
+pseudo_measures <- if (is.null(pseudo_summary$coeff_determ)) data.frame() else as.data.frame(pseudo_summary$coeff_determ, row.names = NULL)
+pseudo_normality <- if (is.null(pseudo_summary$normality)) data.frame() else data.frame(
+    Component = rownames(pseudo_summary$normality), pseudo_summary$normality, check.names = FALSE, row.names = NULL
+)
+pseudo_estimate <- data.frame(predict(model_pseudo), MSE = model_pseudo$MSE$Mean, check.names = FALSE)
+pseudo_estimators <- estimators(model_pseudo)
+if (is.list(pseudo_estimators) && !is.data.frame(pseudo_estimators) && "ind" %in% names(pseudo_estimators)) {
+    pseudo_estimators <- pseudo_estimators$ind
+}
+pseudo_estimators <- as.data.frame(pseudo_estimators)
+names(pseudo_estimators) <- make.names(names(pseudo_estimators))
+pseudo_varcov <- data.frame(variance = as.numeric(getVarCov.ebp(model_pseudo)))
+"""
+PSEUDO_TABLES = [
+    "pseudo_info", "pseudo_domains", "pseudo_measures", "pseudo_normality",
+    "pseudo_estimate", "pseudo_estimators", "pseudo_varcov",
+]
+
+HB_BUNDLE = """
+hb_estimate <- as.data.frame(modelhb$Est)
+hb_coefficient <- data.frame(
+    Parameter = rownames(modelhb$coefficient), modelhb$coefficient, check.names = FALSE, row.names = NULL
+)
+hb_fit <- data.frame(refvar = as.numeric(modelhb$refVar)[1])
+"""
+HB_TABLES = ["hb_estimate", "hb_coefficient", "hb_fit"]
+
+
+def r_bundle(names):
+    """
+    Brings several R data.frames of the embedded R session back in a single round trip.
+    The R side assembles them into one named list of Arrow tables in one evaluation (factors
+    become strings), and `decode_bundle` unpacks it.
+    Args:
+        names (list): The names of the R data.frames in the global environment.
+    Returns:
+        dict: The Polars DataFrames keyed by name.
+    """
+
+    import rpy2.robjects as ro
+
+    members = ", ".join(f"{name} = {name}" for name in names)
+    return decode_bundle(ro.r(f'lapply(list({members}), {R_AS_ARROW_TABLE})'))
+
+
+def decode_bundle(bundle):
+    """
+    Unpacks a named R list of Arrow tables (see `r_bundle`) into Polars DataFrames.
+    Every table crosses through the Arrow C data interface, without serialization or pandas
+    (see `service.utils.convert.rarrow_to_polars`).
+    Args:
+        bundle (rpy2.robjects.ListVector): The named list of Arrow tables.
+    Returns:
+        dict: The Polars DataFrames keyed by name.
+    """
+
+    return {name: rarrow_to_polars(table) for name, table in zip(bundle.names, bundle)}
+
+
+def r_cleanup(names):
+    """Removes the given objects from the global environment of the embedded R session and frees memory."""
+
+    import rpy2.robjects as ro
+
+    objects = ", ".join(f'"{name}"' for name in names)
+    ro.r(f'rm(list = intersect(c({objects}), ls(envir = globalenv())), envir = globalenv())')
+    ro.r("gc()")
+
+
+def area_results(tables):
+    """
+    Builds the results dict and estimates of the EBLUP area model from the tables of `AREA_BUNDLE`.
+    Args:
+        tables (dict): The Polars DataFrames named in `AREA_TABLES`.
+    Returns:
+        tuple: The results dict and the Eblup, MSE and RSE (%) of every domain (pl.DataFrame).
+    """
+
+    fit = tables["fit_area"].row(0, named=True)
+    goodness_r = tables["goodness_area"].row(0)
+    goodness = pl.DataFrame({
+        'Logarithmic Likelihood': [goodness_r[0]],
+        'Akaike Information Criterion ( AIC )': [goodness_r[1]],
+        'Bayesian Information Criterion (BIC)': [goodness_r[2]],
+        'Kullback Information Criterion (KIC)': [goodness_r[3]],
+    })
+    results = {
+        "Model": "EBLUP Area Level",
+        "Method": fit["method"],
+        "Convergence": "Not Converged" if fit["convergence"] is None else "Yes" if fit["convergence"] else "NO",
+        "Number of Iterations Performed by The Fisher-scoring Algorithm": int(fit["iterations"]),
+        "Random Effect Variance": str(float(fit["refvar"])),
+        "Goodness of Fit Models": goodness
+    }
+    df = tables["estimate_area"].with_columns(
+        (pl.col('MSE').sqrt() / pl.col('Eblup') * 100).abs().alias('RSE (%)')
+    )
+    return results, df
+
+
+def unit_results(tables):
+    """
+    Builds the results dict of the EBLUP unit model from the tables of `UNIT_BUNDLE`.
+    Args:
+        tables (dict): The Polars DataFrames named in `UNIT_TABLES`.
+    Returns:
+        dict: The same keys as the summary of the unit model shown in the output.
+    """
+
+    info = tables["unit_info"].row(0, named=True)
+    return {
+        "Model": "EBLUP Unit Level",
+        "Method": info["method"],
+        "Formula": info["formula"],
+        "Criterion of Convergence": float(info["criterion"]),
+        "Number of Observation": int(info["nobs"]),
+        "Groups": f"Number of obs: {int(info['nobs'])}, groups: {info['group']}, {int(info['ngroups'])}",
+        "Summary of Modelling": tables["unit_residuals"],
+        "Fixed Effects": tables["unit_fixed"],
+        "Random Effects": tables["unit_random"],
+        "Correlation of Fixed Effect": tables["unit_correlation"],
+    }
+
+
+def unit_estimates(tables, mse=None):
+    """
+    Builds the estimates of the EBLUP unit model from the tables of `UNIT_BUNDLE`.
+    Args:
+        tables (dict): The Polars DataFrames named in `UNIT_TABLES`.
+        mse (np.ndarray, optional): The MSE of every domain, replacing the one of `mse_unit`
+                                    (used when the bootstrap was split into shards).
+    Returns:
+        pl.DataFrame: The Domain, Eblup, Sample size, MSE and RSE of every domain.
+    """
+
+    estimate = tables["eblup_unit"]
+    return pl.DataFrame({
+        'Domain': estimate["domain"],
+        'Eblup': estimate["eblup"],
+        'Sample size': estimate["sampsize"],
+        'MSE': tables["mse_unit"]["mse"] if mse is None else mse,
+    }).with_columns(
+        (pl.col('MSE').sqrt() / pl.col('Eblup') * 100).abs().alias('RSE')
+    )
+
+
+def projection_results(tables):
+    """
+    Builds the results dict and projected data of the projection model from the tables of `PROJECTION_BUNDLE`.
+    Args:
+        tables (dict): The Polars DataFrames named in `PROJECTION_TABLES`.
+    Returns:
+        tuple: The results dict and the projected data (pl.DataFrame).
+    """
+
+    formula = tables["projection_info"]["formula"][0]
+    prediction = tables["projection_prediction"]
+    results = {
+        'Model': "Projection Estimation",
+        'Formula of Modelling': formula if formula is not None else "No formula found",
+        'Coefficients of Modelling': tables["projection_coefficients"],
+        'Prediction': prediction.select(
+            pl.int_range(1, prediction.height + 1, dtype=pl.Int64).alias("Index"),
+            pl.col("Value").cast(pl.Float64)
+        )
+    }
+    return results, tables["projection_data"]
+
+
+def pseudo_results(tables):
+    """
+    Builds the results dict and estimates of the EBLUP pseudo model from the tables of `PSEUDO_BUNDLE`.
+    Args:
+        tables (dict): The Polars DataFrames named in `PSEUDO_TABLES`.
+    Returns:
+        tuple: The results dict, with the keys of the summary of the pseudo model, and the
+               estimates of every domain with their MSE and RSE (%) (pl.DataFrame).
+    """
+
+    info = tables["pseudo_info"].row(0, named=True)
+    results = {
+        "Model": info["model"],
+        "Call": info["call"],
+    }
+    if info["threshold"] is not None:
+        # Set by ebp when no threshold is given: 60% of the median of the dependent variable in the sample
+        results["Threshold Percentage"] = 60
+        results["Threshold Value"] = float(info["threshold"])
+    if info["weighted"]:
+        results["Prediction Method"] = "Empirical Best Prediction with sampling weights"
+    results["Out of sample domains"] = int(info["out_of_smp"])
+    results["In Sample domains"] = int(info["in_smp"])
+    results["Units in sample"] = int(info["size_smp"])
+    results["Units in population"] = int(info["size_pop"])
+    for row in tables["pseudo_domains"].iter_rows(named=True):
+        domains = row.pop("Domains")
+        results[domains] = {name.rstrip("."): float(value) for name, value in row.items()}
+    if info["icc"] is not None:
+        results["ICC"] = float(info["icc"])
+    results["Transformation"] = info["transformation"]
+    if tables["pseudo_measures"].width > 0:
+        results["Has Explanatory Measures"] = True
+        results["Explanatory Measures"] = tables["pseudo_measures"]
+    if tables["pseudo_normality"].width > 0:
+        results["Has Residual Diagnostics"] = True
+        results["Residual Diagnostics"] = tables["pseudo_normality"]
+    if info["fixed"] != info["call"]:
+        results["Fixed Formula"] = info["fixed"]
+    if info["variance_method"] is not None:
+        results["Variance Estimation Method"] = info["variance_method"]
+    if info["mse_method"] is not None:
+        results["MSE Method"] = info["mse_method"]
+    results["Estimators"] = tables["pseudo_estimators"]
+    variance = tables["pseudo_varcov"]["variance"]
+    results["Random Effect Variance"] = float(variance[0]) if len(variance) == 1 else variance.to_numpy()
+
+    df = tables["pseudo_estimate"]
+    if 'Mean' in df.columns:
+        df = df.with_columns(
+            (pl.col('MSE').sqrt() / pl.col('Mean') * 100).abs().alias('RSE (%)')
+        )
+    return results, df
+
+
+def hb_results(tables):
+    """
+    Builds the results dict and estimates of the hierarchical Bayesian area model from the tables of `HB_BUNDLE`.
+    Args:
+        tables (dict): The Polars DataFrames named in `HB_TABLES`.
+    Returns:
+        tuple: The results dict and the HB mean, quantiles, standard deviation and RSE of every domain (pl.DataFrame).
+    """
+
+    results = {
+        "Model": "Hierarchical Bayesian",
+        "Estimated Random Effect Variances": str(float(tables["hb_fit"]["refvar"][0])),
+        "Estimated Model Coefficient": tables["hb_coefficient"],
+    }
+    estimate = tables["hb_estimate"]
+    df = pl.DataFrame({
+        'HB Mean': estimate["MEAN"],
+        'HB 25%': estimate["25%"],
+        'HB 50%': estimate["50%"],
+        'HB 75%': estimate["75%"],
+        'HB 97.5%': estimate["97.5%"],
+        'Standard Deviation': estimate["SD"],
+    }).with_columns(
+        (pl.col('Standard Deviation') / pl.col('HB Mean')).abs().mul(100).alias('RSE')
+    )
+    return results, df
@@ -0,0 +1,82 @@
+import io
+import re
+
+import polars as pl
+
+
+def parse_clipboard(text):
+    """
+    Parses tab-separated clipboard text (as copied from a spreadsheet) into a frame of strings.
+    The text is read in one pass by the Polars CSV reader, without quoting, so every field is kept as
+    it was copied. Blank lines are skipped and short rows are padded with empty strings.
+    Args:
+        text (str): The clipboard text.
+    Returns:
+        pl.DataFrame: One string column per field, named "0", "1", ...; an empty frame when there is no data.
+    """
+
+    text = re.sub(r"(?:\r?\n)+", "\n", text).strip("\r\n")
+    if not text:
+        return pl.DataFrame()
+    width = max(line.count("\t") for line in text.split("\n")) + 1
+    return pl.read_csv(
+        io.BytesIO(text.encode("utf-8")), separator="\t", has_header=False, quote_char=None,
+        empty_string_is_null=False, schema={str(i): pl.Utf8 for i in range(width)}, missing_columns="insert"
+    )
+
+
+def fill_selection(block, height, width):
+    """
+    Repeats a pasted block over a selection, Excel-style.
+    Args:
+        block (pl.DataFrame): The pasted values (see `parse_clipboard`).
+        height (int): The number of selected rows.
+        width (int): The number of selected columns.
+    Returns:
+        pl.DataFrame: A `height` x `width` frame, the block being repeated down and across.
+    """
+
+    return block.select(
+        pl.col(block.columns[j % block.width]).gather(pl.int_range(height) % block.height).alias(str(j))
+        for j in range(width)
+    )
+
+
+def cast_pasted(values, dtype):
+    """
+    Casts a column of pasted strings to the type of the column it is pasted into.
+    Empty strings become nulls outside text columns and a decimal comma is read as a point in numeric
+    columns. A Null column (where nothing was entered yet) takes the type of the values, Int64 or
+    Float64, and the values are kept as text when the column cannot hold all of them.
+    Args:
+        values (pl.Series): The pasted strings.
+        dtype (pl.DataType): The type of the destination column.
+    Returns:
+        pl.Series: The cast values. Their type differs from `dtype` when the column has to change type.
+    """
+
+    if dtype == pl.Utf8:
+        return values
+    text = values.str.strip_chars()
+    empty = text.is_null() | (text == "")
+    if dtype.is_numeric() or dtype == pl.Null:
+        text = text.str.replace(",", ".", literal=True).zip_with(text.str.contains(r"^[+-]?\d+,\d+$"), text)
+    if dtype == pl.Null:
+        if empty.all():
+            return values
+        dtype = pl.Int64 if (empty | text.str.contains(r"^[+-]?\d+$")).all() else pl.Float64
+
+    try:
+        if dtype.is_integer():
+            cast = text.cast(dtype, strict=False).fill_null(text.cast(pl.Float64, strict=False).cast(dtype, strict=False))
+        elif dtype == pl.Boolean:
+            cast = text.str.to_lowercase().replace_strict({"true": True, "false": False}, default=None, return_dtype=pl.Boolean)
+        elif dtype.is_temporal():
+            cast = text.str.strptime(dtype, strict=False)
+        else:
+            cast = text.cast(dtype, strict=False)
+    except pl.exceptions.PolarsError:
+        return values
+    if (cast.is_null() & ~empty).any():
+        return values
+    return cast
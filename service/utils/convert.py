@@ -1,35 +1,68 @@
 import polars as pl
-import pandas as pd
+from service.utils.r_frame import push_frame, script_columns
 
-def get_data(parent, df=None):
+def get_data(parent, df=None, script=None, frame_name="data"):
     """
     Retrieves data from the parent model or uses the provided dataframe, processes it, and converts it to an R dataframe.
     Args:
         parent: An object that contains a model with a `get_data` method.
-        df: A pandas dataframe to be used instead of retrieving data from the parent model. Default is None.
+        df: A Polars dataframe to be used instead of retrieving data from the parent model. Default is None.
+        script: The R script about to be run on the data. When given, only the columns it refers to are
+            sent (see `service.utils.r_frame.script_columns`). Default is None, sending every column.
+        frame_name: The name the data is bound to in the R script. Default is "data".
     Returns:
         None. The resulting R dataframe is stored in the R global environment as 'r_df'.
     Process:
-        1. Imports necessary modules from `rpy2` and `rpy2_arrow.polars`.
-        2. Retrieves data from the parent model or uses the provided dataframe.
-        3. Replaces spaces in column names with underscores.
-        4. Drops columns with a high percentage of null values (threshold: 30%).
-        5. Converts the dataframe to a pandas dataframe if columns are dropped.
-        6. Converts the pandas dataframe to a polars dataframe.
-        7. Converts the polars dataframe to an R dataframe and assigns it to the R global environment.
+        1. Retrieves data from the parent model or uses the provided dataframe.
+        2. Keeps only the columns referenced by `script`.
+        3. Casts the columns without an R counterpart (Null-typed and categorical columns) to strings.
+        4. Converts the polars dataframe to an R dataframe through Arrow and assigns it to the R global environment.
+        Steps 3 and 4 are skipped when a frame with the same content is already resident in the
+        R session (see `service.utils.r_cache`), in which case the cached R dataframe is reused.
+        After an edit in the table only the modified columns are converted and sent to R.
+        See `service.utils.r_frame.push_frame`.
     """
     
-    import rpy2.robjects as ro
-    import rpy2_arrow.polars as rpy2polars
-    
     if df is None:
         df = parent.model.get_data()
+        models = (getattr(parent, 'model', None),)
+    else:
+        models = (getattr(parent, 'model1', None), getattr(parent, 'model2', None))
+    
+    push_frame(df, models, columns=script_columns(script, df.columns, frame_name))
+
+R_AS_ARROW_TABLE = """function(table) {
+    table <- as.data.frame(table, stringsAsFactors = FALSE)
+    table[] <- lapply(table, function(column) if (is.factor(column)) as.character(column) else column)
+    arrow::as_arrow_table(table)
+}"""
+
+def rarrow_to_polars(table):
+    """
+    Converts an R Arrow table to a Polars DataFrame without going through pandas.
+    The columns cross through the Arrow C data interface and are kept in their chunks, so the
+    buffers built by R are used as they are instead of being copied column by column.
+    Args:
+        table: An R Arrow Table (e.g. made by `arrow::as_arrow_table`).
+    Returns:
+        pl.DataFrame: The table as a Polars DataFrame.
+    """
+    
+    from rpy2_arrow.arrow import rarrow_to_py_table
+    
+    return pl.from_arrow(rarrow_to_py_table(table), rechunk=False)
+
+def from_r(expression):
+    """
+    Evaluates an R expression giving a data.frame (or anything `as.data.frame` accepts) and returns
+    it as a Polars DataFrame through Arrow, the return path matching `get_data`.
+    Factor columns become strings; row names are dropped, so keep them as a column in R when needed.
+    Args:
+        expression (str): The R expression, e.g. the name of a data.frame in the global environment.
+    Returns:
+        pl.DataFrame: The result as a Polars DataFrame.
+    """
+    
+    import rpy2.robjects as ro
     
-    null_threshold = 0.3 * len(df)
-    cols_to_drop = [col for col in df.columns if df[col].null_count() >= null_threshold]
-    if len(cols_to_drop) > 0:
-        df_pandas = df.to_pandas()
-        df = pl.from_pandas(df_pandas)
-    with rpy2polars.converter.context() as cv_ctx:
-        r_df = cv_ctx.py2rpy(df)
-        ro.globalenv['r_df'] = r_df
\ No newline at end of file
+    return rarrow_to_polars(ro.r(f'({R_AS_ARROW_TABLE})({expression})'))
@@ -0,0 +1,132 @@
+import gzip
+import os
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Save dialog filters and the format each one is written in
+EXPORT_FORMATS = {
+    "CSV Files (*.csv)": "csv",
+    "Compressed CSV Files (*.csv.gz)": "csv.gz",
+    "Excel Files (*.xlsx)": "xlsx",
+    "JSON Files (*.json)": "ndjson",
+    "Text Files (*.txt)": "tsv",
+    "Parquet Files (*.parquet)": "parquet",
+    "Arrow IPC Files (*.arrow *.feather *.ipc)": "ipc",
+}
+EXPORT_FILTERS = ";;".join(EXPORT_FORMATS)
+
+
+def frame_batches(scan, batch_size):
+    """
+    Collects a LazyFrame as a sequence of DataFrames of about `batch_size` rows.
+    The streaming engine is used where available (`collect_batches`), so a lazy scan of a file is read
+    once, batch by batch; otherwise the frame is collected and sliced.
+    Args:
+        scan (pl.LazyFrame): The data, e.g. `TableModel.scan()`.
+        batch_size (int): The number of rows per batch.
+    Yields:
+        pl.DataFrame: The next batch of rows.
+    """
+
+    if hasattr(scan, "collect_batches"):
+        yield from scan.collect_batches(chunk_size=batch_size)
+    else:
+        yield from scan.collect().iter_slices(batch_size)
+
+
+class FileExporter(QObject):
+    """
+    Writes a LazyFrame to a file in a background thread, batch by batch.
+    Delimited (optionally gzip-compressed) and line-delimited JSON files are written in batches of
+    `batch_size` rows and report the rows written after every batch. Parquet (zstd) and Arrow IPC
+    (uncompressed, to stay memory-mappable) files are streamed by `sink_parquet` / `sink_ipc` and Excel
+    files are written at once, without intermediate progress. The file is written next to the
+    destination and only replaces it once complete, so a cancelled or failed export leaves the
+    destination untouched, and the data may be a scan of the file being overwritten.
+    Attributes:
+        progress (pyqtSignal): Emitted after every batch with the rows written, the rows written and the total rows
+                               (the arguments of `FileProgressWidget.update_progress`).
+        finished (pyqtSignal): Emitted once with the error (None on success) and whether the export was cancelled.
+        file_path (str): The path of the file being written.
+    Methods:
+        start():
+            Starts writing in a background thread.
+        cancel():
+            Asks the worker to stop after the current batch.
+        is_cancelled():
+            Checks if the export was cancelled.
+    """
+
+    progress = pyqtSignal(object, object, object)
+    finished = pyqtSignal(object, bool)
+
+    def __init__(self, scan, file_path, file_format, total_rows=0, batch_size=100_000, parent=None):
+        """
+        Args:
+            scan (pl.LazyFrame): The data to write, e.g. `TableModel.scan()`.
+            file_path (str): The path of the file to write.
+            file_format (str): One of the values of `EXPORT_FORMATS`.
+            total_rows (int): The number of rows of the data, for the progress.
+            batch_size (int): The number of rows written at once.
+        """
+        super().__init__(parent)
+        self.scan = scan
+        self.file_path = file_path
+        self.file_format = file_format
+        self.total_rows = total_rows
+        self.batch_size = batch_size
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="File Exporter", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def _run(self):
+        temp_path = f"{self.file_path}.tmp"
+        error = None
+        try:
+            self._write(temp_path)
+            if not self._cancel.is_set():
+                os.replace(temp_path, self.file_path)
+        except Exception as e:
+            error = e
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.finished.emit(error, self._cancel.is_set())
+
+    def _write(self, path):
+        if self.file_format == "parquet":
+            self.scan.sink_parquet(path, compression="zstd")
+        elif self.file_format == "ipc":
+            self.scan.sink_ipc(path, compression="uncompressed")
+        elif self.file_format == "xlsx":
+            self.scan.collect().write_excel(path)
+        else:
+            self._write_batches(path)
+
+    def _write_batches(self, path):
+        opener = gzip.open if self.file_format == "csv.gz" else open
+        separator = "\t" if self.file_format == "tsv" else ","
+        rows = 0
+        with opener(path, "wb") as file:
+            for batch in frame_batches(self.scan, self.batch_size):
+                if self._cancel.is_set():
+                    return
+                if self.file_format == "ndjson":
+                    batch.write_ndjson(file)
+                else:
+                    batch.write_csv(file, separator=separator, include_header=rows == 0)
+                rows += batch.height
+                self.progress.emit(rows, rows, self.total_rows)
+            if rows == 0 and self.file_format != "ndjson":
+                # Keep the header of an empty frame
+                self.scan.collect().write_csv(file, separator=separator)
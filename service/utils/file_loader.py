@@ -0,0 +1,145 @@
+import os
+import threading
+
+import polars as pl
+from PyQt6.QtCore import QObject, pyqtSignal
+
+NULL_VALUES = ["NA", "NULL", "na", "null"]
+
+
+def scan_delimited(file_path, separator=",", has_header=True, schema_overrides=None):
+    """
+    Scans a delimited file, naming the columns "Column 1", "Column 2", ... when it has no header.
+    Args:
+        file_path (str): The path of the file.
+        separator (str): The field separator.
+        has_header (bool): Whether the first row holds the column names.
+        schema_overrides (dict, optional): Column types by (final) column name, used instead of the
+                                           inferred types (see `service.utils.schema_cache`).
+    Returns:
+        pl.LazyFrame: The scan of the file.
+    """
+
+    scan = pl.scan_csv(file_path, **_read_options(separator, has_header, schema_overrides))
+    return scan if has_header else _name_columns(scan, scan.collect_schema().names())
+
+
+def csv_batches(file_path, separator=",", has_header=True, batch_size=50_000, schema_overrides=None):
+    """
+    Reads a delimited file as a sequence of DataFrames of about `batch_size` rows.
+    The file is read with the streaming engine (`scan_delimited(...).collect_batches()`), so every batch
+    has the schema inferred for the whole scan. Polars versions without `collect_batches` fall back
+    to `pl.read_csv_batched`, whose batches are concatenated with relaxed dtypes by the caller.
+    Args:
+        file_path (str): The path of the file.
+        separator (str): The field separator.
+        has_header (bool): Whether the first row holds the column names.
+        batch_size (int): The number of rows per batch.
+        schema_overrides (dict, optional): Column types by column name (see `scan_delimited`).
+    Yields:
+        pl.DataFrame: The next batch of rows.
+    """
+
+    scan = scan_delimited(file_path, separator, has_header, schema_overrides)
+    if hasattr(scan, "collect_batches"):
+        yield from scan.collect_batches(chunk_size=batch_size)
+        return
+    reader = pl.read_csv_batched(file_path, batch_size=batch_size, **_read_options(separator, has_header, schema_overrides))
+    while True:
+        batches = reader.next_batches(1)
+        if not batches:
+            return
+        yield batches[0] if has_header else _name_columns(batches[0], batches[0].columns)
+
+
+def _read_options(separator, has_header, schema_overrides):
+    if schema_overrides and not has_header:
+        # Polars names the columns of a file without header "column_1", "column_2", ...
+        schema_overrides = {name.replace("Column ", "column_"): dtype for name, dtype in schema_overrides.items()}
+    return dict(
+        separator=separator, ignore_errors=True, has_header=has_header, null_values=NULL_VALUES,
+        schema_overrides=schema_overrides or None
+    )
+
+
+def _name_columns(frame, names):
+    return frame.rename({name: f"Column {i+1}" for i, name in enumerate(names)})
+
+
+def bytes_per_row(file_path, sample_size=1024 * 1024):
+    """
+    Estimates the average number of bytes of a row of a delimited file from its first `sample_size` bytes.
+    Returns:
+        float: The estimated row size, or 0 when the file is empty.
+    """
+
+    with open(file_path, "rb") as file:
+        sample = file.read(sample_size)
+    return len(sample) / max(sample.count(b"\n"), 1) if sample else 0
+
+
+class FileLoader(QObject):
+    """
+    Reads a file in a background thread and streams it to the GUI thread batch by batch.
+    The signals are emitted from the worker thread and delivered in order to the slots of the GUI
+    thread, so the first rows can be shown (and browsed) while the rest of the file is still read.
+    Attributes:
+        batch_loaded (pyqtSignal): Emitted with every batch (pl.DataFrame) read.
+        progress (pyqtSignal): Emitted after every batch with the rows read, the (estimated) bytes read and
+                               the size of the file. The size is 0 when the progress cannot be estimated.
+        finished (pyqtSignal): Emitted once with the whole data (None when cancelled or failed) and the error.
+        file_path (str): The path of the file being read.
+    Methods:
+        start():
+            Starts reading in a background thread.
+        cancel():
+            Asks the worker to stop after the current batch.
+        is_cancelled():
+            Checks if the load was cancelled.
+    """
+
+    batch_loaded = pyqtSignal(object)
+    progress = pyqtSignal(object, object, object)
+    finished = pyqtSignal(object, object)
+
+    def __init__(self, read, file_path, row_size=0, parent=None):
+        """
+        Args:
+            read (callable): Called in the worker thread, returns an iterable of DataFrames (e.g. `csv_batches`).
+            file_path (str): The path of the file being read.
+            row_size (float): The estimated bytes of a row (see `bytes_per_row`), 0 if unknown.
+        """
+        super().__init__(parent)
+        self.read = read
+        self.file_path = file_path
+        self.row_size = row_size
+        self.total_bytes = os.path.getsize(file_path) if row_size else 0
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="File Loader", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def _run(self):
+        frames, rows, error = [], 0, None
+        try:
+            for batch in self.read():
+                if self._cancel.is_set():
+                    break
+                frames.append(batch)
+                rows += batch.height
+                self.batch_loaded.emit(batch)
+                self.progress.emit(rows, min(int(rows * self.row_size), self.total_bytes), self.total_bytes)
+        except Exception as e:
+            error = e
+        data = None
+        if error is None and not self._cancel.is_set():
+            data = pl.concat(frames, how="vertical_relaxed") if frames else pl.DataFrame()
+        self.finished.emit(data, error)
@@ -0,0 +1,236 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import polars as pl
+
+
+def column_fingerprint(series):
+    """
+    Computes a content fingerprint for a single Polars Series.
+    Args:
+        series (pl.Series): The column to fingerprint.
+    Returns:
+        str: A hexadecimal digest of the column name, dtype, length and values.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((series.name, str(series.dtype), len(series))).encode())
+    if len(series) > 0:
+        digest.update(series.hash(seed=0).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def column_fingerprints(df):
+    """
+    Computes the fingerprint of every column of a Polars DataFrame.
+    Args:
+        df (pl.DataFrame): The DataFrame to fingerprint.
+    Returns:
+        dict: A mapping of column name to column fingerprint, in column order.
+    """
+
+    return {name: column_fingerprint(df[name]) for name in df.columns}
+
+
+def combine_fingerprints(fingerprints, height):
+    """
+    Combines per-column fingerprints into a single frame fingerprint.
+    Args:
+        fingerprints (dict): A mapping of column name to column fingerprint, in column order.
+        height (int): The number of rows of the frame.
+    Returns:
+        str: A hexadecimal digest identifying the frame.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((height, list(fingerprints.items()))).encode())
+    return digest.hexdigest()
+
+
+def fingerprint_frame(df):
+    """
+    Computes a content fingerprint for a Polars DataFrame.
+    The fingerprint combines the column names, dtypes, the number of rows and an
+    order-sensitive digest of every column, so two frames share a fingerprint only
+    when they hold the same values in the same layout.
+    Args:
+        df (pl.DataFrame): The DataFrame to fingerprint.
+    Returns:
+        str: A hexadecimal digest identifying the content of the frame.
+    """
+
+    return combine_fingerprints(column_fingerprints(df), df.height)
+
+
+def model_fingerprints(df, *models):
+    """
+    Reuses the column fingerprints tracked by table models for a frame derived from them.
+    The services build the frame sent to R by horizontally concatenating the table models,
+    keeping the columns the script needs and dropping rows that are entirely null. When no
+    row was dropped, the frame holds model columns as they are, so their tracked fingerprints
+    (only dirty columns are rehashed) can be used instead of hashing the frame again.
+    Models contributing no column are skipped; models still backed by a lazy scan are not
+    fingerprinted, as that would materialize them. A model only reuses the fingerprints it tracks for
+    the very frame object it holds (see `TableModel.mark_dirty`), so a frame replaced without marking
+    its columns dirty is hashed again rather than pushed to R as stale data.
+    Args:
+        df (pl.DataFrame): The frame about to be sent to R.
+        *models: The table models `df` was built from, in concatenation order.
+    Returns:
+        dict or None: The column fingerprints of `df`, or None if they cannot be derived from the models.
+    """
+
+    fingerprints = {}
+    for model in models:
+        if model is None or not hasattr(model, "column_fingerprints"):
+            return None
+        schema = model.schema() if hasattr(model, "schema") else model.get_data().schema
+        columns = [name for name in df.columns if name in schema]
+        if not columns:
+            continue
+        if getattr(model, "is_lazy", lambda: False)():
+            return None
+        data = model.get_data()
+        if data.height != df.height or any(schema[name] != df.schema[name] for name in columns):
+            return None
+        fingerprints.update(model.column_fingerprints(columns))
+    if list(fingerprints) != df.columns:
+        return None
+    return fingerprints
+
+
+class RDataCache:
+    """
+    LRU cache of R data.frames that were already materialized from Polars frames.
+    Converted frames are kept resident in a private R environment (outside the global
+    environment, so scripts that clean `ls()` do not drop them) and keyed by the frame
+    fingerprint. When a frame with the same content is pushed again, the resident R
+    object is rebound instead of converting the whole frame once more. When only some
+    columns differ from a resident frame with the same number of rows, only those
+    columns are converted and replaced (or appended) in a copy of the resident frame.
+    Attributes:
+        max_entries (int): The maximum number of frames kept resident in the R session.
+        hits (int): Number of pushes served from the cache.
+        misses (int): Number of pushes that required a conversion.
+        converted_columns (int): Number of columns converted to R so far.
+    Methods:
+        push(df, convert, name='r_df', fingerprints=None):
+            Binds the R data.frame for `df` to `name` in the R global environment.
+        clear():
+            Removes every resident frame from the R session.
+    """
+
+    _ASSEMBLE = """
+    function(base, delta, cols) {
+        if (length(delta) > 0) base[names(delta)] <- delta
+        base[cols]
+    }
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.converted_columns = 0
+        self._entries = OrderedDict()
+        self._env = None
+        self._assemble = None
+        self._counter = 0
+        self._lock = threading.RLock()
+
+    def _get_env(self):
+        import rpy2.robjects as ro
+        if self._env is None:
+            self._env = ro.r('new.env(parent = emptyenv())')
+            self._assemble = ro.r(self._ASSEMBLE)
+        return self._env
+
+    def _remove(self, slot):
+        import rpy2.robjects as ro
+        ro.r['rm'](list=slot, envir=self._get_env())
+
+    def _evict(self):
+        while len(self._entries) > max(self.max_entries, 0):
+            _, (slot, _, _) = self._entries.popitem(last=False)
+            self._remove(slot)
+
+    def _closest_entry(self, fingerprints, height):
+        best, best_shared = None, 0
+        for slot, entry_fingerprints, entry_height in self._entries.values():
+            if entry_height != height:
+                continue
+            shared = sum(1 for name, fp in fingerprints.items() if entry_fingerprints.get(name) == fp)
+            if shared > best_shared:
+                best, best_shared = (slot, entry_fingerprints), shared
+        return best
+
+    def _materialize(self, df, convert, fingerprints):
+        import rpy2.robjects as ro
+        env = self._get_env()
+        base = self._closest_entry(fingerprints, df.height)
+        if base is None:
+            self.converted_columns += df.width
+            return ro.r['as.data.frame'](convert(df))
+        base_slot, base_fingerprints = base
+        changed = [name for name, fp in fingerprints.items() if base_fingerprints.get(name) != fp]
+        if changed:
+            delta = ro.r['as.data.frame'](convert(df.select(changed)))
+        else:
+            delta = ro.NULL
+        self.converted_columns += len(changed)
+        return self._assemble(env[base_slot], delta, ro.StrVector(df.columns))
+
+    def push(self, df, convert, name='r_df', fingerprints=None):
+        """
+        Binds the R data.frame corresponding to `df` to `name` in the R global environment.
+        Args:
+            df (pl.DataFrame): The Polars DataFrame to be made available in R.
+            convert (callable): A function converting a Polars DataFrame to an R object, only called
+                                for the columns that are not already resident in the R session.
+            name (str): The name of the binding in the R global environment. Default is 'r_df'.
+            fingerprints (dict, optional): Precomputed column fingerprints of `df` (see
+                                           `TableModel.column_fingerprints`). Computed when omitted.
+        Returns:
+            bool: True if the frame was served from the cache, False if it had to be converted.
+        """
+
+        import rpy2.robjects as ro
+        if fingerprints is None:
+            fingerprints = column_fingerprints(df)
+        key = combine_fingerprints(fingerprints, df.height)
+        with self._lock:
+            env = self._get_env()
+            entry = self._entries.get(key)
+            hit = entry is not None
+            if hit:
+                self._entries.move_to_end(key)
+                slot = entry[0]
+                self.hits += 1
+            else:
+                self._counter += 1
+                slot = f"frame_{self._counter}"
+                env[slot] = self._materialize(df, convert, fingerprints)
+                self._entries[key] = (slot, dict(fingerprints), df.height)
+                self.misses += 1
+            ro.globalenv[name] = env[slot]
+            self._evict()
+            return hit
+
+    def clear(self):
+        """Removes every resident frame from the R session."""
+        with self._lock:
+            while self._entries:
+                _, (slot, _, _) = self._entries.popitem(last=False)
+                self._remove(slot)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, df):
+        if not isinstance(df, pl.DataFrame):
+            return False
+        return fingerprint_frame(df) in self._entries
+
+
+r_data_cache = RDataCache()
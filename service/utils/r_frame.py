@@ -0,0 +1,210 @@
+import re
+
+import polars as pl
+from service.utils.r_cache import r_data_cache, model_fingerprints, column_fingerprints
+
+
+# The line of the model scripts replacing spaces with underscores in the column names
+_RENAME_LINE = re.compile(r'names\((\w+)\)\s*<-\s*gsub\(" ", "_", names\(\1\)\)')
+
+# Strings (kept) and comments (dropped) of an R script
+_STRING_OR_COMMENT = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|#[^\n]*')
+
+# Constructs through which a script can use columns it does not name
+_UNRESOLVED = re.compile(
+    r'(?<![\w.])\.(?![\w.])'                       # `.` (all the other columns in a formula, the piped data)
+    r'|\[\[\s*(?!["\'])'                             # `data[[v]]`, `data[[2]]`
+    r'|(?<![\w.])\.data\b'                          # `.data[[v]]` of dplyr
+    r'|(?<![\w.])(?:paste0|sprintf|get|mget|parse|as\.name|as\.symbol'
+    r'|everything|starts_with|ends_with|contains|matches|num_range|all_of|any_of|where)\s*\('
+)
+
+# `paste` builds names too, unless it assembles a formula from names given in full (e.g. `rhs_vars`)
+_PASTE = re.compile(r'(?<![\w.])paste\s*\(')
+_FORMULA_STRING = re.compile(r'"[^"\n]*~[^"\n]*"|\'[^\'\n]*~[^\'\n]*\'')
+
+
+_QUOTED = r'(?:"[^"\n]*"|\'[^\'\n]*\'|`[^`\n]*`)'
+
+
+def _frame_uses(frame_name):
+    """
+    Returns the patterns of the uses of the frame bound as `frame_name` in R that name the columns they
+    read (or keep every column for functions reading the named columns only, as `lm(y ~ x, data=data)`).
+    """
+    name = rf'(?<![\w.$@]){re.escape(frame_name)}(?![\w.])'
+    return [
+        rf'(?<![\w.])data\s*=\s*{name}\s*(?=[,)])',                              # `lm(..., data=data)`
+        rf'(?<![\w.])(?:ggplot|pivot_longer|with|cbind)\(\s*{name}\s*(?=,)',      # `ggplot(data, aes(x))`
+        rf'(?<![\w.])model\.matrix\([^()\n]*,\s*{name}\s*\)',                   # `model.matrix(~x - 1, data)`
+        rf'{name}\s*\$',                                                          # `data$x`
+        rf'{name}\s*\[\[\s*{_QUOTED}\s*\]\]',                                     # `data[["x"]]`
+        rf'{name}\s*\[\s*(?:,\s*)?(?:{_QUOTED}|c\(\s*{_QUOTED}(?:\s*,\s*{_QUOTED})*\s*\))\s*\]',  # `data[, c("x", "y")]`
+        rf'{name}\s*\[[^\[\]\n]*,\s*\]',                                          # `data[!is.na(data$w), ]`
+        rf'{name}\s*(?=<<?-|=(?!=))',                                             # assigned, or an argument name
+    ]
+
+
+def _unresolved(script, frame_name=None):
+    """Returns True if `script` may use columns of the data without naming them."""
+    script = _STRING_OR_COMMENT.sub(lambda m: "" if m.group().startswith("#") else m.group(), script)
+    script = _RENAME_LINE.sub("", script)
+    if _UNRESOLVED.search(_STRING_OR_COMMENT.sub('""', script)):
+        return True
+    if any(_PASTE.search(line) and not _FORMULA_STRING.search(line) for line in script.splitlines()):
+        return True
+    if frame_name:
+        for pattern in _frame_uses(frame_name):
+            script = re.sub(pattern, "", script)
+        # Any other use of the frame (`summary(data)`, `sapply(data, mean)`, `ncol(data)`, `data[, 2:4]`, ...)
+        return re.search(rf'(?<![\w.$@]){re.escape(frame_name)}(?![\w.])', _STRING_OR_COMMENT.sub('""', script)) is not None
+    return False
+
+
+def script_columns(script, columns, frame_name="data"):
+    """
+    Finds the columns of a frame that an R script refers to.
+    A column is referenced when its name, or its name with spaces replaced by underscores (see the
+    `names(data) <- gsub(" ", "_", names(data))` line of the model scripts), appears in the script as
+    an R identifier or as the content of a quoted or backquoted name. Generated scripts name every
+    variable assigned in the dialog, and edits to the script are followed as long as they name the
+    columns they use. When the script may use columns without naming them (a `.` formula, `data[[v]]`,
+    names built with `paste0` or `get`, tidyselect helpers, ...) every column is sent, and so it is
+    when the frame itself is used other than through named columns (`data$x`, `data[["x"]]`,
+    `data[, c("x", "y")]`, `data=data` of a model, ...), e.g. `summary(data)` or `data[, 2:4]`.
+    Args:
+        script (str): The R script about to be run on the frame.
+        columns (list): The columns of the frame.
+        frame_name (str): The name the frame is bound to in R. Default is "data".
+    Returns:
+        list or None: The referenced columns in frame order, or None when every column should be sent
+                      (no script, a construct using columns it does not name, or no column named at all).
+    """
+
+    if not script or _unresolved(script, frame_name):
+        return None
+    names = set(re.findall(r'[\w.]+', script))
+    for quoted in re.findall(r'"([^"\n]*)"|\'([^\'\n]*)\'|`([^`\n]*)`', script):
+        names.update(quoted)
+    referenced = [column for column in columns if column in names or column.replace(" ", "_") in names]
+    return referenced or None
+
+
+def project_frame(df, script, frame_name="data"):
+    """
+    Keeps only the columns of `df` that `script` refers to (see `script_columns`).
+    Args:
+        df (pl.DataFrame): The frame about to be sent to R.
+        script (str): The R script about to be run on the frame.
+        frame_name (str): The name the frame is bound to in R. Default is "data".
+    Returns:
+        pl.DataFrame: The projected frame, or `df` itself when every column is needed.
+    """
+
+    columns = script_columns(script, df.columns, frame_name)
+    return df if columns is None else df.select(columns)
+
+
+def collect_for_script(frames, script, drop="all", frame_name="data"):
+    """
+    Collects the data an R script runs on, with the column selection and row filter pushed down to the scans.
+    Every frame is projected on the columns `script` refers to (see `script_columns`) before it is
+    collected, so on a lazy scan of a large file only those columns are read. With a single frame the
+    row filter is pushed down to the scan as well; several frames are collected and concatenated
+    horizontally (the shorter ones padded with nulls, as for the two sheets) before the rows are filtered.
+    Args:
+        frames (pl.LazyFrame or list): The data, e.g. `TableModel.scan()`, or a list of LazyFrames to be
+                                       concatenated horizontally.
+        script (str): The R script about to be run on the data.
+        drop (str or None): "all" drops the rows where every selected column is null (blank rows),
+                            "any" drops the rows with a null in a selected column, None keeps every row.
+        frame_name (str): The name the data is bound to in R. Default is "data".
+    Returns:
+        pl.DataFrame: The collected frame.
+    """
+
+    frames = [frames] if isinstance(frames, pl.LazyFrame) else list(frames)
+    names = [frame.collect_schema().names() for frame in frames]
+    columns = script_columns(script, [name for frame_names in names for name in frame_names], frame_name)
+    if columns is not None:
+        frames = [
+            frame.select([name for name in frame_names if name in columns])
+            for frame, frame_names in zip(frames, names)
+            if any(name in columns for name in frame_names)
+        ]
+    if len(frames) == 1:
+        frame = frames[0]
+    else:
+        collected = [frame.collect() for frame in frames]
+        height = max(df.height for df in collected)
+        frame = pl.concat([df.vstack(df.clear(height - df.height)) for df in collected], how="horizontal").lazy()
+    if drop == "all":
+        frame = frame.filter(~pl.all_horizontal(pl.all().is_null()))
+    elif drop == "any":
+        frame = frame.drop_nulls()
+    return frame.collect()
+
+
+def normalize_for_r(df):
+    """
+    Casts the columns R cannot receive through Arrow as they are, leaving every other column untouched.
+    Null-typed columns (columns where no value was ever entered) become string columns, so they
+    arrive in R as character NA columns, and categorical or enum columns become plain strings.
+    Only the cast columns are rebuilt; the other columns keep sharing their buffers with `df`.
+    Args:
+        df (pl.DataFrame): The Polars DataFrame to be sent to R.
+    Returns:
+        pl.DataFrame: `df` itself if no column needs a cast, otherwise a frame with the cast columns.
+    """
+
+    casts = {
+        name: pl.Utf8 for name, dtype in df.schema.items()
+        if dtype == pl.Null or isinstance(dtype, (pl.Categorical, pl.Enum))
+    }
+    if not casts:
+        return df
+    return df.cast(casts)
+
+
+def polars_to_r(df):
+    """
+    Converts a Polars DataFrame to an R object through Arrow, after `normalize_for_r`.
+    The Polars buffers are exported through the Arrow C data interface, so no intermediate
+    copy of the frame (e.g. a pandas DataFrame) is made on the Python side.
+    Args:
+        df (pl.DataFrame): The Polars DataFrame to be converted.
+    Returns:
+        The R object built by the rpy2_arrow Polars converter.
+    """
+
+    import rpy2_arrow.polars as rpy2polars
+
+    with rpy2polars.converter.context() as cv_ctx:
+        return cv_ctx.py2rpy(normalize_for_r(df))
+
+
+def push_frame(df, models=(), columns=None, name='r_df'):
+    """
+    Makes a Polars DataFrame available in the R global environment, through the R data cache.
+    The frame is pruned to `columns`, normalized and pushed through Arrow in one pass: the
+    selection and the casts only touch column references and the pruned or untouched columns
+    are never copied, so the Python side stays close to one copy of the frame.
+    Args:
+        df (pl.DataFrame): The Polars DataFrame to be sent to R.
+        models (tuple): The table models `df` was built from, used to reuse their column fingerprints
+                        (see `service.utils.r_cache.model_fingerprints`).
+        columns (list, optional): The columns to send. Every column is sent when omitted.
+        name (str): The name of the binding in the R global environment. Default is 'r_df'.
+    Returns:
+        bool: True if the frame was served from the cache, False if it had to be converted.
+    """
+
+    fingerprints = model_fingerprints(df, *models)
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+        df = df.select(columns)
+        if fingerprints is not None:
+            fingerprints = {column: fingerprints[column] for column in columns}
+    if fingerprints is None:
+        fingerprints = column_fingerprints(df)
+    return r_data_cache.push(df, polars_to_r, name=name, fingerprints=fingerprints)
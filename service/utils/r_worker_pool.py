@@ -0,0 +1,298 @@
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import polars as pl
+
+READY_MARKER = "__SAE_WORKER_READY__"
+DONE_MARKER = "__SAE_JOB_DONE__"
+QUIT_COMMAND = "__SAE_WORKER_QUIT__"
+
+WORKER_LOOP = f"""
+args <- commandArgs(trailingOnly = TRUE)
+suppressMessages(library(arrow))
+for (pkg in strsplit(if (length(args) > 0) args[1] else "", ",")[[1]]) {{
+    if (nzchar(pkg)) suppressMessages(library(pkg, character.only = TRUE))
+}}
+con <- file("stdin", open = "r")
+cat("{READY_MARKER}\\n")
+flush(stdout())
+repeat {{
+    job <- readLines(con, n = 1)
+    if (length(job) == 0 || identical(job, "{QUIT_COMMAND}")) break
+    status <- tryCatch({{
+        source(job, local = new.env(parent = globalenv()))
+        "OK"
+    }}, error = function(e) paste("ERROR", gsub("[\\r\\n]+", " ", conditionMessage(e))))
+    graphics.off()
+    cat("\\n{DONE_MARKER} ", status, "\\n", sep = "")
+    flush(stdout())
+}}
+"""
+
+
+def find_rscript():
+    """
+    Locates the Rscript executable, preferring the R installation pointed to by R_HOME.
+    Returns:
+        str or None: The path to Rscript, or None if it cannot be found.
+    """
+
+    executable = "Rscript.exe" if os.name == "nt" else "Rscript"
+    r_home = os.environ.get("R_HOME")
+    if r_home:
+        for candidate in (os.path.join(r_home, "bin", executable),
+                          os.path.join(r_home, "bin", "x64", executable)):
+            if os.path.isfile(candidate):
+                return candidate
+    return shutil.which(executable)
+
+
+def _r_path(path):
+    return path.replace("\\", "/")
+
+
+@dataclass
+class RJob:
+    """
+    A unit of work executed by an R worker process.
+    Attributes:
+        script (str): The R script to be executed.
+        inputs (dict): Polars DataFrames shipped to the worker, keyed by the R variable name they are bound to.
+        outputs (list): Names of R objects returned to Python as Polars DataFrames (via `as.data.frame`).
+        on_output (callable, optional): Called with each line printed by the worker while the job runs.
+    """
+
+    script: str
+    inputs: Dict[str, pl.DataFrame] = field(default_factory=dict)
+    outputs: List[str] = field(default_factory=list)
+    on_output: Optional[Callable[[str], None]] = None
+    cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+    _worker: Optional["RWorker"] = field(default=None, repr=False)
+
+    def render(self, directory):
+        """
+        Writes the inputs as Arrow IPC files into `directory` and returns the R script running the job.
+        Args:
+            directory (str): The directory for the input and output Arrow IPC files.
+        Returns:
+            tuple: The R script (str) and a mapping of output name to the Arrow IPC file it is written to.
+        """
+
+        lines = []
+        for name, frame in self.inputs.items():
+            path = os.path.join(directory, f"input_{name}.arrow")
+            frame.write_ipc(path, compression="uncompressed", compat_level=pl.CompatLevel.oldest())
+            lines.append(f'{name} <- as.data.frame(arrow::read_ipc_file("{_r_path(path)}"))')
+        lines.append(self.script)
+        output_paths = {}
+        for name in self.outputs:
+            path = os.path.join(directory, f"output_{name}.arrow")
+            output_paths[name] = path
+            lines.append(f'arrow::write_ipc_file(as.data.frame({name}), "{_r_path(path)}")')
+        return "\n".join(lines) + "\n", output_paths
+
+
+@dataclass
+class RJobResult:
+    """
+    The result of an R job.
+    Attributes:
+        outputs (dict): The requested R objects as Polars DataFrames, keyed by name.
+        console (str): Everything the worker printed while running the job.
+        error (str, optional): The R error message, or None if the job succeeded.
+    """
+
+    outputs: Dict[str, pl.DataFrame] = field(default_factory=dict)
+    console: str = ""
+    error: Optional[str] = None
+
+
+class RWorker:
+    """
+    A long-running Rscript process that executes job scripts read from its standard input.
+    Packages are loaded once when the process starts, so jobs only pay for their own work.
+    """
+
+    def __init__(self, rscript, packages=()):
+        fd, self.loop_path = tempfile.mkstemp(prefix="sae_worker_", suffix=".R")
+        with os.fdopen(fd, "w") as file:
+            file.write(WORKER_LOOP)
+        self.process = subprocess.Popen(
+            [rscript, self.loop_path, ",".join(packages)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1,
+        )
+        startup = []
+        for line in self.process.stdout:
+            if line.rstrip("\n") == READY_MARKER:
+                return
+            startup.append(line)
+        self.close()
+        raise RuntimeError("R worker failed to start:\n" + "".join(startup))
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def run(self, script_path, on_output=None):
+        """
+        Runs the job script and blocks until the worker reports completion.
+        Returns:
+            tuple: The console output (str) and the R error message (str or None).
+        """
+
+        self.process.stdin.write(_r_path(script_path) + "\n")
+        self.process.stdin.flush()
+        console = []
+        for line in self.process.stdout:
+            text = line.rstrip("\n")
+            if text.startswith(DONE_MARKER):
+                status = text[len(DONE_MARKER):].strip()
+                if console and console[-1] == "":
+                    console.pop()
+                return "\n".join(console), None if status == "OK" else status[len("ERROR"):].strip()
+            console.append(text)
+            if on_output is not None:
+                on_output(text)
+        raise RuntimeError("R worker terminated unexpectedly:\n" + "\n".join(console))
+
+    def kill(self):
+        if self.is_alive():
+            self.process.kill()
+
+    def close(self):
+        try:
+            if self.is_alive():
+                self.process.stdin.write(QUIT_COMMAND + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired, ValueError):
+            self.kill()
+        finally:
+            if os.path.exists(self.loop_path):
+                os.remove(self.loop_path)
+
+
+class RWorkerPool:
+    """
+    A pool of R worker processes with a job queue.
+    Each job ships its input frames to a worker as Arrow IPC files and receives its
+    outputs back as Arrow IPC files read by Polars, so independent jobs (a long HB run,
+    a correlation matrix, a histogram) run in parallel instead of being serialized
+    through the interpreter embedded by rpy2.
+    Attributes:
+        size (int): The maximum number of worker processes.
+        packages (tuple): R packages loaded by every worker on startup.
+    Methods:
+        is_available():
+            Returns True if an Rscript executable was found and no worker failed to start (R or one of the
+            packages, e.g. arrow, missing), so callers can fall back to the embedded R interpreter.
+        submit(job):
+            Queues a job and returns a Future resolving to an RJobResult.
+        run(job):
+            Runs a job and waits for its result.
+        cancel(job):
+            Cancels a queued job or kills the worker running it.
+        shutdown():
+            Stops every worker process.
+    """
+
+    def __init__(self, size=None, packages=("sae",), rscript=None):
+        self.size = size or max(1, (os.cpu_count() or 2) - 1)
+        self.packages = tuple(packages)
+        self._rscript = rscript
+        self.startup_error = None
+        self._idle = queue.LifoQueue()
+        self._workers = []
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def rscript(self):
+        if self._rscript is None:
+            self._rscript = find_rscript()
+        return self._rscript
+
+    def is_available(self):
+        return self.rscript is not None and self.startup_error is None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="RWorker")
+            return self._executor
+
+    def _acquire(self):
+        try:
+            worker = self._idle.get_nowait()
+            if worker.is_alive():
+                return worker
+        except queue.Empty:
+            pass
+        try:
+            worker = RWorker(self.rscript, self.packages)
+        except (RuntimeError, OSError) as e:
+            self.startup_error = str(e)
+            raise
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()] + [worker]
+        return worker
+
+    def _execute(self, job):
+        if job.cancelled.is_set():
+            return RJobResult(error="Job cancelled")
+        with tempfile.TemporaryDirectory(prefix="sae_job_") as directory:
+            script, output_paths = job.render(directory)
+            script_path = os.path.join(directory, "job.R")
+            with open(script_path, "w", encoding="utf-8") as file:
+                file.write(script)
+            worker = self._acquire()
+            job._worker = worker
+            try:
+                console, error = worker.run(script_path, job.on_output)
+            except RuntimeError as e:
+                if job.cancelled.is_set():
+                    return RJobResult(error="Job cancelled")
+                return RJobResult(error=str(e))
+            finally:
+                job._worker = None
+            if worker.is_alive():
+                self._idle.put(worker)
+            if error is not None:
+                return RJobResult(console=console, error=error)
+            outputs = {name: pl.read_ipc(path) for name, path in output_paths.items()}
+            return RJobResult(outputs=outputs, console=console)
+
+    def submit(self, job):
+        if self.rscript is None:
+            raise RuntimeError("Rscript was not found; set R_HOME or add R to PATH.")
+        return self._get_executor().submit(self._execute, job)
+
+    def run(self, job):
+        return self.submit(job).result()
+
+    def cancel(self, job):
+        job.cancelled.set()
+        worker = job._worker
+        if worker is not None:
+            worker.kill()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            workers, self._workers = self._workers, []
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for worker in workers:
+            worker.close()
+
+
+r_worker_pool = RWorkerPool()
+atexit.register(r_worker_pool.shutdown)
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import polars as pl
+
+# Column types that can be remembered, by their name in the cache file
+DTYPES = {str(dtype): dtype for dtype in (pl.Utf8, pl.Int64, pl.Int32, pl.Float64, pl.Float32, pl.Boolean, pl.Date)}
+
+
+def default_cache_path():
+    app_data_dir = os.getenv("APPDATA") or os.path.expanduser("~")
+    return os.path.join(app_data_dir, "saePisan", "schema_cache.json")
+
+
+class SchemaCache:
+    """
+    Remembers the final column types of the files opened, to read them already typed the next time.
+    An entry is keyed by the absolute path of the file and the options it was read with (separator,
+    header), and is only used while the file keeps the modification time and size it had when the types
+    were recorded. The entries are kept in a JSON file, the least recently used beyond `max_entries`
+    being dropped.
+    Attributes:
+        path (str): The JSON file holding the entries. Defaults to `schema_cache.json` in the app data folder.
+        max_entries (int): The maximum number of files remembered.
+    Methods:
+        get(file_path, **options):
+            Returns the remembered column types of the file, to be passed as `schema_overrides`.
+        put(file_path, schema, **options):
+            Remembers the column types of the file.
+    """
+
+    def __init__(self, path=None, max_entries=256):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(file_path, options):
+        return json.dumps([os.path.abspath(file_path), sorted(options.items())])
+
+    @staticmethod
+    def _stamp(file_path):
+        stat = os.stat(file_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _load(self):
+        if self._entries is None:
+            self.path = self.path or default_cache_path()
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self._entries = OrderedDict(json.load(file))
+            except (OSError, ValueError):
+                self._entries = OrderedDict()
+        return self._entries
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self._entries, file)
+        os.replace(temp_path, self.path)
+
+    def get(self, file_path, **options):
+        """
+        Args:
+            file_path (str): The path of the file about to be read.
+            **options: The options the file is read with, as given to `put`.
+        Returns:
+            dict or None: The column types by column name, or None if the file (as it is now) is unknown.
+        """
+        with self._lock:
+            entry = self._load().get(self._key(file_path, options))
+            try:
+                if entry is None or entry["stamp"] != self._stamp(file_path):
+                    return None
+            except OSError:
+                return None
+            self._entries.move_to_end(self._key(file_path, options))
+            return {name: DTYPES[dtype] for name, dtype in entry["schema"] if dtype in DTYPES}
+
+    def put(self, file_path, schema, **options):
+        """
+        Args:
+            file_path (str): The path of the file the data was read from.
+            schema (pl.Schema or dict): The column types, e.g. `TableModel.schema()`.
+            **options: The options the file was read with.
+        """
+        with self._lock:
+            entries = self._load()
+            key = self._key(file_path, options)
+            try:
+                stamp = self._stamp(file_path)
+            except OSError:
+                return
+            entries[key] = {
+                "stamp": stamp,
+                "schema": [[name, str(dtype)] for name, dtype in schema.items() if str(dtype) in DTYPES],
+            }
+            entries.move_to_end(key)
+            while len(entries) > max(self.max_entries, 0):
+                entries.popitem(last=False)
+            try:
+                self._save()
+            except OSError:
+                pass
+
+
+schema_cache = SchemaCache()
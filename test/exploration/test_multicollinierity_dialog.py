@@ -30,10 +30,8 @@ def test_ui_initialization(multicollinearity_dialog):
 def test_set_model(multicollinearity_dialog):
     model1_mock = MagicMock()
     model2_mock = MagicMock()
-    model1_mock.get_data.return_value.columns = ['var1', 'var2']
-    model1_mock.get_data.return_value.dtypes = [pl.Int64, pl.Utf8]  
-    model2_mock.get_data.return_value.columns = ['var3']
-    model2_mock.get_data.return_value.dtypes = [pl.Int64]
+    model1_mock.schema.return_value = pl.Schema(zip(['var1', 'var2'], [pl.Int64, pl.Utf8]))  
+    model2_mock.schema.return_value = pl.Schema(zip(['var3'], [pl.Int64]))
     
     multicollinearity_dialog.set_model(model1_mock, model2_mock)
     
@@ -46,11 +44,11 @@ def test_set_model(multicollinearity_dialog):
 def test_get_column_with_dtype(multicollinearity_dialog):
     """Test apakah get_column_with_dtype mengembalikan format yang benar"""
     mock_model = MagicMock()
-    mock_model.get_data.return_value = pl.DataFrame({
+    mock_model.schema.return_value = pl.DataFrame({
         "A": [1.0, 2.0, 3.0],
         "B": [4.0, 5.0, 6.0],
         "C": [7.0, 8.0, 9.0],
-    })
+    }).schema
     expected_output = ["A [Numeric]", "B [Numeric]", "C [Numeric]"]
     assert multicollinearity_dialog.get_column_with_dtype(mock_model) == expected_output
 
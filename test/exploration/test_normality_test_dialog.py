@@ -30,10 +30,8 @@ def test_ui_initialization(normality_test_dialog):
 def test_set_model(normality_test_dialog):
     model1_mock = MagicMock()
     model2_mock = MagicMock()
-    model1_mock.get_data.return_value.columns = ['var1', 'var2']
-    model1_mock.get_data.return_value.dtypes = [pl.Int64, pl.Utf8]  # Perbaikan mapping tipe data
-    model2_mock.get_data.return_value.columns = ['var3']
-    model2_mock.get_data.return_value.dtypes = [pl.Int64]
+    model1_mock.schema.return_value = pl.Schema(zip(['var1', 'var2'], [pl.Int64, pl.Utf8]))  # Perbaikan mapping tipe data
+    model2_mock.schema.return_value = pl.Schema(zip(['var3'], [pl.Int64]))
     
     normality_test_dialog.set_model(model1_mock, model2_mock)
     
@@ -46,8 +44,7 @@ def test_set_model(normality_test_dialog):
 def test_get_column_with_dtype(normality_test_dialog):
     """Test if get_column_with_dtype returns the correct formatted column names."""
     mock_model = Mock()
-    mock_model.get_data.return_value.columns = ["col1", "col2"]
-    mock_model.get_data.return_value.dtypes = [pl.Float64, pl.Utf8]
+    mock_model.schema.return_value = pl.Schema(zip(["col1", "col2"], [pl.Float64, pl.Utf8]))
 
     result = normality_test_dialog.get_column_with_dtype(mock_model)
     assert result == ["col1 [Numeric]", "col2 [String]"]
@@ -28,10 +28,8 @@ def test_ui_initialization(summary_dialog):
 def test_set_model(summary_dialog):
     model1_mock = MagicMock()
     model2_mock = MagicMock()
-    model1_mock.get_data.return_value.columns = ['var1', 'var2']
-    model1_mock.get_data.return_value.dtypes = [pl.Int64, pl.Utf8]  # Perbaikan mapping tipe data
-    model2_mock.get_data.return_value.columns = ['var3']
-    model2_mock.get_data.return_value.dtypes = [pl.Int64]
+    model1_mock.schema.return_value = pl.Schema(zip(['var1', 'var2'], [pl.Int64, pl.Utf8]))  # Perbaikan mapping tipe data
+    model2_mock.schema.return_value = pl.Schema(zip(['var3'], [pl.Int64]))
     
     summary_dialog.set_model(model1_mock, model2_mock)
     
@@ -45,8 +43,7 @@ def test_get_column_with_dtype(summary_dialog):
     """Test apakah get_column_with_dtype mengembalikan format yang benar"""
 
     mock_model = MagicMock()
-    mock_model.get_data.return_value.columns = ["A", "B", "C"]
-    mock_model.get_data.return_value.dtypes = [pl.Utf8, pl.Float64, pl.Int64]
+    mock_model.schema.return_value = pl.Schema(zip(["A", "B", "C"], [pl.Utf8, pl.Float64, pl.Int64]))
 
     expected_output = ["A [String]", "B [Numeric]", "C [Numeric]"]
 
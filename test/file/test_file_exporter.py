@@ -0,0 +1,110 @@
+"""
+Unit tests for the background file exporter using pytest with AAA pattern.
+"""
+
+import gzip
+import threading
+
+import polars as pl
+import pytest
+from PyQt6.QtCore import QCoreApplication
+
+from service.utils.file_exporter import EXPORT_FORMATS, FileExporter, frame_batches
+
+
+@pytest.fixture
+def frame():
+    return pl.DataFrame({"id": list(range(1000)), "value": [i * 0.5 for i in range(1000)]})
+
+
+def run_exporter(exporter):
+    """Run the exporter and deliver its signals, returning the progress and result."""
+    app = QCoreApplication.instance() or QCoreApplication([])
+    progress, result = [], []
+    done = threading.Event()
+    exporter.progress.connect(lambda *args: progress.append(args))
+    exporter.finished.connect(lambda error, cancelled: (result.extend([error, cancelled]), done.set()))
+    exporter.start()
+    while not done.is_set():
+        app.processEvents()
+    return progress, result
+
+
+def test_frame_batches_cover_the_frame(frame):
+    """The batches hold every row of the frame in order."""
+    # Act
+    batches = list(frame_batches(frame.lazy(), 300))
+
+    # Assert
+    assert len(batches) > 1
+    assert pl.concat(batches).equals(frame)
+
+
+class TestFileExporter:
+    """Test suite for the background file exporter."""
+
+    @pytest.mark.parametrize("file_format, read", [
+        ("csv", pl.read_csv),
+        ("csv.gz", lambda path: pl.read_csv(gzip.open(path).read())),
+        ("tsv", lambda path: pl.read_csv(path, separator="\t")),
+        ("ndjson", pl.read_ndjson),
+        ("parquet", pl.read_parquet),
+        ("ipc", pl.read_ipc),
+    ])
+    def test_round_trip(self, frame, tmp_path, file_format, read):
+        """Every format writes the whole frame back."""
+        # Arrange
+        path = str(tmp_path / "out")
+        exporter = FileExporter(frame.lazy(), path, file_format, frame.height, batch_size=300)
+
+        # Act
+        _, (error, cancelled) = run_exporter(exporter)
+
+        # Assert
+        assert error is None and not cancelled
+        assert read(path).equals(frame)
+
+    def test_batches_report_progress(self, frame, tmp_path):
+        """Delimited files report the rows written after every batch."""
+        # Arrange
+        exporter = FileExporter(frame.lazy(), str(tmp_path / "out.csv"), "csv", frame.height, batch_size=300)
+
+        # Act
+        progress, _ = run_exporter(exporter)
+
+        # Assert
+        assert len(progress) > 1
+        assert progress[-1] == (1000, 1000, 1000)
+
+    def test_empty_frame_keeps_header(self, tmp_path):
+        """An empty frame is written with its header."""
+        # Arrange
+        path = str(tmp_path / "out.csv")
+        exporter = FileExporter(pl.DataFrame({"id": [], "value": []}).lazy(), path, "csv")
+
+        # Act
+        run_exporter(exporter)
+
+        # Assert
+        assert open(path).read().strip() == "id,value"
+
+    def test_cancel_keeps_destination(self, frame, tmp_path):
+        """A cancelled export leaves the existing file untouched and no temporary file."""
+        # Arrange
+        path = tmp_path / "out.csv"
+        path.write_text("old")
+        exporter = FileExporter(frame.lazy(), str(path), "csv", frame.height, batch_size=100)
+        exporter.cancel()
+
+        # Act
+        _, (error, cancelled) = run_exporter(exporter)
+
+        # Assert
+        assert error is None and cancelled
+        assert path.read_text() == "old"
+        assert [p.name for p in tmp_path.iterdir()] == ["out.csv"]
+
+    def test_every_filter_has_a_format(self):
+        """Every save dialog filter maps to a format the exporter writes."""
+        # Assert
+        assert set(EXPORT_FORMATS.values()) == {"csv", "csv.gz", "xlsx", "ndjson", "tsv", "parquet", "ipc"}
@@ -0,0 +1,114 @@
+"""
+Unit tests for the background file loader using pytest with AAA pattern.
+"""
+
+import threading
+
+import polars as pl
+import pytest
+from PyQt6.QtCore import QCoreApplication
+
+from service.utils.file_loader import FileLoader, bytes_per_row, csv_batches
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "data.csv"
+    pl.DataFrame({"id": list(range(1000)), "value": [i * 0.5 for i in range(1000)]}).write_csv(path)
+    return str(path)
+
+
+def run_loader(loader):
+    """Run the loader and deliver its signals, returning the batches, progress and result."""
+    app = QCoreApplication.instance() or QCoreApplication([])
+    batches, progress, result = [], [], []
+    done = threading.Event()
+    loader.batch_loaded.connect(batches.append)
+    loader.progress.connect(lambda *args: progress.append(args))
+    loader.finished.connect(lambda data, error: (result.extend([data, error]), done.set()))
+    loader.start()
+    while not done.is_set():
+        app.processEvents()
+    return batches, progress, result
+
+
+class TestCsvBatches:
+    """Test suite for reading a delimited file in batches."""
+
+    def test_batches_cover_the_file(self, csv_file):
+        """The batches hold every row of the file in order."""
+        # Act
+        batches = list(csv_batches(csv_file, batch_size=300))
+
+        # Assert
+        assert len(batches) > 1
+        assert pl.concat(batches)["id"].to_list() == list(range(1000))
+
+    def test_columns_named_without_header(self, csv_file):
+        """Without header the columns are named as for a file read at once."""
+        # Act
+        batch = next(csv_batches(csv_file, has_header=False, batch_size=300))
+
+        # Assert
+        assert batch.columns == ["Column 1", "Column 2"]
+        assert batch["Column 1"][0] == "id"
+
+    def test_bytes_per_row(self, csv_file):
+        """The estimated row size times the rows gives about the size of the file."""
+        # Act
+        size = bytes_per_row(csv_file) * 1001
+
+        # Assert
+        with open(csv_file, "rb") as file:
+            assert size == pytest.approx(len(file.read()))
+
+
+class TestFileLoader:
+    """Test suite for the background file loader."""
+
+    def test_streams_batches_and_progress(self, csv_file):
+        """Every batch and its progress reach the GUI thread, then the whole data."""
+        # Arrange
+        loader = FileLoader(lambda: csv_batches(csv_file, batch_size=300), csv_file, bytes_per_row(csv_file))
+
+        # Act
+        batches, progress, (data, error) = run_loader(loader)
+
+        # Assert
+        assert error is None
+        assert data["id"].to_list() == list(range(1000))
+        assert sum(batch.height for batch in batches) == 1000
+        assert progress[-1][0] == 1000
+        assert progress[-1][1] <= progress[-1][2] == loader.total_bytes > 0
+
+    def test_cancel_stops_after_current_batch(self, csv_file):
+        """A cancelled load stops reading and finishes without data."""
+        # Arrange
+        def read():
+            for batch in csv_batches(csv_file, batch_size=100):
+                yield batch
+                loader.cancel()
+
+        loader = FileLoader(read, csv_file)
+
+        # Act
+        batches, _, (data, error) = run_loader(loader)
+
+        # Assert
+        assert loader.is_cancelled()
+        assert data is None and error is None
+        assert len(batches) == 1
+
+    def test_error_is_reported(self, tmp_path):
+        """A failing read finishes with the error instead of raising in the worker thread."""
+        # Arrange
+        path = tmp_path / "broken.json"
+        path.write_text("{not json")
+        loader = FileLoader(lambda: [pl.read_json(path)], str(path))
+
+        # Act
+        _, progress, (data, error) = run_loader(loader)
+
+        # Assert
+        assert data is None and error is not None
+        assert progress == []
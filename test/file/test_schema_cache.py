@@ -0,0 +1,92 @@
+"""
+Unit tests for the schema cache of opened files using pytest with AAA pattern.
+"""
+
+import os
+
+import polars as pl
+import pytest
+
+from service.utils.file_loader import csv_batches, scan_delimited
+from service.utils.schema_cache import SchemaCache
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("code,value\n001,1\n002,2\n")
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SchemaCache(str(tmp_path / "cache" / "schema_cache.json"), max_entries=2)
+
+
+class TestSchemaCache:
+    """Test suite for remembering the column types of a file."""
+
+    def test_put_then_get(self, cache, csv_file):
+        """The remembered types are returned for the same file and read options, from a new cache too."""
+        # Act
+        cache.put(csv_file, pl.Schema({"code": pl.Utf8, "value": pl.Float64}), separator=",", header=True)
+
+        # Assert
+        assert cache.get(csv_file, separator=",", header=True) == {"code": pl.Utf8, "value": pl.Float64}
+        assert SchemaCache(cache.path).get(csv_file, separator=",", header=True) == {"code": pl.Utf8, "value": pl.Float64}
+        assert cache.get(csv_file, separator=";", header=True) is None
+
+    def test_changed_file_is_unknown(self, cache, csv_file):
+        """A file modified since its types were remembered is read with inferred types."""
+        # Arrange
+        cache.put(csv_file, {"code": pl.Utf8}, header=True)
+        with open(csv_file, "a") as file:
+            file.write("003,3\n")
+
+        # Act
+        overrides = cache.get(csv_file, header=True)
+
+        # Assert
+        assert overrides is None
+
+    def test_least_recently_used_file_dropped(self, cache, tmp_path):
+        """Beyond `max_entries` files, the least recently used one is forgotten."""
+        # Arrange
+        paths = []
+        for name in ["a", "b", "c"]:
+            path = tmp_path / f"{name}.csv"
+            path.write_text("x\n1\n")
+            paths.append(str(path))
+
+        # Act
+        cache.put(paths[0], {"x": pl.Utf8})
+        cache.put(paths[1], {"x": pl.Utf8})
+        cache.get(paths[0])
+        cache.put(paths[2], {"x": pl.Utf8})
+
+        # Assert
+        assert cache.get(paths[0]) is not None
+        assert cache.get(paths[1]) is None
+        assert cache.get(paths[2]) is not None
+
+
+class TestSchemaOverrides:
+    """Test suite for reading delimited files with remembered column types."""
+
+    def test_overrides_replace_inferred_types(self, csv_file):
+        """A column remembered as string keeps its leading zeros."""
+        # Act
+        df = scan_delimited(csv_file, schema_overrides={"code": pl.Utf8, "value": pl.Float64}).collect()
+
+        # Assert
+        assert df["code"].to_list() == ["001", "002"]
+        assert df.schema["value"] == pl.Float64
+
+    def test_overrides_without_header(self, csv_file):
+        """Types remembered by "Column i" names apply to a file read without header."""
+        # Act
+        df = pl.concat(csv_batches(csv_file, has_header=False, schema_overrides={"Column 2": pl.Utf8}))
+
+        # Assert
+        assert df.columns == ["Column 1", "Column 2"]
+        assert df["Column 2"].to_list() == ["value", "1", "2"]
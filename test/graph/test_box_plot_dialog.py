@@ -28,12 +28,10 @@ def test_ui_initialization(boxplot_dialog):
 
 def test_set_model(boxplot_dialog):
     model1_mock = MagicMock()
-    model1_mock.get_data.return_value.columns = ['var1', 'var2']
-    model1_mock.get_data.return_value.dtypes = [pl.Float64, pl.Utf8]
+    model1_mock.schema.return_value = pl.Schema(zip(['var1', 'var2'], [pl.Float64, pl.Utf8]))
     
     model2_mock = MagicMock()
-    model2_mock.get_data.return_value.columns = ['var3', 'var4']
-    model2_mock.get_data.return_value.dtypes = [pl.Float64, pl.Utf8]
+    model2_mock.schema.return_value = pl.Schema(zip(['var3', 'var4'], [pl.Float64, pl.Utf8]))
     
     boxplot_dialog.set_model(model1_mock, model2_mock)
     
@@ -47,8 +45,7 @@ def test_set_model(boxplot_dialog):
 def test_get_column_with_dtype(boxplot_dialog):
     """Test apakah get_column_with_dtype menghasilkan nama kolom yang benar"""
     mock_model = MagicMock()
-    mock_model.get_data.return_value.columns = ["col1", "col2"]
-    mock_model.get_data.return_value.dtypes = [pl.Float64, pl.Utf8]
+    mock_model.schema.return_value = pl.Schema(zip(["col1", "col2"], [pl.Float64, pl.Utf8]))
     
     result = boxplot_dialog.get_column_with_dtype(mock_model)
     assert result == ["col1 [Numeric]", "col2 [String]"]
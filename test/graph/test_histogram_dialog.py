@@ -32,10 +32,8 @@ def test_ui_initialization(histogram_dialog):
 def test_set_model(histogram_dialog):
     model1_mock = MagicMock()
     model2_mock = MagicMock()
-    model1_mock.get_data.return_value.columns = ['var1', 'var2']
-    model1_mock.get_data.return_value.dtypes = [pl.Float64, pl.Utf8]  # Should map to [Numeric] and [String]
-    model2_mock.get_data.return_value.columns = ['var3', 'var4']
-    model2_mock.get_data.return_value.dtypes = [pl.Float64, pl.Utf8]
+    model1_mock.schema.return_value = pl.Schema(zip(['var1', 'var2'], [pl.Float64, pl.Utf8]))  # Should map to [Numeric] and [String]
+    model2_mock.schema.return_value = pl.Schema(zip(['var3', 'var4'], [pl.Float64, pl.Utf8]))
     
     histogram_dialog.set_model(model1_mock, model2_mock)
     
@@ -48,11 +46,11 @@ def test_set_model(histogram_dialog):
 def test_get_column_with_dtype(histogram_dialog):
     mock_model = MagicMock()
     # Create a sample DataFrame using polars (or simulate using a mock object)
-    # For simplicity, we'll simulate get_data() as returning an object with columns and dtypes attributes.
+    # For simplicity, we'll simulate schema() from an object with columns and dtypes attributes.
     mock_data = Mock()
     mock_data.columns = ["A", "B", "C"]
     mock_data.dtypes = [pl.Float64, pl.Utf8, pl.Float64]
-    mock_model.get_data.return_value = mock_data
+    mock_model.schema.return_value = pl.Schema(zip(mock_data.columns, mock_data.dtypes))
 
     result = histogram_dialog.get_column_with_dtype(mock_model)
     expected = ["A [Numeric]", "B [String]", "C [Numeric]"]
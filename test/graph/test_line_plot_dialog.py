@@ -30,10 +30,8 @@ def test_ui_initialization(line_plot_dialog):
 def test_set_model(line_plot_dialog):
     model1_mock = MagicMock()
     model2_mock = MagicMock()
-    model1_mock.get_data.return_value.columns = ['A', 'B']
-    model1_mock.get_data.return_value.dtypes = [pl.Float64, pl.Utf8]
-    model2_mock.get_data.return_value.columns = ['C']
-    model2_mock.get_data.return_value.dtypes = [pl.Int64]
+    model1_mock.schema.return_value = pl.Schema(zip(['A', 'B'], [pl.Float64, pl.Utf8]))
+    model2_mock.schema.return_value = pl.Schema(zip(['C'], [pl.Int64]))
     line_plot_dialog.set_model(model1_mock, model2_mock)
     expected_editor = ['A [Numeric]', 'B [String]']
     expected_output = ['C [Numeric]']
@@ -45,7 +43,7 @@ def test_get_column_with_dtype(line_plot_dialog):
     mock_data = Mock()
     mock_data.columns = ["X", "Y", "Z"]
     mock_data.dtypes = [pl.Float64, pl.Utf8, pl.Int64]
-    mock_model.get_data.return_value = mock_data
+    mock_model.schema.return_value = pl.Schema(zip(mock_data.columns, mock_data.dtypes))
     result = line_plot_dialog.get_column_with_dtype(mock_model)
     expected = ["X [Numeric]", "Y [String]", "Z [Numeric]"]
     assert result == expected
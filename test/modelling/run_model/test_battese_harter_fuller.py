@@ -0,0 +1,372 @@
+"""
+Unit tests for the native BHF nested error fit and parametric bootstrap using pytest with AAA pattern.
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import polars as pl
+import pytest
+
+from service.modelling.native.BatteseHarterFuller import (
+    BootstrapSetup, DomainDesign, bootstrap_chunk, bootstrap_chunks, bootstrap_mse, bootstrap_shards,
+    domain_codes, domain_means, eblupBHF, fit_nested_error, pbmseBHF, r_seed
+)
+from service.modelling.running_model.SaeEblupUnitNative import run_model_eblup_unit_native
+
+
+def make_setup(n_domains=8, seed=0):
+    rng = np.random.default_rng(seed)
+    dom = np.repeat(np.arange(n_domains) * 10, rng.integers(2, 6, n_domains))
+    n = len(dom)
+    X = np.column_stack([np.ones(n), rng.normal(5, 1, n)])
+    levels, codes, nd = domain_codes(dom)
+    pos = np.arange(0, n_domains, 2)
+    return BootstrapSetup(
+        X=X,
+        beta=np.array([1.0, 2.0]),
+        codes=codes,
+        nd=nd,
+        pos=pos,
+        Ni=nd[pos] * 20.0,
+        meanx=np.column_stack([np.ones(len(pos)), rng.normal(5, 1, len(pos))]),
+        sigma_u2=0.5,
+        sigma_e2=1.5,
+    )
+
+
+def make_units(n_domains=30, seed=0):
+    rng = np.random.default_rng(seed)
+    nd = rng.integers(2, 10, n_domains)
+    dom = np.repeat(np.arange(n_domains), nd)
+    n = len(dom)
+    X = np.column_stack([np.ones(n), rng.normal(5, 1, n), rng.normal(0, 1, n)])
+    y = X @ np.array([1.0, 2.0, -1.0]) + rng.normal(0, 1.2, n_domains)[dom] + rng.normal(0, 1, n)
+    return y, X, dom
+
+
+def dense_loglike(y, X, dom, sigma_u2, sigma_e2, method):
+    """The REML or ML log-likelihood computed with the dense n x n covariance matrix."""
+    n, p = X.shape
+    V = sigma_e2 * np.eye(n) + sigma_u2 * (dom[:, None] == dom[None, :])
+    Vinv = np.linalg.inv(V)
+    XVX = X.T @ Vinv @ X
+    beta = np.linalg.solve(XVX, X.T @ Vinv @ y)
+    r = y - X @ beta
+    loglike = -0.5 * (np.linalg.slogdet(V)[1] + r @ Vinv @ r)
+    if method == "ML":
+        return loglike - 0.5 * n * np.log(2 * np.pi)
+    return loglike - 0.5 * ((n - p) * np.log(2 * np.pi) + np.linalg.slogdet(XVX)[1])
+
+
+class TestDomainCodes:
+    """Test suite for domain_codes."""
+
+    def test_codes_index_sorted_levels(self):
+        """Every unit gets the index of its domain among the sorted distinct domains."""
+        # Act
+        levels, codes, counts = domain_codes(["b", "a", "b", "c", "b"])
+
+        # Assert
+        assert levels.tolist() == ["a", "b", "c"]
+        assert codes.tolist() == [1, 0, 1, 2, 1]
+        assert counts.tolist() == [1, 3, 1]
+
+
+class TestNestedErrorFit:
+    """Test suite for the per-domain REML/ML fit of the nested error model."""
+
+    @pytest.mark.parametrize("method", ["REML", "ML"])
+    def test_fit_maximizes_dense_likelihood(self, method):
+        """The fit reaches a stationary point of the likelihood computed with the dense covariance."""
+        # Arrange
+        y, X, dom = make_units()
+        _, codes, nd = domain_codes(dom)
+
+        # Act
+        fit = fit_nested_error(y, DomainDesign(X, codes, nd), method, PRECISION=1e-8)
+
+        # Assert
+        sigma_u2, sigma_e2 = fit["sigma_u2"][0], fit["sigma_e2"][0]
+        h = 1e-5
+        assert fit["convergence"][0]
+        assert fit["loglike"][0] == pytest.approx(dense_loglike(y, X, dom, sigma_u2, sigma_e2, method), rel=1e-10)
+        for du, de in [(h, 0), (0, h)]:
+            slope = (dense_loglike(y, X, dom, sigma_u2 + du, sigma_e2 + de, method)
+                     - dense_loglike(y, X, dom, sigma_u2 - du, sigma_e2 - de, method)) / (2 * h)
+            assert abs(slope) < 1e-4
+
+    def test_batch_matches_single_fits(self):
+        """Fitting several responses together gives the fit of each response alone."""
+        # Arrange
+        y, X, dom = make_units()
+        _, codes, nd = domain_codes(dom)
+        design = DomainDesign(X, codes, nd)
+        Y = np.stack([y, 2 * y + X[:, 1], y[::-1]])
+
+        # Act
+        batch = fit_nested_error(Y, design)
+
+        # Assert
+        for i, response in enumerate(Y):
+            single = fit_nested_error(response, design)
+            np.testing.assert_allclose(batch["beta"][i], single["beta"][0], rtol=1e-10)
+            assert batch["sigma_u2"][i] == pytest.approx(single["sigma_u2"][0], rel=1e-10)
+            assert batch["iterations"][i] == single["iterations"][0]
+
+    def test_random_effect_variance_is_not_negative(self):
+        """Without domain effects the random effect variance stays at or above zero."""
+        # Arrange
+        rng = np.random.default_rng(4)
+        _, X, dom = make_units()
+        _, codes, nd = domain_codes(dom)
+        y = X @ np.array([1.0, 2.0, -1.0]) + rng.normal(0, 1, len(dom))
+
+        # Act
+        fit = fit_nested_error(y, DomainDesign(X, codes, nd))
+
+        # Assert
+        assert fit["convergence"][0]
+        assert fit["sigma_u2"][0] >= 0
+
+    def test_eblup_of_domains_without_sample_is_synthetic(self):
+        """A selected domain without sample gets the synthetic estimate and sample size 0."""
+        # Arrange
+        y, X, dom = make_units()
+        meanx = np.array([[1.0, 5.0, 0.0], [1.0, 4.0, 1.0]])
+
+        # Act
+        est = eblupBHF(y, X, dom, [3, 99], meanx, np.array([100.0, 50.0]))
+
+        # Assert
+        beta = est["fit"]["estcoef"]["beta"]
+        assert est["eblup"]["sampsize"].tolist() == [np.sum(dom == 3), 0]
+        assert est["eblup"]["eblup"][1] == pytest.approx(meanx[1] @ beta)
+
+    def test_eblup_shrinks_towards_sample_mean(self):
+        """A fully sampled domain gets the mean of its sample."""
+        # Arrange
+        y, X, dom = make_units()
+        _, codes, nd = domain_codes(dom)
+        design = DomainDesign(X, codes, nd)
+        fit = fit_nested_error(y, design)
+
+        # Act
+        estimate = domain_means(design, y[np.newaxis], fit, np.array([0]), np.array([float(nd[0])]),
+                                X[codes == 0].mean(axis=0, keepdims=True))
+
+        # Assert
+        assert estimate[0, 0] == pytest.approx(y[codes == 0].mean())
+
+
+class TestBootstrap:
+    """Test suite for the chunked parametric bootstrap."""
+
+    def test_chunks_cover_all_replicates(self):
+        """Chunks hold at most the element budget and add up to B."""
+        # Act
+        chunks = bootstrap_chunks(B=103, n=1000, seed=1, chunk_elements=10_000)
+
+        # Assert
+        sizes = [size for size, _ in chunks]
+        assert sum(sizes) == 103
+        assert max(sizes) * 1000 <= 10_000
+
+    def test_same_seed_same_mse(self):
+        """The bootstrap is reproducible for a given seed."""
+        # Arrange
+        setup = make_setup()
+
+        # Act
+        first = bootstrap_mse(setup, B=50, seed=7, chunk_elements=100)
+        second = bootstrap_mse(setup, B=50, seed=7, chunk_elements=100)
+
+        # Assert
+        np.testing.assert_array_equal(first, second)
+
+    def test_chunk_matches_per_replicate_loop(self):
+        """The vectorized chunk equals refitting every replicate on its own with the same draws."""
+        # Arrange
+        setup = make_setup()
+        size, seed = 5, np.random.SeedSequence(3)
+        rng = np.random.default_rng(np.random.SeedSequence(3))
+        ud = rng.normal(0, np.sqrt(setup.sigma_u2), size=(size, setup.D))
+        esd = rng.normal(0, np.sqrt(setup.sigma_e2), size=(size, setup.n))
+        erd = rng.normal(0, 1, size=(size, len(setup.pos)))
+        expected = np.zeros(len(setup.pos))
+        for b in range(size):
+            ys = np.empty(setup.n)
+            esd_mean = np.empty(setup.D)
+            for d in range(setup.D):
+                rows = setup.codes == d
+                ys[rows] = setup.X[rows] @ setup.beta + ud[b, d] + esd[b, rows]
+                esd_mean[d] = esd[b, rows].mean()
+            fit = fit_nested_error(ys, setup.design)
+            mean_EB = domain_means(setup.design, ys[np.newaxis], fit, setup.pos, setup.Ni, setup.meanx)[0]
+            for i, d in enumerate(setup.pos):
+                rd = setup.Ni[i] - setup.nd[d]
+                erd_mean = erd[b, i] * np.sqrt(setup.sigma_e2 / rd)
+                true_mean = setup.mud[i] + ud[b, d] + esd_mean[d] * setup.nd[d] / setup.Ni[i] + erd_mean * rd / setup.Ni[i]
+                expected[i] += (mean_EB[i] - true_mean) ** 2
+
+        # Act
+        total = bootstrap_chunk(setup, size, seed)
+
+        # Assert
+        np.testing.assert_allclose(total, expected, rtol=1e-10)
+
+    def test_parallel_matches_serial(self):
+        """Running the shards in a process pool gives exactly the serial result."""
+        # Arrange
+        setup = make_setup()
+
+        # Act
+        serial = bootstrap_mse(setup, B=120, seed=11, chunk_elements=200)
+        parallel = bootstrap_mse(setup, B=120, seed=11, chunk_elements=200, workers=2)
+
+        # Assert
+        np.testing.assert_array_equal(parallel, serial)
+
+    def test_shards_do_not_depend_on_workers(self):
+        """Shard sizes and R seeds only depend on B and the seed."""
+        # Act
+        first = [(size, r_seed(seed)) for size, seed in bootstrap_shards(1000, seed=5)]
+        second = [(size, r_seed(seed)) for size, seed in bootstrap_shards(1000, seed=5)]
+
+        # Assert
+        assert first == second
+        assert sum(size for size, _ in first) == 1000
+        assert len({seed for _, seed in first}) == len(first)
+        assert all(0 < seed < 2 ** 31 - 1 for _, seed in first)
+
+    def test_mse_is_positive(self):
+        """The bootstrap MSE of every selected domain is positive."""
+        # Act
+        mse = bootstrap_mse(make_setup(), B=20, seed=0)
+
+        # Assert
+        assert mse.shape == (4,)
+        assert np.all(mse > 0)
+
+
+class TestRunModelEblupUnitNative:
+    """Test suite for the native EBLUP unit runner."""
+
+    def make_parent(self):
+        y, X, dom = make_units(n_domains=12)
+        padding = [None] * (len(y) - 12)
+        data = pl.DataFrame({
+            "y": y,
+            "x1": X[:, 1],
+            "x2": X[:, 2],
+            "county": dom,
+            "index": list(range(12)) + padding,
+            "mean_x1": [5.0] * 12 + padding,
+            "mean_x2": [0.0] * 12 + padding,
+            "popn": [200] * 12 + padding,
+        })
+        parent = MagicMock(spec=[
+            "model1", "of_interest_var", "auxilary_vars", "as_factor_var", "index_var", "aux_mean_vars",
+            "population_sample_size_var", "domain_var", "method", "bootstrap", "seed",
+        ])
+        parent.model1.scan.return_value = data.lazy()
+        parent.of_interest_var = ["y [Numeric]"]
+        parent.auxilary_vars = ["x1 [Numeric]", "x2 [Numeric]"]
+        parent.as_factor_var = []
+        parent.index_var = ["index [Numeric]"]
+        parent.aux_mean_vars = ["mean_x1 [Numeric]", "mean_x2 [Numeric]"]
+        parent.population_sample_size_var = ["popn [Numeric]"]
+        parent.domain_var = ["county [Numeric]"]
+        parent.method = "REML"
+        parent.bootstrap = "20"
+        parent.seed = 3
+        return parent
+
+    def test_returns_same_frame_as_r_runner(self):
+        """The native runner returns the Domain/Eblup/Sample size/MSE/RSE frame of the R runner."""
+        # Arrange
+        parent = self.make_parent()
+
+        # Act
+        results, error, df = run_model_eblup_unit_native(parent)
+
+        # Assert
+        assert error is False
+        assert df.columns == ['Domain', 'Eblup', 'Sample size', 'MSE', 'RSE']
+        assert df.height == 12
+        assert (df['MSE'] > 0).all()
+        assert results["Fixed Effects"]["Effect"].to_list() == ["(Intercept)", "x1", "x2"]
+        assert results["Bootstrap Seed"] == 3
+
+    def test_same_seed_same_result(self):
+        """The run is reproducible for a given seed."""
+        # Act
+        _, _, first = run_model_eblup_unit_native(self.make_parent())
+        _, _, second = run_model_eblup_unit_native(self.make_parent())
+
+        # Assert
+        assert first.equals(second)
+
+    def test_bootstrap_runs_in_model_workers(self, monkeypatch):
+        """The bootstrap is run in the processes set on the model, with the same result as a serial run."""
+        # Arrange
+        import service.modelling.running_model.SaeEblupUnitNative as native
+        calls = []
+        monkeypatch.setattr(native, "pbmseBHF", lambda *args, **kwargs: calls.append(kwargs["workers"]) or pbmseBHF(*args, **kwargs))
+        parent = self.make_parent()
+        parent.workers = 2
+        _, _, serial = run_model_eblup_unit_native(self.make_parent())
+
+        # Act
+        _, error, df = run_model_eblup_unit_native(parent)
+
+        # Assert
+        assert error is False
+        assert calls == [None, 2]
+        assert df.equals(serial)
+
+    def test_reads_selected_columns_from_scan(self):
+        """Only the selected columns are read from the scan of the data."""
+        # Arrange
+        def unreadable(series):
+            raise AssertionError("an unselected column was read")
+        parent = self.make_parent()
+        parent.model1.scan.return_value = parent.model1.scan.return_value.with_columns(
+            pl.lit(0.0).map_batches(unreadable, return_dtype=pl.Float64).alias("unused")
+        )
+
+        # Act
+        _, error, df = run_model_eblup_unit_native(parent)
+
+        # Assert
+        assert error is False
+        assert df.height == 12
+        parent.model1.get_data.assert_not_called()
+
+    def test_read_error_returns_error(self):
+        """An error reading the data is reported through the (result, error, df) tuple."""
+        # Arrange
+        parent = self.make_parent()
+        parent.model1.scan.side_effect = FileNotFoundError("data.csv")
+
+        # Act
+        result, error, df = run_model_eblup_unit_native(parent)
+
+        # Assert
+        assert error is True
+        assert "data.csv" in result
+        assert df is None
+
+    def test_unsupported_method_returns_error(self):
+        """The FH method is reported as an error through the (result, error, df) tuple."""
+        # Arrange
+        parent = self.make_parent()
+        parent.method = "FH"
+
+        # Act
+        result, error, df = run_model_eblup_unit_native(parent)
+
+        # Assert
+        assert error is True
+        assert "REML" in result
+        assert df is None
@@ -0,0 +1,28 @@
+"""
+Unit tests for the bootstrap shard scripts of the EBLUP unit model using pytest with AAA pattern.
+"""
+
+import pytest
+
+pytest.importorskip("rpy2.robjects")
+
+from service.modelling.running_model.SaeEblupUnit import bootstrap_shard_script
+
+
+class TestBootstrapShardScript:
+    """Test suite for bootstrap_shard_script."""
+
+    @pytest.mark.parametrize("call", [
+        "model_unit <- pbmseBHF(formula, dom=d, selectdom=s, meanxpop=X, popnsize=P, B = 50L, data=data_unit)",
+        "model_unit <- pbmseBHF(formula, dom=d, selectdom=s, meanxpop=X, popnsize=P, B=nboot, data=data_unit)",
+        "model_unit <- pbmseBHF(formula, dom=d, selectdom=s, meanxpop=X, popnsize=P, data=data_unit)",
+    ])
+    def test_script_kept_and_replicates_set(self, call):
+        """The script is run as written while every pbmseBHF call runs the replicates of the shard."""
+        # Act
+        script = bootstrap_shard_script(call, 7, 123)
+
+        # Assert
+        assert script.startswith("set.seed(123)\n")
+        assert "call$B <- 7L" in script
+        assert call in script
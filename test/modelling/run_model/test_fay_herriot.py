@@ -0,0 +1,325 @@
+"""
+Unit tests for the native Fay-Herriot engine using pytest with AAA pattern.
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import polars as pl
+import pytest
+
+from service.modelling.native.FayHerriot import (
+    _score_information, design_matrix, design_matrix_batch, eblupFH, mse_terms, mseFH, mseFH_batch, parse_formula
+)
+from service.modelling.running_model.SaeEblupAreaNative import run_model_eblup_area_native
+
+
+def make_area_data(m=60, seed=1):
+    rng = np.random.default_rng(seed)
+    x1 = rng.normal(10, 2, m)
+    x2 = rng.uniform(0, 5, m)
+    vardir = rng.uniform(0.5, 2.0, m)
+    u = rng.normal(0, 1.2, m)
+    y = 3 + 0.8 * x1 - 0.5 * x2 + u + rng.normal(0, np.sqrt(vardir))
+    region = np.array(["b", "a", "c"] * (m // 3))
+    vardir2 = rng.uniform(0.1, 0.5, m)
+    y2 = 1 - 0.2 * x1 + rng.normal(0, 0.4, m) + rng.normal(0, np.sqrt(vardir2))
+    return pl.DataFrame({
+        "y": y, "x1": x1, "x2": x2, "vardir": vardir, "region": region, "y2": y2, "vardir2": vardir2,
+    })
+
+
+class TestDesignMatrix:
+    """Test suite for parse_formula and design_matrix."""
+
+    def test_parse_formula_splits_factors(self):
+        """Terms wrapped in as.factor are returned as factors."""
+        # Act
+        response, auxiliary, factors = parse_formula("y ~ x1 + as.factor(region) + x2")
+
+        # Assert
+        assert response == "y"
+        assert auxiliary == ["x1", "x2"]
+        assert factors == ["region"]
+
+    def test_factor_uses_treatment_coding(self):
+        """Factors get one dummy per level except the first sorted level."""
+        # Arrange
+        data = make_area_data(m=6)
+
+        # Act
+        y, X, vardir, names = design_matrix(data, "y", ["x1"], ["region"], "vardir")
+
+        # Assert
+        assert names == ["(Intercept)", "x1", "as.factor(region)b", "as.factor(region)c"]
+        assert X.shape == (6, 4)
+        assert X[:, 2].tolist() == [1, 0, 0, 1, 0, 0]
+        assert vardir is not None and len(vardir) == len(y) == 6
+
+    def test_null_values_raise(self):
+        """Missing values in model variables are rejected."""
+        # Arrange
+        data = pl.DataFrame({"y": [1.0, None, 3.0], "vardir": [1.0, 1.0, 1.0]})
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="NA values"):
+            design_matrix(data, "y", vardir="vardir")
+
+
+class TestFayHerriot:
+    """Test suite for eblupFH and mseFH."""
+
+    @pytest.mark.parametrize("method", ["REML", "ML", "FH"])
+    def test_methods_converge(self, method):
+        """Every estimation method converges to a non-negative variance."""
+        # Arrange
+        y, X, vardir, _ = design_matrix(make_area_data(), "y", ["x1", "x2"], vardir="vardir")
+
+        # Act
+        result = mseFH(y, X, vardir, method=method)
+
+        # Assert
+        fit = result["est"]["fit"]
+        assert fit["convergence"]
+        assert fit["refvar"] >= 0
+        assert np.all(result["mse"] > 0)
+
+    def test_eblup_shrinks_towards_synthetic(self):
+        """The EBLUP lies between the direct and the regression-synthetic estimate."""
+        # Arrange
+        y, X, vardir, _ = design_matrix(make_area_data(), "y", ["x1", "x2"], vardir="vardir")
+
+        # Act
+        result = eblupFH(y, X, vardir)
+
+        # Assert
+        synthetic = X @ result["fit"]["estcoef"]["beta"]
+        eblup = result["eblup"]
+        assert np.all(np.minimum(y, synthetic) - 1e-12 <= eblup)
+        assert np.all(eblup <= np.maximum(y, synthetic) + 1e-12)
+
+    def test_mse_not_above_direct_variance_plus_estimation_terms(self):
+        """The leading MSE term g1 is bounded by the sampling variance."""
+        # Arrange
+        y, X, vardir, _ = design_matrix(make_area_data(), "y", ["x1"], vardir="vardir")
+
+        # Act
+        result = mseFH(y, X, vardir, method="REML")
+
+        # Assert
+        A = result["est"]["fit"]["refvar"]
+        g1 = vardir * A / (A + vardir)
+        assert np.all(result["mse"] >= g1)
+
+    @pytest.mark.parametrize("method", ["REML", "ML", "FH"])
+    def test_mse_terms_match_per_domain_formula(self, method):
+        """The vectorized MSE equals the per-domain g1 + g2 + 2 g3 - b B^2 formula."""
+        # Arrange
+        _, X, vardir, _ = design_matrix(make_area_data(), "y", ["x1", "x2"], ["region"], "vardir")
+        A = 1.3
+        Vi = 1 / (A + vardir)
+        Q = np.linalg.inv((X.T * Vi) @ X)
+        SumAD, SumAD2, m = np.sum(Vi), np.sum(Vi ** 2), len(vardir)
+        VarA = 2 * m / SumAD ** 2 if method == "FH" else 2 / SumAD2
+        b = {
+            "REML": 0.0,
+            "ML": -np.trace(Q @ ((Vi ** 2)[:, None] * X).T @ X) / SumAD2,
+            "FH": 2 * (m * SumAD2 - SumAD ** 2) / SumAD ** 3,
+        }[method]
+        expected = []
+        for d in range(m):
+            Bd = vardir[d] * Vi[d]
+            g2 = Bd ** 2 * X[d] @ Q @ X[d]
+            expected.append(vardir[d] * (1 - Bd) + g2 + 2 * Bd ** 2 * VarA * Vi[d] - b * Bd ** 2)
+
+        # Act
+        mse = mse_terms(X, vardir, A, method)
+
+        # Assert
+        np.testing.assert_allclose(mse, expected, rtol=1e-12)
+
+    @pytest.mark.parametrize("method", ["REML", "ML", "FH"])
+    def test_score_information_matches_dense_projection(self, method):
+        """Score and information equal the ones computed with the dense m x m matrix P."""
+        # Arrange
+        y, X, vardir, _ = design_matrix(make_area_data(), "y", ["x1", "x2"], ["region"], "vardir")
+        A, (m, p) = 0.9, X.shape
+        Vi = 1 / (A + vardir)
+        XtVi = X.T * Vi
+        Q = np.linalg.inv(XtVi @ X)
+        P = np.diag(Vi) - XtVi.T @ Q @ XtVi
+        Py = P @ y
+        expected = {
+            "ML": (-0.5 * np.sum(Vi) + 0.5 * Py @ Py, 0.5 * np.sum(Vi ** 2)),
+            "REML": (-0.5 * np.trace(P) + 0.5 * Py @ Py, 0.5 * np.trace(P @ P)),
+            "FH": (np.sum((y - X @ Q @ XtVi @ y) ** 2 * Vi) - (m - p), np.sum(Vi)),
+        }[method]
+
+        # Act
+        score, information = _score_information(y, X, vardir, A, method)
+
+        # Assert
+        np.testing.assert_allclose([score, information], expected, rtol=1e-10)
+
+    def test_fit_scales_to_many_domains(self):
+        """A REML fit with ~100k domains runs without forming m x m matrices."""
+        # Arrange
+        data = make_area_data(m=99_999, seed=2)
+        y, X, vardir, _ = design_matrix(data, "y", ["x1", "x2"], vardir="vardir")
+
+        # Act
+        result = mseFH(y, X, vardir, method="REML")
+
+        # Assert
+        assert result["est"]["fit"]["convergence"]
+        assert abs(result["est"]["fit"]["refvar"] - 1.44) < 0.1
+        assert result["mse"].shape == (99_999,)
+
+    def test_invalid_method_raises(self):
+        """Unknown estimation methods are rejected."""
+        # Arrange
+        y, X, vardir, _ = design_matrix(make_area_data(), "y", ["x1"], vardir="vardir")
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="must be 'REML', 'ML', or 'FH'"):
+            eblupFH(y, X, vardir, method="OLS")
+
+    def test_non_positive_vardir_raises(self):
+        """Sampling variances must be positive."""
+        # Arrange
+        y, X, vardir, _ = design_matrix(make_area_data(), "y", ["x1"], vardir="vardir")
+        vardir[0] = 0
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="must be positive"):
+            eblupFH(y, X, vardir)
+
+
+class TestFayHerriotBatch:
+    """Test suite for mseFH_batch."""
+
+    @pytest.mark.parametrize("method", ["REML", "ML", "FH"])
+    def test_batch_matches_separate_fits(self, method):
+        """Fitting responses together gives the same results as fitting them one by one."""
+        # Arrange
+        data = make_area_data()
+        pairs = [("y", "vardir"), ("y2", "vardir2"), ("x2", "vardir")]
+        Y, X, Vardir, _ = design_matrix_batch(data, pairs, ["x1"], ["region"])
+
+        # Act
+        batch = mseFH_batch(Y, X, Vardir, method=method)
+
+        # Assert
+        for j, result in enumerate(batch):
+            single = mseFH(Y[:, j], X, Vardir[:, j], method=method)
+            assert result["est"]["fit"]["iterations"] == single["est"]["fit"]["iterations"]
+            np.testing.assert_allclose(result["est"]["fit"]["refvar"], single["est"]["fit"]["refvar"])
+            np.testing.assert_allclose(result["est"]["eblup"], single["est"]["eblup"])
+            np.testing.assert_allclose(result["mse"], single["mse"])
+
+    def test_mismatched_vardir_columns_raise(self):
+        """Every response needs a vardir column."""
+        # Arrange
+        Y, X, Vardir, _ = design_matrix_batch(make_area_data(), [("y", "vardir"), ("y2", "vardir2")], ["x1"])
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="own vardir"):
+            mseFH_batch(Y, X, Vardir[:, :1])
+
+
+class TestRunModelEblupAreaNative:
+    """Test suite for the native EBLUP area runner."""
+
+    def make_parent(self, data):
+        parent = MagicMock(spec=["model1", "of_interest_var", "auxilary_vars", "vardir_var", "as_factor_var", "method"])
+        parent.model1.scan.return_value = data.lazy()
+        parent.of_interest_var = ["y [Numeric]"]
+        parent.auxilary_vars = ["x1 [Numeric]", "x2 [Numeric]"]
+        parent.vardir_var = ["vardir [Numeric]"]
+        parent.as_factor_var = ["region [String]"]
+        parent.method = "REML"
+        return parent
+
+    def test_returns_same_structure_as_r_runner(self):
+        """The native runner returns the results dict and Eblup/MSE/RSE frame of the R runner."""
+        # Arrange
+        parent = self.make_parent(make_area_data())
+
+        # Act
+        results, error, df = run_model_eblup_area_native(parent)
+
+        # Assert
+        assert error is False
+        assert list(results) == [
+            "Model", "Method", "Convergence",
+            "Number of Iterations Performed by The Fisher-scoring Algorithm",
+            "Random Effect Variance", "Goodness of Fit Models",
+        ]
+        assert results["Convergence"] == "Yes"
+        assert results["Goodness of Fit Models"].columns == [
+            'Logarithmic Likelihood', 'Akaike Information Criterion ( AIC )',
+            'Bayesian Information Criterion (BIC)', 'Kullback Information Criterion (KIC)',
+        ]
+        assert df.columns == ['Eblup', 'MSE', 'RSE (%)']
+        assert df.height == 60
+
+    def test_reads_selected_columns_from_scan(self):
+        """Only the selected columns are read from the scan of the data."""
+        # Arrange
+        def unreadable(series):
+            raise AssertionError("an unselected column was read")
+        parent = self.make_parent(make_area_data().with_columns(pl.lit(0.0).alias("unused")))
+        parent.model1.scan.return_value = parent.model1.scan.return_value.with_columns(
+            pl.col("unused").map_batches(unreadable, return_dtype=pl.Float64)
+        )
+
+        # Act
+        results, error, df = run_model_eblup_area_native(parent)
+
+        # Assert
+        assert error is False
+        assert df.height == 60
+        parent.model1.get_data.assert_not_called()
+
+    def test_missing_variable_returns_error(self):
+        """Errors are reported through the (result, error, df) tuple."""
+        # Arrange
+        parent = self.make_parent(make_area_data())
+        parent.auxilary_vars = ["unknown [Numeric]"]
+
+        # Act
+        result, error, df = run_model_eblup_area_native(parent)
+
+        # Assert
+        assert error is True
+        assert "unknown" in result
+        assert df is None
+
+    def test_multiple_variables_return_stacked_frame(self):
+        """Several variables of interest produce one fit row each and a stacked estimate frame."""
+        # Arrange
+        parent = self.make_parent(make_area_data())
+        parent.of_interest_var = ["y [Numeric]", "y2 [Numeric]"]
+        parent.vardir_var = ["vardir [Numeric]", "vardir2 [Numeric]"]
+
+        # Act
+        results, error, df = run_model_eblup_area_native(parent)
+
+        # Assert
+        assert error is False
+        assert results["Model Fit"]["Variable"].to_list() == ["y", "y2"]
+        assert df.columns == ['Variable', 'Eblup', 'MSE', 'RSE (%)']
+        assert df.height == 120
+        assert df["Variable"].to_list() == ["y"] * 60 + ["y2"] * 60
+
+    def test_unpaired_variables_return_error(self):
+        """Variables of interest and direct variances must be paired."""
+        # Arrange
+        parent = self.make_parent(make_area_data())
+        parent.of_interest_var = ["y [Numeric]", "y2 [Numeric]"]
+
+        # Act
+        result, error, df = run_model_eblup_area_native(parent)
+
+        # Assert
+        assert error is True and df is None
@@ -0,0 +1,151 @@
+"""
+Unit tests for the R data cache fingerprinting using pytest with AAA pattern.
+"""
+
+import polars as pl
+import pytest
+
+from service.utils.r_cache import fingerprint_frame, RDataCache
+
+
+class TestFingerprintFrame:
+    """Test suite for fingerprint_frame."""
+
+    def test_fingerprint_equal_for_same_content(self):
+        """Frames with identical content share a fingerprint."""
+        # Arrange
+        df1 = pl.DataFrame({"y": [1.0, 2.0, 3.0], "x": ["a", "b", "c"]})
+        df2 = pl.DataFrame({"y": [1.0, 2.0, 3.0], "x": ["a", "b", "c"]})
+
+        # Act
+        fp1 = fingerprint_frame(df1)
+        fp2 = fingerprint_frame(df2)
+
+        # Assert
+        assert fp1 == fp2, "Expected identical frames to have the same fingerprint"
+
+    def test_fingerprint_changes_when_cell_changes(self):
+        """Editing a single cell changes the fingerprint."""
+        # Arrange
+        df = pl.DataFrame({"y": [1.0, 2.0, 3.0]})
+        edited = df.with_columns(pl.Series("y", [1.0, 2.5, 3.0]))
+
+        # Act & Assert
+        assert fingerprint_frame(df) != fingerprint_frame(edited), \
+            "Expected a cell edit to change the fingerprint"
+
+    def test_fingerprint_is_order_sensitive(self):
+        """Reordering rows changes the fingerprint."""
+        # Arrange
+        df = pl.DataFrame({"y": [1, 2, 3]})
+
+        # Act & Assert
+        assert fingerprint_frame(df) != fingerprint_frame(df.reverse()), \
+            "Expected row order to be part of the fingerprint"
+
+    def test_fingerprint_changes_with_schema(self):
+        """Renaming or casting a column changes the fingerprint."""
+        # Arrange
+        df = pl.DataFrame({"y": [1, 2, 3]})
+
+        # Act
+        renamed = df.rename({"y": "z"})
+        casted = df.cast({"y": pl.Float64})
+
+        # Assert
+        assert len({fingerprint_frame(df), fingerprint_frame(renamed), fingerprint_frame(casted)}) == 3, \
+            "Expected schema changes to produce distinct fingerprints"
+
+    def test_fingerprint_empty_frame(self):
+        """Empty frames can be fingerprinted."""
+        # Arrange
+        df = pl.DataFrame()
+
+        # Act
+        fp = fingerprint_frame(df)
+
+        # Assert
+        assert isinstance(fp, str) and len(fp) == 32
+
+    def test_cache_contains_is_false_for_unknown_frame(self):
+        """A fresh cache does not contain any frame."""
+        # Arrange
+        cache = RDataCache(max_entries=2)
+
+        # Act & Assert
+        assert pl.DataFrame({"y": [1]}) not in cache
+        assert len(cache) == 0
+
+
+class TestRDataCachePush:
+    """Test suite for RDataCache.push against an embedded R session."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        self.ro = pytest.importorskip("rpy2.robjects")
+        from service.utils.r_frame import polars_to_r
+        self.convert = polars_to_r
+        self.cache = RDataCache(max_entries=2)
+        self.df = pl.DataFrame({"y": [1.0, 2.0, 3.0], "x": [10, 20, 30], "name": ["a", "b", "c"]})
+
+    def r_column(self, name, column):
+        return list(self.ro.r(f'{name}[["{column}"]]'))
+
+    def test_repeated_push_is_a_hit(self):
+        """Pushing the same content twice converts it once."""
+        # Act
+        first = self.cache.push(self.df, self.convert, name="r_test")
+        second = self.cache.push(self.df.clone(), self.convert, name="r_test")
+
+        # Assert
+        assert (first, second) == (False, True)
+        assert self.cache.converted_columns == 3
+
+    def test_delta_converts_changed_columns_only(self):
+        """A frame differing in one column is assembled from the resident frame and that column."""
+        # Arrange
+        self.cache.push(self.df, self.convert, name="r_test")
+        edited = self.df.with_columns(pl.Series("x", [10, 25, 30]))
+
+        # Act
+        self.cache.push(edited, self.convert, name="r_test")
+
+        # Assert
+        assert self.cache.converted_columns == 4
+        assert self.r_column("r_test", "x") == [10, 25, 30]
+        assert self.r_column("r_test", "y") == [1.0, 2.0, 3.0]
+        assert list(self.ro.r("names(r_test)")) == ["y", "x", "name"]
+
+    def test_least_recently_used_evicted(self):
+        """Beyond `max_entries`, the least recently pushed frame is dropped."""
+        # Arrange
+        frames = [self.df.with_columns(pl.lit(i).alias("x")) for i in range(3)]
+
+        # Act
+        for frame in frames:
+            self.cache.push(frame, self.convert, name="r_test")
+
+        # Assert
+        assert len(self.cache) == 2
+        assert frames[0] not in self.cache and frames[2] in self.cache
+
+    def test_stale_model_fingerprints_not_pushed(self):
+        """A model frame replaced without `mark_dirty` is pushed with its new content."""
+        # Arrange
+        from PyQt6.QtWidgets import QApplication
+        from model.TableModel import TableModel
+        from service.utils.r_cache import model_fingerprints
+        if not QApplication.instance():
+            self.app = QApplication([])
+        model = TableModel(self.df)
+        self.cache.push(model.get_data(), self.convert, name="r_test", fingerprints=model.column_fingerprints())
+        model._data = model.get_data().with_columns(pl.col("x") + 1)
+
+        # Act
+        data = model.get_data()
+        self.cache.push(data, self.convert, name="r_test", fingerprints=model_fingerprints(data, model))
+
+        # Assert
+        assert self.r_column("r_test", "x") == [11, 21, 31]
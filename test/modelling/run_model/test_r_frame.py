@@ -0,0 +1,195 @@
+"""
+Unit tests for the shared Polars to R frame preparation using pytest with AAA pattern.
+"""
+
+import polars as pl
+import pytest
+
+import service.utils.r_frame as r_frame
+from service.utils.r_frame import collect_for_script, normalize_for_r, project_frame, push_frame, script_columns
+
+
+class TestScriptColumns:
+    """Test suite for script_columns."""
+
+    def test_finds_identifiers_and_quoted_names(self):
+        """Columns named as identifiers, in quotes, in backquotes or with underscores for spaces are referenced."""
+        # Arrange
+        script = (
+            'names(data) <- gsub(" ", "_", names(data)); #Replace space with underscore\n'
+            'formula <- y ~ x.1 + `x 2` + as.factor(Region_Code)\n'
+            'vardir_var <- data["var dir"]\n'
+            'model<-mseFH(formula, vardir_var, method = "REML", data=data)'
+        )
+        columns = ["id", "y", "x.1", "x 2", "Region Code", "var dir", "unused"]
+
+        # Act
+        referenced = script_columns(script, columns)
+
+        # Assert
+        assert referenced == ["y", "x.1", "x 2", "Region Code", "var dir"]
+
+    def test_dot_formula_needs_every_column(self):
+        """A formula with `~ .` uses every column of the data."""
+        # Act & Assert
+        assert script_columns("model <- lm(y ~ ., data=data)", ["y", "x"]) is None
+
+    @pytest.mark.parametrize("script", [
+        "model <- lm(y ~ x + ., data=data)",
+        "v <- \"x\"\nmodel <- lm(data[[v]] ~ data$y)",
+        "model <- lm(y ~ data[[2]], data=data)",
+        "formula <- as.formula(paste0(\"y ~ \", paste0(\"x\", 1:3, collapse = \" + \")))",
+        "x <- sapply(1:3, function(i) paste(\"x\", i, sep = \"_\"))\nmodel <- lm(y ~ data[, x])",
+        "z <- get(\"x_\", data)\nmodel <- lm(y ~ z)",
+        "data <- data %>% select(y, starts_with(\"x\"))",
+        "data <- data %>% mutate(z = .data[[v]])",
+    ])
+    def test_unresolved_references_need_every_column(self, script):
+        """Columns used without being named (`.`, `data[[v]]`, names built with paste, get, tidyselect) send every column."""
+        # Act & Assert
+        assert script_columns(script, ["y", "x", "x_1", "x_2", "unused"]) is None
+
+    @pytest.mark.parametrize("script", [
+        "summary_results <- summary(data)",
+        "m <- cor(data)\nx <- data$x",
+        "means <- sapply(data, mean)",
+        "out <- lapply(data, function(column) sum(is.na(column)))",
+        "k <- ncol(data)\nmodel <- lm(y ~ x, data=data)",
+        "for (v in names(data)) print(v)",
+        "subset <- data[, 2:4]",
+    ])
+    def test_whole_frame_uses_need_every_column(self, script):
+        """Uses of the frame that do not name its columns send every column."""
+        # Act & Assert
+        assert script_columns(script, ["y", "x", "z", "unused"]) is None
+
+    def test_named_frame_uses_keep_projection(self):
+        """Uses of the frame through named columns keep the projection, for the name the frame is bound to."""
+        # Arrange
+        script = (
+            'names(datahb) <- gsub(" ", "_", names(datahb))\n'
+            'dummies_f <- model.matrix(~f - 1, datahb)\n'
+            'datahb <- cbind(datahb, dummies_f)\n'
+            'pop <- datahb[is.na(datahb$w), ]\n'
+            'both <- datahb[, c("x", "y")]\n'
+            'p <- ggplot(datahb, aes(x = x)) + geom_histogram()\n'
+            'print("datahb loaded")\n'
+            'model <- lm(y ~ x, data = datahb)'
+        )
+
+        # Act
+        referenced = script_columns(script, ["y", "x", "f", "w", "unused"], "datahb")
+
+        # Assert
+        assert referenced == ["y", "x", "f", "w"]
+        assert script_columns("s <- summary(datahb)\nx <- datahb$x", ["x", "unused"], "datahb") is None
+        assert script_columns("s <- summary(datahb)\nx <- data$x", ["x", "unused"]) == ["x"]
+
+    def test_resolved_constructs_keep_projection(self):
+        """A formula pasted from names given in full, quoted `[[`, and `.` or paste0 in comments or strings keep the projection."""
+        # Arrange
+        script = (
+            '# Get variabel RHS, paste0(...) of the columns\n'
+            'rhs_vars <- c("x")\n'
+            'formula_str <- paste("y ~", paste(rhs_vars, collapse = " + "))\n'
+            'w <- data[["w"]]\n'
+            'model <- lm(as.formula(formula_str), data=data, subset = w > 0.5); print("fit.")'
+        )
+
+        # Act
+        referenced = script_columns(script, ["y", "x", "w", "unused"])
+
+        # Assert
+        assert referenced == ["y", "x", "w"]
+
+    def test_project_frame_without_references(self):
+        """A frame is sent as is when the script names none of its columns."""
+        # Arrange
+        df = pl.DataFrame({"y": [1.0], "x": [2.0]})
+
+        # Act & Assert
+        assert project_frame(df, "print(1)") is df
+        assert project_frame(df, "z <- data$y").columns == ["y"]
+
+
+class TestCollectForScript:
+    """Test suite for collect_for_script."""
+
+    def test_projects_and_drops_blank_rows(self):
+        """Only the referenced columns are collected and rows blank in all of them are dropped."""
+        # Arrange
+        frame = pl.LazyFrame({"y": [1.0, None, 3.0], "x": [1, None, None], "other": ["a", "b", "c"]})
+
+        # Act
+        df = collect_for_script(frame, "model <- lm(y ~ x, data=data)")
+
+        # Assert
+        assert df.columns == ["y", "x"]
+        assert df["y"].to_list() == [1.0, 3.0]
+
+    def test_concatenates_frames_of_different_heights(self):
+        """Several scans are collected and padded horizontally, skipping frames without referenced columns."""
+        # Arrange
+        sheet1 = pl.LazyFrame({"y": [1.0, 2.0, 3.0], "unused": [0, 0, 0]})
+        sheet2 = pl.LazyFrame({"mean_x": [5.0]})
+        sheet3 = pl.LazyFrame({"z": [1, 2, 3, 4, 5]})
+
+        # Act
+        df = collect_for_script([sheet1, sheet2, sheet3], "r <- cor(data[, c(\"y\", \"mean_x\")])", drop="any")
+
+        # Assert
+        assert df.columns == ["y", "mean_x"]
+        assert df.height == 1
+
+
+class TestNormalizeForR:
+    """Test suite for normalize_for_r."""
+
+    def test_casts_null_and_categorical_columns(self):
+        """Null-typed and categorical columns become strings, the other dtypes are kept."""
+        # Arrange
+        df = pl.DataFrame({
+            "empty": [None, None, None],
+            "group": pl.Series(["a", None, "b"], dtype=pl.Categorical),
+            "count": [1, None, 3],
+            "value": [1.5, None, 2.5],
+        })
+
+        # Act
+        normalized = normalize_for_r(df)
+
+        # Assert
+        assert normalized.schema == pl.Schema({
+            "empty": pl.Utf8, "group": pl.Utf8, "count": pl.Int64, "value": pl.Float64,
+        })
+        assert normalized["group"].to_list() == ["a", None, "b"]
+        assert normalized["empty"].null_count() == 3
+
+    def test_returns_frame_unchanged_without_casts(self):
+        """A frame without columns to cast is returned as is, without a copy."""
+        # Arrange
+        df = pl.DataFrame({"count": [1, None, 3], "name": ["a", "b", None]})
+
+        # Act & Assert
+        assert normalize_for_r(df) is df
+
+
+class TestPushFrame:
+    """Test suite for push_frame."""
+
+    def test_prunes_columns_and_fingerprints(self, monkeypatch):
+        """Only the requested columns and their fingerprints are handed to the R data cache."""
+        # Arrange
+        pushed = {}
+        monkeypatch.setattr(r_frame.r_data_cache, "push", lambda df, convert, name, fingerprints: pushed.update(
+            df=df, name=name, fingerprints=fingerprints
+        ))
+        df = pl.DataFrame({"y": [1.0, 2.0], "x": [3.0, 4.0], "unused": [None, None]})
+
+        # Act
+        push_frame(df, columns=["x", "y", "x"])
+
+        # Assert
+        assert pushed["df"].columns == ["x", "y"]
+        assert list(pushed["fingerprints"]) == ["x", "y"]
+        assert pushed["name"] == "r_df"
@@ -0,0 +1,271 @@
+"""
+Unit tests for the structured R result builders using pytest with AAA pattern.
+"""
+
+import polars as pl
+import pytest
+
+from service.modelling.running_model.r_results import (
+    AREA_BUNDLE, AREA_TABLES, HB_BUNDLE, HB_TABLES, PROJECTION_BUNDLE, PROJECTION_TABLES, PSEUDO_BUNDLE,
+    PSEUDO_TABLES, UNIT_BUNDLE, UNIT_TABLES,
+    area_results, hb_results, projection_results, pseudo_results, unit_estimates, unit_results
+)
+
+
+def make_unit_tables():
+    return {
+        "eblup_unit": pl.DataFrame({"domain": [1, 2], "eblup": [120.0, 80.0], "sampsize": [3, 4]}),
+        "mse_unit": pl.DataFrame({"domain": [1, 2], "mse": [16.0, 4.0]}),
+        "unit_info": pl.DataFrame({
+            "method": ["Linear mixed model fit by REML ['lmerMod']"],
+            "formula": ["ys ~ -1 + Xs + (1 | as.factor(dom))"],
+            "criterion": [321.5],
+            "nobs": [36.0],
+            "group": ["as.factor(dom)"],
+            "ngroups": [12.0],
+        }),
+        "unit_residuals": pl.DataFrame({
+            "Statistic": ["Minimum", "Quartil 1", "Median", "Quartil 3", "Maximum"],
+            "Value": [-2.1, -0.6, 0.1, 0.5, 1.9],
+        }),
+        "unit_fixed": pl.DataFrame({
+            "Effect": ["Xs(Intercept)", "XsCornPix"],
+            "Estimate": [51.0, 0.33],
+            "Standard Error": [24.9, 0.05],
+            "t-value": [2.05, 6.6],
+        }),
+        "unit_random": pl.DataFrame({
+            "Group": ["as.factor(dom)", "Residual"],
+            "Name": ["(Intercept)", None],
+            "Variance": [63.3, 297.7],
+            "Standard Deviation": [7.96, 17.25],
+        }),
+        "unit_correlation": pl.DataFrame({
+            "Effect": ["Xs(Intercept)", "XsCornPix"],
+            "Xs(Intercept)": [1.0, -0.9],
+            "XsCornPix": [-0.9, 1.0],
+        }),
+    }
+
+
+class TestUnitResults:
+    """Test suite for the EBLUP unit result builder."""
+
+    def test_builds_summary_keys(self):
+        """The unit results keep the keys and values of the model summary."""
+        # Act
+        results = unit_results(make_unit_tables())
+
+        # Assert
+        assert list(results) == [
+            "Model", "Method", "Formula", "Criterion of Convergence", "Number of Observation", "Groups",
+            "Summary of Modelling", "Fixed Effects", "Random Effects", "Correlation of Fixed Effect",
+        ]
+        assert results["Criterion of Convergence"] == pytest.approx(321.5)
+        assert results["Number of Observation"] == 36
+        assert results["Groups"] == "Number of obs: 36, groups: as.factor(dom), 12"
+        assert results["Fixed Effects"]["Estimate"].dtype == pl.Float64
+
+    def test_estimates_use_merged_mse(self):
+        """The MSE merged over bootstrap shards replaces the MSE of the bundle."""
+        # Act
+        df = unit_estimates(make_unit_tables(), mse=[25.0, 1.0])
+
+        # Assert
+        assert df.columns == ['Domain', 'Eblup', 'Sample size', 'MSE', 'RSE']
+        assert df['RSE'].to_list() == pytest.approx([5 / 120 * 100, 1 / 80 * 100])
+
+
+@pytest.mark.parametrize("bundle, names", [
+    (AREA_BUNDLE, AREA_TABLES),
+    (UNIT_BUNDLE, UNIT_TABLES),
+    (PROJECTION_BUNDLE, PROJECTION_TABLES),
+    (PSEUDO_BUNDLE, PSEUDO_TABLES),
+    (HB_BUNDLE, HB_TABLES),
+])
+def test_bundle_defines_every_table(bundle, names):
+    """Every table read back is built by the R snippet of the bundle."""
+    # Assert
+    assert all(f"{name} <- " in bundle for name in names)
+
+
+class TestAreaResults:
+    """Test suite for the EBLUP area result builder."""
+
+    def test_builds_results_and_estimates(self):
+        """The area bundle gives the fit information, goodness of fit and Eblup/MSE/RSE frame."""
+        # Arrange
+        tables = {
+            "estimate_area": pl.DataFrame({"Eblup": [10.0, 20.0], "MSE": [1.0, 4.0]}),
+            "fit_area": pl.DataFrame({"method": ["REML"], "convergence": [True], "iterations": [4.0], "refvar": [0.5]}),
+            "goodness_area": pl.DataFrame({"V1": [-10.0], "V2": [26.0], "V3": [28.0], "V4": [30.0]}),
+        }
+
+        # Act
+        results, df = area_results(tables)
+
+        # Assert
+        assert results["Convergence"] == "Yes"
+        assert results["Number of Iterations Performed by The Fisher-scoring Algorithm"] == 4
+        assert results["Random Effect Variance"] == "0.5"
+        assert results["Goodness of Fit Models"]["Akaike Information Criterion ( AIC )"][0] == 26.0
+        assert df["RSE (%)"].to_list() == pytest.approx([10.0, 10.0])
+
+    @pytest.mark.parametrize("convergence, label", [(True, "Yes"), (False, "NO"), (None, "Not Converged")])
+    def test_convergence_labels(self, convergence, label):
+        """Convergence is labelled as by the embedded R path, a missing flag being "Not Converged"."""
+        # Arrange
+        tables = {
+            "estimate_area": pl.DataFrame({"Eblup": [10.0], "MSE": [1.0]}),
+            "fit_area": pl.DataFrame({"method": ["REML"], "convergence": pl.Series([convergence], dtype=pl.Boolean),
+                                      "iterations": [4.0], "refvar": [0.5]}),
+            "goodness_area": pl.DataFrame({"V1": [-10.0], "V2": [26.0], "V3": [28.0], "V4": [30.0]}),
+        }
+
+        # Act
+        results, _ = area_results(tables)
+
+        # Assert
+        assert results["Convergence"] == label
+
+
+class TestProjectionResults:
+    """Test suite for the projection result builder."""
+
+    def test_missing_formula(self):
+        """A model without formula reports that no formula was found."""
+        # Arrange
+        tables = {
+            "projection_info": pl.DataFrame({"formula": [None]}, schema={"formula": pl.Utf8}),
+            "projection_coefficients": pl.DataFrame({"(Intercept)": [1.5], "x1": [0.2]}),
+            "projection_prediction": pl.DataFrame({"Value": [0.1, 0.9]}),
+            "projection_data": pl.DataFrame({"id": [1, 2], "ypr": [0.1, 0.9]}),
+        }
+
+        # Act
+        results, df = projection_results(tables)
+
+        # Assert
+        assert results["Formula of Modelling"] == "No formula found"
+        assert results["Coefficients of Modelling"].columns == ["(Intercept)", "x1"]
+        assert results["Prediction"]["Index"].to_list() == [1, 2]
+        assert df.columns == ["id", "ypr"]
+
+
+class TestHBResults:
+    """Test suite for the hierarchical Bayesian result builder."""
+
+    def test_builds_results_and_estimates(self):
+        """The HB bundle gives the coefficients, random effect variance and quantiles of every domain."""
+        # Arrange
+        tables = {
+            "hb_estimate": pl.DataFrame({
+                "MEAN": [10.0], "SD": [2.0], "2.5%": [6.0], "25%": [9.0], "50%": [10.0], "75%": [11.0], "97.5%": [14.0],
+            }),
+            "hb_coefficient": pl.DataFrame({"Parameter": ["b[0]"], "Mean": [1.0]}),
+            "hb_fit": pl.DataFrame({"refvar": [0.25]}),
+        }
+
+        # Act
+        results, df = hb_results(tables)
+
+        # Assert
+        assert results["Estimated Random Effect Variances"] == "0.25"
+        assert df.columns == ['HB Mean', 'HB 25%', 'HB 50%', 'HB 75%', 'HB 97.5%', 'Standard Deviation', 'RSE']
+        assert df["RSE"][0] == pytest.approx(20.0)
+
+
+class TestPseudoResults:
+    """Test suite for the EBLUP pseudo result builder."""
+
+    def make_tables(self, measures=True):
+        return {
+            "pseudo_info": pl.DataFrame({
+                "model": ["Empirical Best Prediction"],
+                "call": ["formula"],
+                "fixed": ["y ~ x1 + x2"],
+                "threshold": [12.0],
+                "weighted": [True],
+                "out_of_smp": [3],
+                "in_smp": [17],
+                "size_smp": [400],
+                "size_pop": [4000],
+                "icc": [0.12],
+                "transformation": ["no"],
+                "variance_method": ["REML"],
+                "mse_method": ["parametric bootstrap"],
+            }),
+            "pseudo_domains": pl.DataFrame({
+                "Domains": ["Sample_domains", "Population_domains"],
+                "Min.": [5.0, 50.0],
+                "1st Qu.": [10.0, 100.0],
+                "Median": [20.0, 200.0],
+                "Mean": [23.5, 200.0],
+                "3rd Qu.": [30.0, 300.0],
+                "Max.": [50.0, 500.0],
+            }),
+            "pseudo_measures": pl.DataFrame({"Marginal_R2": [0.4], "Conditional_R2": [0.5]}) if measures else pl.DataFrame(),
+            "pseudo_normality": pl.DataFrame(),
+            "pseudo_estimate": pl.DataFrame({"Domain": ["a", "b"], "Mean": [10.0, 20.0], "MSE": [1.0, 4.0]}),
+            "pseudo_estimators": pl.DataFrame({"Domain": ["a", "b"], "Mean": [10.0, 20.0]}),
+            "pseudo_varcov": pl.DataFrame({"variance": [0.3]}),
+        }
+
+    def test_builds_summary_keys(self):
+        """The pseudo results hold the counts, domain size summaries and ICC of the model."""
+        # Act
+        results, df = pseudo_results(self.make_tables())
+
+        # Assert
+        assert results["Prediction Method"] == "Empirical Best Prediction with sampling weights"
+        assert results["In Sample domains"] == 17
+        assert results["Units in population"] == 4000
+        assert results["Sample_domains"] == {
+            "Min": 5.0, "1st Qu": 10.0, "Median": 20.0, "Mean": 23.5, "3rd Qu": 30.0, "Max": 50.0
+        }
+        assert results["ICC"] == pytest.approx(0.12)
+        assert results["Has Explanatory Measures"] is True
+        assert "Has Residual Diagnostics" not in results
+        assert results["Random Effect Variance"] == pytest.approx(0.3)
+        assert df["RSE (%)"].to_list() == pytest.approx([10.0, 10.0])
+
+    def test_optional_tables_are_skipped(self):
+        """Empty optional tables leave their keys out."""
+        # Arrange
+        tables = self.make_tables(measures=False)
+
+        # Act
+        results, _ = pseudo_results(tables)
+
+        # Assert
+        assert "Explanatory Measures" not in results
+        assert set(tables) == set(PSEUDO_TABLES)
+
+    def test_builds_call_threshold_and_methods(self):
+        """The pseudo results hold the call, the automatic threshold and the variance and MSE methods of the model."""
+        # Act
+        results, _ = pseudo_results(self.make_tables())
+
+        # Assert
+        assert results["Call"] == "formula"
+        assert results["Fixed Formula"] == "y ~ x1 + x2"
+        assert results["Threshold Percentage"] == 60
+        assert results["Threshold Value"] == pytest.approx(12.0)
+        assert results["Variance Estimation Method"] == "REML"
+        assert results["MSE Method"] == "parametric bootstrap"
+
+    def test_given_threshold_and_literal_formula_are_skipped(self):
+        """A threshold given to ebp and a formula written in the call leave their keys out."""
+        # Arrange
+        tables = self.make_tables()
+        tables["pseudo_info"] = tables["pseudo_info"].with_columns(
+            pl.lit("y ~ x1 + x2").alias("call"), pl.lit(None, dtype=pl.Float64).alias("threshold")
+        )
+
+        # Act
+        results, _ = pseudo_results(tables)
+
+        # Assert
+        assert results["Call"] == "y ~ x1 + x2"
+        assert "Fixed Formula" not in results
+        assert "Threshold Value" not in results
@@ -0,0 +1,101 @@
+"""
+Unit tests for the R worker pool job rendering using pytest with AAA pattern.
+"""
+
+import os
+import stat
+import sys
+
+import polars as pl
+import pytest
+
+from service.utils.r_worker_pool import RJob, RWorkerPool
+
+
+class TestRJob:
+    """Test suite for RJob.render."""
+
+    def test_render_writes_inputs_as_arrow_ipc(self, tmp_path):
+        """Input frames are written as Arrow IPC files readable by Polars."""
+        # Arrange
+        df = pl.DataFrame({"y": [1.0, 2.0], "area": ["a", "b"]})
+        job = RJob(script="model <- 1", inputs={"data": df})
+
+        # Act
+        script, _ = job.render(str(tmp_path))
+
+        # Assert
+        path = os.path.join(str(tmp_path), "input_data.arrow")
+        assert pl.read_ipc(path).equals(df)
+        assert 'data <- as.data.frame(arrow::read_ipc_file(' in script
+
+    def test_render_orders_inputs_script_and_outputs(self, tmp_path):
+        """Inputs are bound before the script and outputs are written after it."""
+        # Arrange
+        job = RJob(script="result <- data", inputs={"data": pl.DataFrame({"y": [1]})}, outputs=["result"])
+
+        # Act
+        script, output_paths = job.render(str(tmp_path))
+
+        # Assert
+        lines = script.strip().split("\n")
+        assert lines[0].startswith("data <- ")
+        assert lines[1] == "result <- data"
+        assert lines[2].startswith("arrow::write_ipc_file(as.data.frame(result), ")
+        assert output_paths == {"result": os.path.join(str(tmp_path), "output_result.arrow")}
+
+    def test_render_uses_forward_slashes_in_r_paths(self):
+        """Paths embedded in the R script never contain backslashes."""
+        # Arrange
+        job = RJob(script="", outputs=["x"])
+
+        # Act
+        script, _ = job.render("C:\\temp\\job")
+
+        # Assert
+        assert "\\" not in script
+
+
+class TestRWorkerPool:
+    """Test suite for RWorkerPool without an R installation."""
+
+    def test_submit_without_rscript_raises(self, monkeypatch):
+        """Submitting a job fails clearly when Rscript cannot be found."""
+        # Arrange
+        monkeypatch.setattr("service.utils.r_worker_pool.find_rscript", lambda: None)
+        pool = RWorkerPool(size=1)
+
+        # Act & Assert
+        assert not pool.is_available()
+        with pytest.raises(RuntimeError, match="Rscript was not found"):
+            pool.submit(RJob(script=""))
+
+    def test_cancel_before_start_skips_job(self):
+        """A job cancelled before it starts returns without running."""
+        # Arrange
+        pool = RWorkerPool(size=1, rscript="Rscript")
+        job = RJob(script="")
+
+        # Act
+        pool.cancel(job)
+        result = pool._execute(job)
+
+        # Assert
+        assert result.error == "Job cancelled"
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="uses a shell script as Rscript")
+    def test_worker_startup_failure_marks_pool_unavailable(self, tmp_path):
+        """A worker that fails to start (e.g. arrow missing) makes the pool unavailable, for the embedded R fallback."""
+        # Arrange
+        rscript = tmp_path / "Rscript"
+        rscript.write_text("#!/bin/sh\necho \"there is no package called 'arrow'\"\nexit 1\n")
+        rscript.chmod(rscript.stat().st_mode | stat.S_IEXEC)
+        pool = RWorkerPool(size=1, rscript=str(rscript))
+
+        # Act
+        with pytest.raises(RuntimeError, match="failed to start"):
+            pool._execute(RJob(script=""))
+
+        # Assert
+        assert not pool.is_available()
+        assert "arrow" in pool.startup_error
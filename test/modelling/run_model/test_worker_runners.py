@@ -0,0 +1,80 @@
+"""
+Unit tests for the R worker pool runners of the HB, pseudo and projection models using pytest with AAA pattern.
+"""
+
+from unittest.mock import MagicMock
+
+import polars as pl
+import pytest
+
+pytest.importorskip("rpy2.robjects")
+
+import service.modelling.running_model.Projection as projection
+import service.modelling.running_model.SaeEblupPseudo as pseudo
+import service.modelling.running_model.SaeHBArea as hb
+from service.modelling.running_model.r_results import HB_TABLES, PROJECTION_TABLES, PSEUDO_TABLES
+from service.utils.r_worker_pool import RJobResult
+
+RUNNERS = [
+    (hb.run_model_hb_area_worker, hb, "datahb", "modelhb <- Beta(y ~ x, iter.mcmc = 100, data = datahb)", [*HB_TABLES, "hb_plots"]),
+    (
+        pseudo.run_model_eblup_pseudo_worker, pseudo, "data_pseudo",
+        "smp_data <- data_pseudo[!is.na(data_pseudo$y), ]\nmodel_pseudo <- ebp(y ~ x, smp_data = smp_data)", PSEUDO_TABLES,
+    ),
+    (
+        projection.run_model_projection_worker, projection, "data_pe",
+        'y <- data_pe[["y"]];\nx <- data_pe[["x"]];\nmodel_pe <- projection(y ~ x, data_model = data.frame(y, x))', PROJECTION_TABLES,
+    ),
+]
+
+
+def make_parent(r_script):
+    parent = MagicMock(spec=["model1", "r_script", "job", "on_output"])
+    parent.model1.scan.return_value = pl.LazyFrame({"y": [0.1, 0.2, 0.3], "x": [1.0, 2.0, 3.0], "unused": ["a", "b", "c"]})
+    parent.r_script = r_script
+    parent.on_output = print
+    return parent
+
+
+class TestWorkerRunners:
+    """Test suite for the worker runners of the HB, pseudo and projection models."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, monkeypatch, tmp_path):
+        # The HB runner creates the temp directory of its plots in the working directory
+        monkeypatch.chdir(tmp_path)
+
+    @pytest.mark.parametrize("runner, module, frame_name, r_script, outputs", RUNNERS)
+    def test_job_binds_script_columns_and_returns_tables(self, monkeypatch, runner, module, frame_name, r_script, outputs):
+        """The job binds the columns of the script to the frame of the model and asks for the tables of its bundle."""
+        # Arrange
+        jobs = []
+        monkeypatch.setattr(module.r_worker_pool, "run", lambda job: jobs.append(job) or RJobResult(error="stopped"))
+        parent = make_parent(r_script)
+
+        # Act
+        runner(parent)
+
+        # Assert
+        job = jobs[0]
+        assert parent.job is job
+        assert list(job.inputs) == [frame_name]
+        assert job.inputs[frame_name].columns == ["y", "x"]
+        assert r_script in job.script
+        assert job.outputs == outputs
+        assert job.on_output is print
+
+    @pytest.mark.parametrize("runner, module, frame_name, r_script, outputs", RUNNERS)
+    def test_r_error_returns_error(self, monkeypatch, runner, module, frame_name, r_script, outputs):
+        """An R error of the worker is reported through the error flag of the returned tuple."""
+        # Arrange
+        monkeypatch.setattr(module.r_worker_pool, "run", lambda job: RJobResult(error="object 'y' not found"))
+        parent = make_parent(r_script)
+
+        # Act
+        returned = runner(parent)
+
+        # Assert
+        assert returned[0] == "object 'y' not found"
+        assert returned[1] is True
+        assert all(value is None for value in returned[2:])
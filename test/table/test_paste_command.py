@@ -0,0 +1,135 @@
+"""
+Unit tests for the clipboard parsing and PasteCommand using pytest with AAA pattern.
+This test suite follows the Arrange-Act-Assert pattern and includes both success and failure scenarios.
+"""
+
+import pytest
+import polars as pl
+from PyQt6.QtWidgets import QApplication
+
+from model.TableModel import TableModel
+from service.command.PasteCommand import PasteCommand
+from service.utils.clipboard import parse_clipboard, fill_selection, cast_pasted
+
+
+class TestClipboard:
+    """Test suite for the clipboard parsing helpers."""
+
+    def test_parse_spreadsheet_text(self):
+        """Rows and fields are split once, blank lines skipped and short rows padded."""
+        # Act
+        block = parse_clipboard("1\t2\tx\r\n\r\n3\t\r\n4\t5\r\n")
+
+        # Assert
+        assert block.rows() == [("1", "2", "x"), ("3", "", ""), ("4", "5", "")]
+
+    def test_parse_empty(self):
+        """Empty clipboard text gives an empty frame."""
+        # Assert
+        assert parse_clipboard("\r\n").is_empty()
+
+    def test_fill_selection_repeats_block(self):
+        """The block is repeated down and across the selection."""
+        # Arrange
+        block = parse_clipboard("a\tb\nc\td")
+
+        # Act
+        filled = fill_selection(block, 3, 3)
+
+        # Assert
+        assert filled.rows() == [("a", "b", "a"), ("c", "d", "c"), ("a", "b", "a")]
+
+    def test_cast_numbers(self):
+        """Numbers with a decimal comma are read, empty strings become nulls."""
+        # Act
+        result = cast_pasted(pl.Series(["1,5", "", " 2 "]), pl.Float64)
+
+        # Assert
+        assert result.dtype == pl.Float64
+        assert result.to_list() == [1.5, None, 2.0]
+
+    def test_cast_null_column_infers_type(self):
+        """Values pasted in a Null column give it an integer or float type."""
+        # Assert
+        assert cast_pasted(pl.Series(["1", "2"]), pl.Null).dtype == pl.Int64
+        assert cast_pasted(pl.Series(["1", "2.5"]), pl.Null).dtype == pl.Float64
+
+    def test_cast_invalid_keeps_text(self):
+        """Values a column cannot hold are kept as text."""
+        # Act
+        result = cast_pasted(pl.Series(["1", "abc"]), pl.Int64)
+
+        # Assert
+        assert result.dtype == pl.Utf8
+
+
+class TestPasteCommand:
+    """Test suite for the bulk paste of PasteCommand."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.frame = pl.DataFrame({
+            "a": [1, 2, 3, 4],
+            "b": pl.Series([None] * 4, dtype=pl.Null),
+            "c": ["w", "x", "y", "z"],
+        })
+        self.model = TableModel(self.frame)
+
+    def paste(self, text, row, column):
+        self.model.undo_stack.push(PasteCommand(self.model, row, column, parse_clipboard(text)))
+
+    def test_paste_casts_per_column(self):
+        """Every column receives the pasted values in its own type."""
+        # Act
+        self.paste("7\t1.5\tp\n8\t2\tq", 1, 0)
+
+        # Assert
+        assert self.model.get_data().to_dict(as_series=False) == {
+            "a": [1, 7, 8, 4], "b": [None, 1.5, 2.0, None], "c": ["w", "p", "q", "z"],
+        }
+
+    def test_paste_clipped_to_table(self):
+        """Cells falling outside the table are ignored."""
+        # Act
+        self.paste("k\tl\nm\tn", 3, 2)
+
+        # Assert
+        assert self.model.get_data()["c"].to_list() == ["w", "x", "y", "k"]
+        assert self.model.columnCount(None) == 3
+
+    def test_undo_restores_values_and_types(self):
+        """Undo restores the replaced cells and the former column types."""
+        # Arrange
+        self.paste("x\t3", 0, 0)
+
+        # Act
+        self.model.undo()
+
+        # Assert
+        assert self.model.get_data().equals(self.frame)
+        assert self.model.schema() == self.frame.schema
+
+    def test_redo_after_undo(self):
+        """Redo applies the paste again."""
+        # Arrange
+        self.paste("9", 2, 0)
+        self.model.undo()
+
+        # Act
+        self.model.redo()
+
+        # Assert
+        assert self.model.get_data()["a"].to_list() == [1, 2, 9, 4]
+
+    def test_undo_keeps_only_replaced_block(self):
+        """The command keeps the replaced cells only."""
+        # Act
+        self.paste("5\n6", 1, 0)
+
+        # Assert
+        command = self.model.undo_stack.command(0)
+        assert command.old_block.get().to_dict(as_series=False) == {"a": [2, 3]}
@@ -0,0 +1,557 @@
+"""
+Unit tests for TableModel using pytest with AAA pattern.
+This test suite follows the Arrange-Act-Assert pattern and includes both success and failure scenarios.
+"""
+
+import threading
+import time
+
+import pytest
+import polars as pl
+from PyQt6.QtCore import Qt, QThread
+from PyQt6.QtWidgets import QApplication
+
+from model.TableModel import TableModel
+from service.utils.r_cache import column_fingerprint, model_fingerprints
+from service.utils.schema_cache import SchemaCache
+
+
+class TestTableModelDirtyColumns:
+    """Test suite for the dirty column tracking of TableModel."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.model = TableModel(pl.DataFrame({
+            "y": [1.0, 2.0, 3.0],
+            "x": [10, 20, 30],
+            "name": ["a", "b", "c"],
+        }))
+
+    def test_all_columns_dirty_initially(self):
+        """A new model has no fingerprint computed yet."""
+        # Act
+        dirty = self.model.dirty_columns()
+
+        # Assert
+        assert dirty == ["y", "x", "name"], f"Expected every column to be dirty, got {dirty}"
+
+    def test_column_fingerprints_match_content(self):
+        """Tracked fingerprints are the content fingerprints of the columns."""
+        # Act
+        fingerprints = self.model.column_fingerprints()
+
+        # Assert
+        data = self.model.get_data()
+        assert fingerprints == {col: column_fingerprint(data[col]) for col in data.columns}
+        assert self.model.dirty_columns() == []
+
+    def test_set_data_marks_only_edited_column_dirty(self):
+        """Editing a cell only invalidates the fingerprint of its column."""
+        # Arrange
+        before = self.model.column_fingerprints()
+
+        # Act
+        self.model.setData(self.model.index(1, 0), "2.5")
+
+        # Assert
+        assert self.model.dirty_columns() == ["y"]
+        after = self.model.column_fingerprints()
+        assert after["y"] != before["y"]
+        assert after["x"] == before["x"] and after["name"] == before["name"]
+
+    def test_undo_marks_column_dirty(self):
+        """Undoing an edit restores the original fingerprint."""
+        # Arrange
+        before = self.model.column_fingerprints()
+        self.model.setData(self.model.index(0, 1), "99")
+        self.model.column_fingerprints()
+
+        # Act
+        self.model.undo()
+
+        # Assert
+        assert self.model.dirty_columns() == ["x"]
+        assert self.model.column_fingerprints() == before
+
+    def test_rename_column_marks_names_dirty(self):
+        """Renaming a column drops the old fingerprint and computes the new one."""
+        # Arrange
+        self.model.column_fingerprints()
+
+        # Act
+        self.model.rename_column(2, "label")
+
+        # Assert
+        assert self.model.dirty_columns() == ["label"]
+        assert list(self.model.column_fingerprints()) == ["y", "x", "label"]
+
+    def test_model_fingerprints_reused_when_no_rows_dropped(self):
+        """Frames derived without dropping rows reuse the model fingerprints."""
+        # Arrange
+        df = self.model.get_data().filter(~pl.all_horizontal(pl.all().is_null()))
+
+        # Act
+        fingerprints = model_fingerprints(df, self.model)
+
+        # Assert
+        assert fingerprints == self.model.column_fingerprints()
+
+    def test_model_fingerprints_none_when_rows_dropped(self):
+        """Frames with dropped rows cannot reuse the model fingerprints."""
+        # Arrange
+        df = self.model.get_data().head(2)
+
+        # Act
+        fingerprints = model_fingerprints(df, self.model)
+
+        # Assert
+        assert fingerprints is None
+
+    def test_frame_replaced_without_mark_dirty(self):
+        """A frame replaced without marking its columns dirty has every fingerprint recomputed."""
+        # Arrange
+        self.model.column_fingerprints()
+        self.model._data = self.model.get_data().with_columns(pl.col("x") * 2)
+
+        # Act
+        fingerprints = model_fingerprints(self.model.get_data(), self.model)
+
+        # Assert
+        data = self.model.get_data()
+        assert fingerprints == {col: column_fingerprint(data[col]) for col in data.columns}
+
+    def test_model_fingerprints_for_projected_frame(self):
+        """Frames keeping only some model columns reuse the fingerprints of those columns."""
+        # Act
+        fingerprints = model_fingerprints(self.model.get_data().select("name", "y"), self.model)
+
+        # Assert
+        assert list(fingerprints) == ["name", "y"]
+        assert self.model.dirty_columns() == ["x"]
+
+
+class TestTableModelLazy:
+    """Test suite for TableModel backed by a lazy scan."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.frame = pl.DataFrame({"id": list(range(25)), "value": [i * 0.5 for i in range(25)]})
+        path = tmp_path / "data.csv"
+        self.frame.write_csv(path)
+        self.path = tmp_path / "data.parquet"
+        self.frame.write_parquet(self.path)
+        self.model = TableModel(pl.scan_csv(path), page_size=4, max_pages=2)
+
+    def wait_for_count(self, model):
+        deadline = time.monotonic() + 5
+        while model.counting and time.monotonic() < deadline:
+            QApplication.processEvents()
+
+    def test_csv_rows_counted_in_background(self):
+        """A CSV scan shows its first page at once, the other rows are inserted once counted."""
+        # Arrange
+        model = TableModel(self.model.scan(), page_size=4, max_pages=2)
+        inserted = []
+        model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+        rows = model.rowCount(None)
+
+        # Act
+        self.wait_for_count(model)
+
+        # Assert
+        assert rows == 4
+        assert inserted == [(4, 24)]
+        assert model.rowCount(None) == 25
+        assert not model.counting
+
+    def test_parquet_rows_counted_from_metadata(self):
+        """A Parquet scan has its row count at once."""
+        # Act
+        model = TableModel(pl.scan_parquet(self.path), page_size=4, max_pages=2)
+
+        # Assert
+        assert not model.counting
+        assert model.shape() == (25, 2)
+        assert not model._pages
+
+    def test_materialized_while_counting(self):
+        """Materializing the scan before the count arrives reports every row."""
+        # Arrange
+        model = TableModel(self.model.scan(), page_size=4, max_pages=2)
+
+        # Act
+        height = model.get_data().height
+        self.wait_for_count(model)
+
+        # Assert
+        assert height == 25
+        assert model.rowCount(None) == 25
+        assert not model.counting
+
+    def test_materialized_from_worker_reports_rows_on_gui_thread(self):
+        """A scan materialized by a run thread has its rows reported to the view on the GUI thread."""
+        # Arrange
+        model = TableModel(self.model.scan(), page_size=4, max_pages=2)
+        threads = []
+        model.rowsInserted.connect(lambda *_: threads.append(QThread.currentThread() == model.thread()))
+
+        # Act
+        worker = threading.Thread(target=model.get_data)
+        worker.start()
+        worker.join()
+        self.wait_for_count(model)
+
+        # Assert
+        assert threads == [True]
+        assert model.rowCount(None) == 25
+
+    def test_shape_and_header_without_materializing(self):
+        """The shape, header and shown rows come from the scan, collecting only the needed pages."""
+        # Arrange
+        self.wait_for_count(self.model)
+
+        # Act
+        value = self.model.data(self.model.index(9, 1), Qt.ItemDataRole.DisplayRole)
+        self.model.data(self.model.index(1, 0), Qt.ItemDataRole.DisplayRole)
+        self.model.data(self.model.index(5, 0), Qt.ItemDataRole.DisplayRole)
+
+        # Assert
+        assert self.model.is_lazy()
+        assert self.model.shape() == (25, 2)
+        assert self.model.rowCount(None) == 25
+        assert self.model.headerData(1, Qt.Orientation.Horizontal, Qt.ItemDataRole.DisplayRole) == "value"
+        assert value == "4.5"
+        assert list(self.model._pages) == [0, 1]
+
+    def test_scan_pushes_down_selection(self):
+        """Services read the selected columns and rows through the scan, leaving the model lazy."""
+        # Act
+        df = self.model.scan().select("value").filter(pl.col("value") > 11).collect()
+
+        # Assert
+        assert df["value"].to_list() == [11.5, 12.0]
+        assert self.model.is_lazy()
+
+    def test_edit_materializes(self):
+        """The first edit collects the scan and continues on the DataFrame."""
+        # Act
+        self.model.setData(self.model.index(0, 1), "7.25")
+
+        # Assert
+        assert not self.model.is_lazy()
+        assert self.model.get_data()["value"][0] == 7.25
+        assert self.model.get_data().height == 25
+
+
+class TestTableModelAppendRows:
+    """Test suite for the rows streamed into TableModel while a file is loaded."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.model = TableModel(pl.DataFrame({"id": [1, 2], "value": [0.5, 1.0]}))
+        self.model.loading = True
+
+    def test_append_inserts_rows(self):
+        """Appended rows are reported to the view as inserted at the end."""
+        # Arrange
+        inserted = []
+        self.model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+        # Act
+        self.model.append_rows(pl.DataFrame({"id": [3, 4, 5, 6], "value": [1.5, 2.0, 2.5, 3.0]}))
+
+        # Assert
+        assert self.model.shape() == (6, 2)
+        assert self.model.rowCount(None) == 6
+        assert inserted == [(2, 5)]
+
+    def test_append_relaxes_dtypes(self):
+        """A batch with a wider dtype widens the column instead of failing."""
+        # Act
+        self.model.append_rows(pl.DataFrame({"id": [3.5], "value": [1.5]}))
+
+        # Assert
+        assert self.model.schema()["id"] == pl.Float64
+        assert self.model.get_data()["id"].to_list() == [1.0, 2.0, 3.5]
+
+    def test_cells_read_only_while_loading(self):
+        """Cells cannot be edited until the load is complete."""
+        # Act
+        loading_flags = self.model.flags(self.model.index(0, 0))
+        self.model.loading = False
+        loaded_flags = self.model.flags(self.model.index(0, 0))
+
+        # Assert
+        assert not loading_flags & Qt.ItemFlag.ItemIsEditable
+        assert loaded_flags & Qt.ItemFlag.ItemIsEditable
+
+
+class TestTableModelRememberSchema:
+    """Test suite for remembering the column types of the file a model was loaded from."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path, monkeypatch):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.path = str(tmp_path / "data.csv")
+        pl.DataFrame({"code": [1, 2], "value": [0.5, 1.0]}).write_csv(self.path)
+        self.cache = SchemaCache(str(tmp_path / "schema_cache.json"))
+        monkeypatch.setattr("model.TableModel.schema_cache", self.cache)
+        self.model = TableModel(pl.read_csv(self.path))
+        self.model.schema_source = (self.path, {"separator": ",", "header": True})
+
+    def test_type_change_remembered(self):
+        """Changing a column type records the new types for the file, and undo records them again."""
+        # Act
+        self.model.set_column_type(0, "String")
+        changed = self.cache.get(self.path, separator=",", header=True)
+        self.model.undo()
+        undone = self.cache.get(self.path, separator=",", header=True)
+
+        # Assert
+        assert changed == {"code": pl.Utf8, "value": pl.Float64}
+        assert undone == {"code": pl.Int64, "value": pl.Float64}
+
+    def test_set_data_forgets_source(self):
+        """New data no longer comes from the file, so its types are not recorded for it."""
+        # Act
+        self.model.set_data(pl.DataFrame({"code": ["a"]}))
+        self.model.set_column_type(0, "String")
+
+        # Assert
+        assert self.cache.get(self.path, separator=",", header=True) is None
+
+
+class TestTableModelFormattedBlocks:
+    """Test suite for the cells read from the cached formatted blocks of TableModel."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.frame = pl.DataFrame({
+            "id": list(range(1000)),
+            "value": [None if i % 7 == 0 else i * 0.5 for i in range(1000)],
+            "name": [f"n{i}" for i in range(1000)],
+        })
+        self.model = TableModel(self.frame, block_size=64, max_blocks=4)
+
+    def display(self, row, column):
+        return self.model.data(self.model.index(row, column), Qt.ItemDataRole.DisplayRole)
+
+    def test_every_row_reported(self):
+        """The view gets the true row count, so the last row is reachable at once."""
+        # Assert
+        assert self.model.rowCount(None) == 1000
+        assert self.display(999, 2) == "n999"
+
+    def test_cells_match_scalar_formatting(self):
+        """Block formatting gives the same text as formatting each Polars scalar."""
+        # Act
+        cells = [self.display(row, column) for row in range(0, 1000, 37) for column in range(3)]
+
+        # Assert
+        expected = [
+            "" if self.frame[row, column] is None else str(self.frame[row, column])
+            for row in range(0, 1000, 37) for column in range(3)
+        ]
+        assert cells == expected
+
+    def test_blocks_bounded(self):
+        """Only the most recently painted blocks are kept."""
+        # Act
+        for row in range(0, 1000, 64):
+            self.display(row, 0)
+
+        # Assert
+        assert len(self.model._blocks) == 4
+        assert (0, 1000 // 64) in self.model._blocks
+
+    def test_edit_refreshes_cell(self):
+        """An edit drops the cached blocks of the edited column only."""
+        # Arrange
+        self.display(3, 1)
+        self.display(3, 2)
+
+        # Act
+        self.model.setData(self.model.index(3, 1), "8.25")
+
+        # Assert
+        assert (1, 0) not in self.model._blocks and (2, 0) in self.model._blocks
+        assert self.display(3, 1) == "8.25"
+        self.model.undo()
+        assert self.display(3, 1) == "1.5"
+
+
+class TestTableModelEditOverlay:
+    """Test suite for the copy-on-write cell edits of TableModel."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.frame = pl.DataFrame({"a": [1, 2, 3, 4], "b": ["w", "x", "y", "z"]})
+        self.model = TableModel(self.frame)
+
+    def test_edit_kept_in_overlay(self):
+        """An edit is shown and read back without rebuilding the frame."""
+        # Act
+        self.model.setData(self.model.index(1, 0), "20")
+
+        # Assert
+        assert self.model._frame is self.frame
+        assert self.model.cell(1, 0) == 20
+        assert self.model.data(self.model.index(1, 0), Qt.ItemDataRole.DisplayRole) == "20"
+
+    def test_get_data_compacts_overlay(self):
+        """The frame handed out includes every edit, and the shared frame is left untouched."""
+        # Arrange
+        self.model.setData(self.model.index(0, 0), "10")
+        self.model.setData(self.model.index(3, 1), "q")
+
+        # Act
+        data = self.model.get_data()
+
+        # Assert
+        assert data.to_dict(as_series=False) == {"a": [10, 2, 3, 4], "b": ["w", "x", "y", "q"]}
+        assert self.frame.to_dict(as_series=False) == {"a": [1, 2, 3, 4], "b": ["w", "x", "y", "z"]}
+        assert self.model._edits == {}
+
+    def test_scan_includes_edits(self):
+        """A scan of the model sees the edits."""
+        # Arrange
+        self.model.setData(self.model.index(2, 1), "v")
+
+        # Act
+        result = self.model.scan().collect()
+
+        # Assert
+        assert result["b"].to_list() == ["w", "x", "v", "z"]
+
+    def test_invalid_value_rejected(self):
+        """A value the column cannot hold is refused and nothing is recorded."""
+        # Act / Assert
+        with pytest.raises(TypeError):
+            self.model.set_cell(0, 0, "abc")
+        assert self.model._edits == {}
+
+    def test_undo_after_compaction(self):
+        """Undo restores the cell whether or not the edit was compacted."""
+        # Arrange
+        self.model.setData(self.model.index(1, 1), "k")
+        self.model.get_data()
+
+        # Act
+        self.model.undo()
+
+        # Assert
+        assert self.model.get_data()["b"].to_list() == ["w", "x", "y", "z"]
+
+    def test_scan_from_worker_while_editing(self):
+        """A run reading the data from its thread neither fails nor loses the edits made meanwhile."""
+        # Arrange
+        model = TableModel(pl.DataFrame({"a": list(range(2000))}), block_size=16)
+        errors = []
+        stop = threading.Event()
+
+        def run():
+            try:
+                while not stop.is_set():
+                    model.scan().collect()
+                    model.column_fingerprints()
+            except Exception as e:
+                errors.append(e)
+
+        worker = threading.Thread(target=run)
+        worker.start()
+
+        # Act
+        for row in range(2000):
+            model.set_cell(row, 0, -row)
+            model.data(model.index(row, 0), Qt.ItemDataRole.DisplayRole)
+        stop.set()
+        worker.join()
+
+        # Assert
+        assert errors == []
+        assert model.get_data()["a"].to_list() == [-row for row in range(2000)]
+
+
+class TestTableModelRows:
+    """Test suite for the row inserts and deletes of TableModel."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.frame = pl.DataFrame({
+            "a": list(range(100)),
+            "b": pl.Series([i * 0.5 for i in range(100)], dtype=pl.Float32),
+            "c": [f"r{i}" for i in range(100)],
+        })
+        self.model = TableModel(self.frame, max_chunks=4)
+
+    def test_insert_typed_blank_rows(self):
+        """Inserted rows keep the column types, with empty strings in text columns."""
+        # Act
+        self.model.addRowsAfter(self.model.index(9, 0), 2)
+
+        # Assert
+        data = self.model.get_data()
+        assert data.schema == self.frame.schema
+        assert data.slice(9, 4).rows() == [(9, 4.5, "r9"), (None, None, ""), (None, None, ""), (10, 5.0, "r10")]
+
+    def test_delete_and_undo(self):
+        """Deleted rows are restored in place by undo, and deleted again by redo."""
+        # Arrange
+        self.model.deleteRows(40, 20)
+
+        # Act
+        self.model.undo()
+
+        # Assert
+        assert self.model.get_data().equals(self.frame)
+        self.model.redo()
+        assert self.model.rowCount(None) == 80
+        assert self.model.get_data()["a"][40] == 60
+
+    def test_undo_keeps_removed_rows_only(self):
+        """The delete command keeps the removed rows only."""
+        # Act
+        self.model.deleteRows(10, 3)
+
+        # Assert
+        rows = self.model.undo_stack.command(0).rows_data.get()
+        assert rows["a"].to_list() == [10, 11, 12]
+
+    def test_chunks_bounded(self):
+        """Repeated inserts and deletes do not fragment the frame beyond `max_chunks`."""
+        # Act
+        for row in range(0, 50, 5):
+            self.model.addRowsBefore(self.model.index(row, 0), 1)
+            self.model.deleteRows(row + 2, 1)
+
+        # Assert
+        assert max(self.model.get_data().n_chunks("all")) <= 4
+        assert self.model.rowCount(None) == 100
+        assert self.frame["a"].to_list() == list(range(100))
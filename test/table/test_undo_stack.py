@@ -0,0 +1,100 @@
+"""
+Unit tests for the memory-bounded UndoStack using pytest with AAA pattern.
+This test suite follows the Arrange-Act-Assert pattern and includes both success and failure scenarios.
+"""
+
+import os
+
+import pytest
+import polars as pl
+from PyQt6.QtWidgets import QApplication
+
+from model.TableModel import TableModel
+from service.command.LoadDataCommand import LoadDataCommand
+from service.command.UndoStack import UndoPayload
+
+
+class TestUndoStack:
+    """Test suite for the undo entries of TableModel and their memory budget."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        """Setup test environment before each test method."""
+        # Arrange - Create test fixtures
+        if not QApplication.instance():
+            self.app = QApplication([])
+        self.frame = pl.DataFrame({
+            "a": list(range(10_000)),
+            "b": [float(i) for i in range(10_000)],
+            "c": [str(i) for i in range(10_000)],
+        })
+        self.model = TableModel(self.frame)
+
+    def test_type_change_keeps_polars_columns(self):
+        """A type change keeps the columns as Polars data and undoes to the original column."""
+        # Act
+        self.model.set_column_type(0, "String")
+        command = self.model.undo_stack.command(0)
+        self.model.undo()
+
+        # Assert
+        assert isinstance(command.old_data, UndoPayload)
+        assert self.model.get_data().equals(self.frame)
+
+    def test_delete_columns_undo(self):
+        """Deleted columns are kept as one frame and restored in place."""
+        # Arrange
+        self.model.deleteColumns(0, 2)
+
+        # Act
+        self.model.undo()
+
+        # Assert
+        assert self.model.get_data().equals(self.frame)
+
+    def test_live_frame_not_counted(self):
+        """The frame the model shows is not counted in the budget."""
+        # Act
+        self.model.undo_stack.push(LoadDataCommand(self.model, self.frame.clone(), old_data=pl.DataFrame()))
+
+        # Assert
+        assert self.model.undo_stack.nbytes() == 0
+
+    def test_oldest_entries_evicted(self):
+        """Over budget, the oldest entries are evicted and can no longer be undone."""
+        # Arrange
+        stack = self.model.undo_stack
+        stack.max_bytes = self.frame["c"].estimated_size() + 1
+
+        # Act
+        self.model.set_column_type(0, "String")
+        self.model.set_column_type(1, "String")
+        self.model.set_column_type(2, "String")
+
+        # Assert
+        assert stack.floor == 2
+        assert stack.command(0).old_data.released
+        self.model.undo()
+        self.model.undo()
+        assert self.model.get_column_type(2) == pl.Utf8
+        assert self.model.get_column_type(1) == pl.Utf8
+        assert not stack.canUndo()
+
+    def test_large_entries_spilled(self, tmp_path):
+        """With spilling enabled, large entries are written to disk and read back on undo."""
+        # Arrange
+        stack = self.model.undo_stack
+        stack.max_bytes = 1
+        stack.spill_bytes = 1
+        stack.spill_dir = str(tmp_path)
+
+        # Act
+        self.model.deleteColumns(2, 1)
+        self.model.set_column_type(0, "String")
+
+        # Assert
+        payload = stack.command(0).deleted_columns
+        assert payload.spilled and len(os.listdir(tmp_path)) == 1
+        self.model.undo()
+        self.model.undo()
+        assert self.model.get_data().equals(self.frame)
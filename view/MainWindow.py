@@ -7,6 +7,7 @@ from PyQt6.QtCore import Qt, QSize, QTimer, QItemSelectionModel, QEvent
 from PyQt6.QtGui import QAction, QKeySequence, QIcon, QPixmap, QFont
 from view.components.ExcelLikeItemDelegate import ExcelLikeItemDelegate
 from view.components.TutorialManager import TutorialManager
+from view.components.FileProgressWidget import FileProgressWidget
 import polars as pl
 import datetime
 from model.TableModel import TableModel
@@ -38,6 +39,7 @@ from PyQt6.QtWidgets import QLabel
 import json
 import datetime
 from service.utils.utils import display_script_and_output
+from service.utils.clipboard import parse_clipboard, fill_selection
 from view.components.CustomToast import CustomToast
 import logging
 import traceback
@@ -219,8 +221,8 @@ class MainWindow(QMainWindow):
                         System Info:
                         - App Version: 1.4.0
                         - Current Tab: {self.tab_widget.currentIndex() if hasattr(self, 'tab_widget') else 'Unknown'}
-                        - Data1 Shape: {self.model1.get_data().shape if hasattr(self, 'model1') else 'Unknown'}
-                        - Data2 Shape: {self.model2.get_data().shape if hasattr(self, 'model2') else 'Unknown'}
+                        - Data1 Shape: {self.model1.shape() if hasattr(self, 'model1') else 'Unknown'}
+                        - Data2 Shape: {self.model2.shape() if hasattr(self, 'model2') else 'Unknown'}
                         {'='*50}
                         """
             self.logger.error(error_msg)
@@ -375,6 +377,10 @@ class MainWindow(QMainWindow):
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
 
+        # Progress of files read or written in the background, in the status bar
+        self.file_progress = FileProgressWidget(self)
+        self.statusBar().addPermanentWidget(self.file_progress)
+
         # Membuat menu bar
         self.menu_bar = self.menuBar()
 
@@ -1222,60 +1228,29 @@ class MainWindow(QMainWindow):
 
     def paste_selection(self):
         """Paste clipboard content to selected cells, Excel-style."""
+        from service.command.PasteCommand import PasteCommand
+
         clipboard = QApplication.clipboard()
-        clipboard_text = clipboard.text()
-        data = [row.split('\t') for row in clipboard_text.split('\n') if row]  # Parse clipboard data into a 2D array
+        data = parse_clipboard(clipboard.text())  # Parse clipboard data into a frame of strings
         
-        if not data:
+        if data.is_empty():
             return  # No data to paste
             
         selection = self.spreadsheet.selectionModel().selectedIndexes()
         if selection:
-            # Group selection by row to prepare for Excel-like pasting
-            selection_by_row = self.group_by_row(selection)
-            
-            # Sort each row by column to ensure we start from left to right
-            for i in range(len(selection_by_row)):
-                selection_by_row[i] = sorted(selection_by_row[i], key=lambda x: x.column())
-                
             # Get the top-left cell of the selection as the starting point
             start_row = min(index.row() for index in selection)
             start_col = min(index.column() for index in selection)
             
-            # Get the dimensions of the selection
-            selection_height = max(index.row() for index in selection) - start_row + 1
-            selection_width = max(index.column() for index in selection) - start_col + 1
-            
-            # Create a single undo command for the entire paste operation
-            from service.command.PasteCommand import PasteCommand
-            
-            # Excel-like paste: fill the selected range by repeating the clipboard data if needed
-            if len(selection_by_row) > 1 or len(selection_by_row[0]) > 1:
-                # For multiple cell selection: calculate how many times to repeat the data
-                data_height = len(data)
-                data_width = max(len(row) for row in data)
-                
-                # Create a new data array that fills the entire selection
-                filled_data = []
-                for i in range(selection_height):
-                    row_data = []
-                    for j in range(selection_width):
-                        # Get the corresponding value from clipboard data, wrapping around if needed
-                        if i < data_height and j < len(data[i % data_height]):
-                            row_data.append(data[i % data_height][j % len(data[i % data_height])])
-                        else:
-                            row_data.append("")  # Empty cell if no data
-                    filled_data.append(row_data)
-                
-                # Apply the filled data to the selection
-                paste_command = PasteCommand(self.model1, start_row, start_col, filled_data)
-                self.model1.undo_stack.push(paste_command)
-            else:
-                # Single cell selection: paste all data starting from this cell
-                paste_command = PasteCommand(self.model1, start_row, start_col, data)
-                self.model1.undo_stack.push(paste_command)
+            # Excel-like paste: fill the selected range by repeating the clipboard data if needed,
+            # a single selected cell receives all data starting from this cell
+            if len(selection) > 1:
+                selection_height = max(index.row() for index in selection) - start_row + 1
+                selection_width = max(index.column() for index in selection) - start_col + 1
+                data = fill_selection(data, selection_height, selection_width)
             
-            # No need to manually set data here since redo() is automatically called when a command is pushed
+            # A single undo command for the entire paste operation, redo() is called when it is pushed
+            self.model1.undo_stack.push(PasteCommand(self.model1, start_row, start_col, data))
 
     def undo_action(self):
         """Undo the last action."""
@@ -1427,8 +1402,8 @@ class MainWindow(QMainWindow):
             # Save data1 and data2 as parquet
             data1_path = os.path.join(temp_dir, 'sae_pisan_data1.parquet')
             data2_path = os.path.join(temp_dir, 'sae_pisan_data2.parquet')
-            self.model1.get_data().write_parquet(data1_path)
-            self.model2.get_data().write_parquet(data2_path)
+            self.model1.scan().sink_parquet(data1_path)
+            self.model2.scan().sink_parquet(data2_path)
 
             # Save output as JSON
             output_path = os.path.join(temp_dir, 'sae_pisan_output.json')
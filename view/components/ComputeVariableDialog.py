@@ -37,7 +37,7 @@ class ComputeVariableDialog(QDialog):
         super().__init__(parent)
         self.parent = parent
         self.model = parent.model1
-        self.column_names = self.model.get_data().columns
+        self.column_names = self.model.schema().names()
         self.templates = self.load_templates()
 
         self.setWindowTitle("Compute New Variable")
@@ -0,0 +1,52 @@
+from PyQt6.QtWidgets import QWidget, QLabel, QHBoxLayout, QPushButton, QProgressBar
+
+
+class FileProgressWidget(QWidget):
+    """
+    Status bar widget showing the progress of a file read or written in the background, with a Cancel button.
+    The bar follows the bytes read or rows written when their total is known, and is shown busy otherwise
+    (e.g. Excel or JSON files read at once, Parquet files streamed by Polars).
+    Attributes:
+        label (QLabel): The action, the name of the file and the number of rows read or written.
+        progress_bar (QProgressBar): The part of the file done, in percent.
+        cancel_button (QPushButton): Cancels the load or export.
+    Methods:
+        start(file_name, action="Loading"):
+            Shows the widget for a new load or export.
+        update_progress(rows, done, total):
+            Updates the rows and the part done (bytes or rows) out of `total`.
+        finish():
+            Hides the widget.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel(self)
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setMaximumWidth(200)
+        self.cancel_button = QPushButton("Cancel", self)
+        layout.addWidget(self.label)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.cancel_button)
+        self.file_name = ""
+        self.action = "Loading"
+        self.hide()
+
+    def start(self, file_name, action="Loading"):
+        self.file_name = file_name
+        self.action = action
+        self.label.setText(f"{action} {file_name}...")
+        self.progress_bar.setRange(0, 0)
+        self.cancel_button.setEnabled(True)
+        self.show()
+
+    def update_progress(self, rows, done, total):
+        self.label.setText(f"{self.action} {self.file_name}: {rows:,} rows")
+        if total:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(min(done * 100 // total, 100))
+
+    def finish(self):
+        self.hide()
@@ -66,6 +66,8 @@ class ModelingSaeDialog(QDialog):
         as_factor_var (list): List of factors of auxiliary variables.
         selection_method (str): Method of selection.
         method (str): Method for the model.
+        backend (str): Engine fitting the model, "R" (sae package) or "Native" (NumPy).
+        multiple_responses (bool): Fit several variables of interest, each with its own direct variance, at once.
         finnish (bool): Flag to indicate if the model run is finished.
         stop_thread (threading.Event): Event to stop the thread.
     Methods:
@@ -245,12 +247,15 @@ class ModelingSaeDialog(QDialog):
         self.as_factor_var = []
         self.selection_method = "None"
         self.method = "REML"
+        self.backend = "R"
+        self.multiple_responses = False
         self.finnish = False
 
         self.run_model_finished.connect(self.on_run_model_finished)
         
         self.stop_thread = threading.Event()
         self.reply=None
+        self.sae_model = None
         
         self.console_dialog = None
         self.update_console.connect(self._append_console)
@@ -503,6 +508,8 @@ class ModelingSaeDialog(QDialog):
                     self.reply.setDefaultButton(QMessageBox.StandardButton.No)
                 if self.reply.exec() != QMessageBox.StandardButton.Yes and not self.finnish:
                     self.stop_thread.set()
+                    if self.sae_model is not None:
+                        self.sae_model.cancel()
                     self.run_model_finished.emit("Threads are stopped", True, "sae_model", "")
         self.finnish=False
         self.reply=None
@@ -516,7 +523,7 @@ class ModelingSaeDialog(QDialog):
             f"{col} [Categorical]" if dtype == pl.Categorical else
             f"{col} [Boolean]" if dtype == pl.Boolean else
             f"{col} [Numeric]"
-            for col, dtype in zip(self.model.get_data().columns, self.model.get_data().dtypes)
+            for col, dtype in self.model.schema().items()
         ]
         self.variables_model.setStringList(self.columns)
         self.vardir_model.setStringList([])
@@ -529,6 +536,8 @@ class ModelingSaeDialog(QDialog):
         self.as_factor_var = []
         self.selection_method = "None"
         self.method = "REML"
+        self.backend = "R"
+        self.multiple_responses = False
     
     def accept(self):
         if (not self.vardir_var or self.vardir_var == [""]) and (not self.of_interest_var or self.of_interest_var == [""]):
@@ -550,6 +559,13 @@ class ModelingSaeDialog(QDialog):
             self.ok_button.setText("Run Model")
             return
         
+        if self.multiple_responses and len(self.of_interest_var) != len(self.vardir_var):
+            QMessageBox.warning(self, "Warning", "Each variable of interest needs its own Varians Direct.")
+            self.ok_button.setEnabled(True)
+            self.option_button.setEnabled(True)
+            self.ok_button.setText("Run Model")
+            return
+        
         r_script = get_script(self)
         if not check_script(r_script):
             return
@@ -557,6 +573,10 @@ class ModelingSaeDialog(QDialog):
 
         view = self.parent
         sae_model = SaeEblup(self.model, self.model2, view)
+        sae_model.backend = self.backend
+        sae_model.of_interest_var, sae_model.auxilary_vars, sae_model.vardir_var, sae_model.as_factor_var = get_selected_variables(self)
+        sae_model.method = self.method
+        self.sae_model = sae_model
         controller = SaeController(sae_model)
         
         current_context = contextvars.copy_context()
@@ -565,6 +585,7 @@ class ModelingSaeDialog(QDialog):
         if show_console_first:
             self.console_dialog = ConsoleDialog(self)
             self.console_dialog.show()
+            sae_model.on_output = self.update_console.emit
         
         def run_model_thread():
             result, error, df = None, None, None
@@ -574,9 +595,12 @@ class ModelingSaeDialog(QDialog):
                     old_stdout = sys.stdout
                     sys.stdout = ConsoleStream(self.update_console)
                 
-                from rpy2.rinterface_lib import openrlib
-                with openrlib.rlock:
+                if not sae_model.uses_embedded_r():
                     result, error, df = current_context.run(controller.run_model, r_script)
+                else:
+                    from rpy2.rinterface_lib import openrlib
+                    with openrlib.rlock:
+                        result, error, df = current_context.run(controller.run_model, r_script)
                 
                 if self.console_dialog:
                     sys.stdout = old_stdout
@@ -597,6 +621,7 @@ class ModelingSaeDialog(QDialog):
                 reply = QMessageBox.question(self, 'Warning', 'Run has been running for more than 5 minute. Do you want to continue?')
                 if reply == QMessageBox.StandardButton.No:
                     self.stop_thread.set()
+                    sae_model.cancel()
                     QMessageBox.information(self, 'Info', 'Run has been stopped.')
                     enable_service(self, False, "")
 
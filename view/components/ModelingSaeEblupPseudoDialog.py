@@ -280,6 +280,7 @@ class ModelingSaePseudoDialog(QDialog):
         
         self.stop_thread = threading.Event()
         self.reply=None
+        self.sae_model = None
         
         self.console_dialog = None
         self.update_console.connect(self._append_console)
@@ -519,6 +520,8 @@ class ModelingSaePseudoDialog(QDialog):
                     self.reply.setDefaultButton(QMessageBox.StandardButton.No)
                 if self.reply.exec() != QMessageBox.StandardButton.Yes and not self.finnish:
                     self.stop_thread.set()
+                    if self.sae_model is not None:
+                        self.sae_model.cancel()
                     self.run_model_finished.emit("Threads are stopped", True, "sae_model", "")
         self.finnish=False
         self.reply=None
@@ -532,7 +535,7 @@ class ModelingSaePseudoDialog(QDialog):
             f"{col} [Categorical]" if dtype == pl.Categorical else
             f"{col} [Boolean]" if dtype == pl.Boolean else
             f"{col} [Numeric]"
-            for col, dtype in zip(self.model.get_data().columns, self.model.get_data().dtypes)
+            for col, dtype in self.model.schema().items()
         ]
         self.variables_model.setStringList(self.columns)
         self.of_interest_model.setStringList([])
@@ -568,12 +571,14 @@ class ModelingSaePseudoDialog(QDialog):
 
         view = self.parent
         sae_model = SaeEblupPseudo(self.model, self.model2, view)
+        self.sae_model = sae_model
         controller = SaePseudoController(sae_model)
         
         show_console_first = self.show_console_first_checkbox.isChecked()
         if show_console_first:
             self.console_dialog = ConsoleDialog(self)
             self.console_dialog.show()
+            sae_model.on_output = self.update_console.emit
         
         current_context = contextvars.copy_context()
         
@@ -584,9 +589,12 @@ class ModelingSaePseudoDialog(QDialog):
                     import sys
                     old_stdout = sys.stdout
                     sys.stdout = ConsoleStream(self.update_console)
-                from rpy2.rinterface_lib import openrlib
-                with openrlib.rlock:
+                if not sae_model.uses_embedded_r():
                     result, error, df = current_context.run(controller.run_model, r_script)
+                else:
+                    from rpy2.rinterface_lib import openrlib
+                    with openrlib.rlock:
+                        result, error, df = current_context.run(controller.run_model, r_script)
                 if self.console_dialog:
                     sys.stdout = old_stdout
                 if not error:
@@ -604,6 +612,7 @@ class ModelingSaePseudoDialog(QDialog):
                 reply = QMessageBox.question(self, 'Warning', 'Run has been running for more than 5 minute. Do you want to continue?')
                 if reply == QMessageBox.StandardButton.No:
                     self.stop_thread.set()
+                    sae_model.cancel()
                     QMessageBox.information(self, 'Info', 'Run has been stopped.')
                     enable_service(self, False, "")
 
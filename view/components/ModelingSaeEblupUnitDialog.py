@@ -83,6 +83,8 @@ class ModelingSaeUnitDialog(QDialog):
         selection_method (str): Selection method.
         method (str): Method used for modeling.
         bootstrap (str): Number of bootstrap samples.
+        seed (str): Seed of the bootstrap, empty for a random seed.
+        backend (str): Engine fitting the model, "R" (sae package) or "Native" (NumPy).
         finnish (bool): Flag indicating if the model run is finished.
         stop_thread (threading.Event): Event to stop the thread.
     Methods:
@@ -310,6 +312,9 @@ class ModelingSaeUnitDialog(QDialog):
         self.selection_method = "None"
         self.method = "REML"
         self.bootstrap = "50"
+        self.seed = ""
+        self.backend = "R"
+        self.sae_model = None
         self.finnish = False
         
         self.run_model_finished.connect(self.on_run_model_finished)
@@ -564,6 +569,8 @@ class ModelingSaeUnitDialog(QDialog):
                     self.reply.setDefaultButton(QMessageBox.StandardButton.No)
                 if self.reply.exec() != QMessageBox.StandardButton.Yes and not self.finnish:
                     self.stop_thread.set()
+                    if self.sae_model is not None:
+                        self.sae_model.cancel()
                     self.run_model_finished.emit("Threads are stopped", True, "sae_model", "")
         self.finnish=False
         self.reply=None
@@ -578,7 +585,7 @@ class ModelingSaeUnitDialog(QDialog):
             f"{col} [Categorical]" if dtype == pl.Categorical else
             f"{col} [Boolean]" if dtype == pl.Boolean else
             f"{col} [Numeric]"
-            for col, dtype in zip(self.model.get_data().columns, self.model.get_data().dtypes)
+            for col, dtype in self.model.schema().items()
         ]
         self.variables_model.setStringList(self.columns)
         self.aux_mean_model.setStringList([])
@@ -598,6 +605,8 @@ class ModelingSaeUnitDialog(QDialog):
         self.selection_method = "None"
         self.method = "REML"
         self.bootstrap = "50"
+        self.seed = ""
+        self.backend = "R"
     
     def accept(self):
         if not self.of_interest_var or self.of_interest_var == [""]:
@@ -614,6 +623,18 @@ class ModelingSaeUnitDialog(QDialog):
 
         view = self.parent
         sae_model = SaeEblupUnit(self.model, self.model2, view)
+        sae_model.bootstrap = self.bootstrap
+        sae_model.seed = int(self.seed) if self.seed else None
+        sae_model.backend = self.backend
+        sae_model.method = self.method
+        sae_model.of_interest_var = self.of_interest_var
+        sae_model.auxilary_vars = self.auxilary_vars
+        sae_model.as_factor_var = self.as_factor_var
+        sae_model.index_var = self.index_var
+        sae_model.aux_mean_vars = self.aux_mean_vars
+        sae_model.population_sample_size_var = self.population_sample_size_var
+        sae_model.domain_var = self.domain_var
+        self.sae_model = sae_model
         controller = SaeEblupUnitController(sae_model)
         
         current_context = contextvars.copy_context()
@@ -622,6 +643,7 @@ class ModelingSaeUnitDialog(QDialog):
         if show_console_first:
             self.console_dialog = ConsoleDialog(self)
             self.console_dialog.show()
+            sae_model.on_output = self.update_console.emit
         
         def run_model_thread():
             results, error, df = None, None, None
@@ -630,9 +652,12 @@ class ModelingSaeUnitDialog(QDialog):
                     import sys
                     old_stdout = sys.stdout
                     sys.stdout = ConsoleStream(self.update_console)
-                from rpy2.rinterface_lib import openrlib
-                with openrlib.rlock:
+                if not sae_model.uses_embedded_r():
                     results, error, df = current_context.run(controller.run_model, r_script)
+                else:
+                    from rpy2.rinterface_lib import openrlib
+                    with openrlib.rlock:
+                        results, error, df = current_context.run(controller.run_model, r_script)
                 if self.console_dialog:
                     sys.stdout = old_stdout
                 if not error:
@@ -649,6 +674,7 @@ class ModelingSaeUnitDialog(QDialog):
                 reply = QMessageBox.question(self, 'Warning', 'Run has been running for more than 5 minute. Do you want to continue?')
                 if reply == QMessageBox.StandardButton.No:
                     self.stop_thread.set()
+                    sae_model.cancel()
                     QMessageBox.information(self, 'Info', 'Run has been stopped.')
                     enable_service(self, False, "")
 
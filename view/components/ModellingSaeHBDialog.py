@@ -259,6 +259,7 @@ class ModelingSaeHBDialog(QDialog):
         
         self.stop_thread = threading.Event()
         self.reply=None
+        self.sae_model = None
         self.finnish = False
         
         self.console_dialog = None
@@ -293,6 +294,8 @@ class ModelingSaeHBDialog(QDialog):
                     self.reply.setDefaultButton(QMessageBox.StandardButton.No)
                 if self.reply.exec() != QMessageBox.StandardButton.Yes and not self.finnish:
                     self.stop_thread.set()
+                    if self.sae_model is not None:
+                        self.sae_model.cancel()
                     print(self.stop_thread.is_set())
                     self.run_model_finished.emit("Threads are stopped", True, "sae_model", "", None)
         self.finnish=False
@@ -307,7 +310,7 @@ class ModelingSaeHBDialog(QDialog):
             f"{col} [Categorical]" if dtype == pl.Categorical else
             f"{col} [Boolean]" if dtype == pl.Boolean else
             f"{col} [Numeric]"
-            for col, dtype in zip(self.model.get_data().columns, self.model.get_data().dtypes)
+            for col, dtype in self.model.schema().items()
         ]
         self.variables_model.setStringList(self.columns)
         self.of_interest_model.setStringList([])
@@ -567,9 +570,8 @@ class ModelingSaeHBDialog(QDialog):
             self.ok_button.setText("Run Model")
             return
         
-        data = self.model.get_data()
         variable = self.of_interest_var[0].split('[')[0].strip()
-        col = data[variable]
+        col = self.model.scan().select(variable).collect().to_series()
         is_float = col.dtype == pl.Float64 or col.dtype == pl.Float32
         values = col.to_numpy() if hasattr(col, "to_numpy") else col.to_list()
         import numpy as np
@@ -593,6 +595,7 @@ class ModelingSaeHBDialog(QDialog):
 
         view = self.parent
         sae_model = SaeHB(self.model, self.model2, view)
+        self.sae_model = sae_model
         controller = SaeHBController(sae_model)
         
         current_context = contextvars.copy_context()
@@ -601,6 +604,7 @@ class ModelingSaeHBDialog(QDialog):
         if show_console_first:
             self.console_dialog = ConsoleDialog(self)
             self.console_dialog.show()
+            sae_model.on_output = self.update_console.emit
         
         def run_model_thread():
             import sys
@@ -609,9 +613,12 @@ class ModelingSaeHBDialog(QDialog):
                 if self.console_dialog:
                     old_stdout = sys.stdout
                     sys.stdout = ConsoleStream(self.update_console)
-                from rpy2.rinterface_lib import openrlib
-                with openrlib.rlock:
+                if not sae_model.uses_embedded_r():
                     result, error, df, plot_paths = current_context.run(controller.run_model, r_script)
+                else:
+                    from rpy2.rinterface_lib import openrlib
+                    with openrlib.rlock:
+                        result, error, df, plot_paths = current_context.run(controller.run_model, r_script)
                 if self.console_dialog:
                     sys.stdout = old_stdout
                 if not error:
@@ -642,6 +649,7 @@ class ModelingSaeHBDialog(QDialog):
                 reply = QMessageBox.question(self, 'Warning', 'Run has been running for more than 5 minute. Do you want to continue?')
                 if reply == QMessageBox.StandardButton.No:
                     self.stop_thread.set()
+                    sae_model.cancel()
                     print(self.stop_thread.is_set())
                     QMessageBox.information(self, 'Info', 'Run has been stopped.')
                     enable_service(self, False, "")
@@ -330,6 +330,7 @@ class ProjectionDialog(QDialog):
         
         self.stop_thread = threading.Event()
         self.reply=None
+        self.sae_model = None
         
         self.console_dialog = None
         self.update_console.connect(self._append_console)
@@ -363,6 +364,8 @@ class ProjectionDialog(QDialog):
                     self.reply.setDefaultButton(QMessageBox.StandardButton.No)
                 if self.reply.exec() != QMessageBox.StandardButton.Yes and not self.finnish:
                     self.stop_thread.set()
+                    if self.sae_model is not None:
+                        self.sae_model.cancel()
                     self.run_model_finished.emit("Threads are stopped", True, "sae_model", "")
         self.finnish=False
         self.reply=None
@@ -425,7 +428,7 @@ class ProjectionDialog(QDialog):
 
             # Filtering unique columns based on separator position
             unique_columns = {}
-            for col, dtype in zip(self.model.get_data().columns, self.model.get_data().dtypes):
+            for col, dtype in self.model.schema().items():
                 col_key = col.split(self.separator)[0] if self.var_position == "Before" else col.split(self.separator)[-1]
 
                 # Format dengan tipe data - DIPERBAIKI agar konsisten
@@ -459,7 +462,7 @@ class ProjectionDialog(QDialog):
             f"{col} [Categorical]" if dtype == pl.Categorical else
             f"{col} [Boolean]" if dtype == pl.Boolean else
             f"{col} [Numeric]"
-            for col, dtype in zip(self.model.get_data().columns, self.model.get_data().dtypes)
+            for col, dtype in self.model.schema().items()
         ]
         self.of_interest_model.setStringList([])
         self.auxilary_model.setStringList([])
@@ -730,12 +733,14 @@ class ProjectionDialog(QDialog):
 
         view = self.parent
         sae_model = Projection(self.model, self.model2, view)
+        self.sae_model = sae_model
         controller = ProjectionController(sae_model)
         
         show_console_first = self.show_console_first_checkbox.isChecked()
         if show_console_first:
             self.console_dialog = ConsoleDialog(self)
             self.console_dialog.show()
+            sae_model.on_output = self.update_console.emit
         
         current_context = contextvars.copy_context()
         
@@ -745,9 +750,12 @@ class ProjectionDialog(QDialog):
                 if self.console_dialog:
                     old_stdout = sys.stdout
                     sys.stdout = ConsoleStream(self.update_console)
-                from rpy2.rinterface_lib import openrlib
-                with openrlib.rlock:
+                if not sae_model.uses_embedded_r():
                     result, error, df = current_context.run(controller.run_model, r_script)
+                else:
+                    from rpy2.rinterface_lib import openrlib
+                    with openrlib.rlock:
+                        result, error, df = current_context.run(controller.run_model, r_script)
                 if self.console_dialog:
                     sys.stdout = old_stdout
                 if not error:
@@ -765,6 +773,7 @@ class ProjectionDialog(QDialog):
                 reply = QMessageBox.question(self, 'Warning', 'Run has been running for more than 5 minutes. Do you want to continue?')
                 if reply == QMessageBox.StandardButton.No:
                     self.stop_thread.set()
+                    sae_model.cancel()
                     QMessageBox.information(self, 'Info', 'Run has been stopped.')
                     enable_service(self, False, "")
 
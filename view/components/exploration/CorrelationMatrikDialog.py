@@ -271,7 +271,7 @@ class CorrelationMatrixDialog(QDialog):
         String, Numeric, or None.
         """
         self.columns = []
-        for col, dtype in zip(model.get_data().columns, model.get_data().dtypes):
+        for col, dtype in model.schema().items():
             if dtype == pl.Utf8:
                 tipe = "String"
             elif dtype == pl.Null: